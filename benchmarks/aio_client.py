@@ -0,0 +1,128 @@
+"""
+Async clients check
+
+Runs the async clients (`mlops_codex.aio`) and `MLOpsModel.apredict` against the local MLOps API emulator
+(`mlops_codex.testing`) and checks that:
+
+- without httpx, the async session raises an ImportError naming the `async` extra;
+- concurrent sync predictions of an `AsyncMLOpsModel` each get the response of their own input;
+- an async prediction runs to completion and its result is downloaded;
+- `MLOpsModel.apredict` and `MLOpsModel.apredict_stream` answer each input in order;
+- a request is replayed with a new user token when the server revokes the current one.
+
+httpx must be installed (`pip install datarisk-mlops-codex[async]`).
+
+Usage:
+    python benchmarks/aio_client.py
+    python benchmarks/aio_client.py --calls 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mlops_codex.aio import AsyncMLOpsModelClient, AsyncMLOpsSession  # noqa: E402
+from mlops_codex.logger_config import configure_logger  # noqa: E402
+from mlops_codex.model import MLOpsModel  # noqa: E402
+from mlops_codex.session import SessionConfig  # noqa: E402
+from mlops_codex.testing import MLOpsEmulator  # noqa: E402
+
+GROUP = "aio"
+GROUP_TOKEN = "aio-token"
+
+
+def missing_httpx() -> dict:
+    """Create an async session while httpx can't be imported"""
+    httpx = sys.modules.get("httpx")
+    sys.modules["httpx"] = None
+    try:
+        AsyncMLOpsSession()
+        message = None
+    except ImportError as e:
+        message = str(e)
+    finally:
+        if httpx is None:
+            del sys.modules["httpx"]
+        else:
+            sys.modules["httpx"] = httpx
+    return {"message": message, "ok": message is not None and "[async]" in message}
+
+
+async def sync_predictions(client: AsyncMLOpsModelClient, model_id: str, calls: int) -> dict:
+    model = await client.get_model(model_id=model_id, group=GROUP, group_token=GROUP_TOKEN)
+    results = await asyncio.gather(*(model.predict(data={"i": i}) for i in range(calls)))
+    wrong = [i for i, result in enumerate(results) if result != {"echo": {"i": i}}]
+    return {"calls": calls, "wrong": len(wrong), "ok": not wrong}
+
+
+async def async_prediction(client: AsyncMLOpsModelClient, model_id: str) -> dict:
+    model = await client.get_model(model_id=model_id, group=GROUP, group_token=GROUP_TOKEN)
+    with tempfile.TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, "input.csv")
+        with open(input_file, "w") as f:
+            f.write("id\n1\n")
+        execution = await model.predict(data=input_file, wait_complete=True)
+        await execution.download_result(path=directory, filename="output.zip")
+        output = os.path.join(directory, "output.zip")
+        size = os.path.getsize(output) if os.path.exists(output) else 0
+    return {"status": execution.status.name, "result_bytes": size, "ok": size > 0}
+
+
+async def model_apredict(model: MLOpsModel, calls: int) -> dict:
+    first = await model.apredict(data={"i": -1})
+    results = [result async for result in model.apredict_stream(({"i": i} for i in range(calls)), concurrency=50)]
+    wrong = [i for i, result in enumerate(results) if result != {"echo": {"i": i}}]
+    await model.aclose()
+    return {"calls": calls + 1, "wrong": len(wrong), "ok": first == {"echo": {"i": -1}} and not wrong}
+
+
+async def token_renewal(client: AsyncMLOpsModelClient, emulator: MLOpsEmulator, model_id: str) -> dict:
+    model = client.get_model_handle(model_id=model_id, group=GROUP, group_token=GROUP_TOKEN)
+    emulator._MLOpsEmulator__tokens.clear()
+    try:
+        await model.describe()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {"error": error, "ok": error is None and model.model_data is not None}
+
+
+async def run(emulator: MLOpsEmulator, calls: int) -> dict:
+    context = emulator.connect(session_config=SessionConfig(metrics=False))
+    sync_id = emulator.add_model(group=GROUP, scorer=lambda data: {"echo": data})
+    async_id = emulator.add_model(group=GROUP, operation="Async")
+
+    checks = {}
+    async with AsyncMLOpsModelClient(context=context) as client:
+        checks["sync_predictions"] = await sync_predictions(client, sync_id, calls)
+        checks["async_prediction"] = await async_prediction(client, async_id)
+        model = MLOpsModel(model_id=sync_id, group=GROUP, group_token=GROUP_TOKEN, context=context)
+        checks["model_apredict"] = await model_apredict(model, calls)
+        checks["token_renewal"] = await token_renewal(client, emulator, sync_id)
+    context.session.close()
+    return checks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="Concurrent predictions per check")
+    args = parser.parse_args()
+
+    configure_logger(log_levels=[])
+    checks = {"missing_httpx": missing_httpx()}
+    with MLOpsEmulator() as emulator:
+        emulator.create_group(GROUP, token=GROUP_TOKEN)
+        checks.update(asyncio.run(run(emulator, args.calls)))
+
+    report = {"checks": checks, "ok": all(check["ok"] for check in checks.values())}
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Client overhead microbenchmarks
+
+Measures the CPU time the SDK spends per operation, running against the local MLOps API emulator
+(`mlops_codex.testing`). CPU time is read with `time.thread_time`, so only the calling thread is counted and
+the emulator threads are left out. Every benchmark runs `--repeat` rounds and reports its fastest round.
+
+Benchmarks:
+
+- model_init / execution_init: constructing MLOpsModel and MLOpsExecution;
+- predict_sync_<size>: a whole sync predict, with its serialization and response parsing measured alone too;
+- predict_cached_<size>: a sync predict answered by a `PredictionCache`: hashing the input and decoding the
+  cached response;
+- parse_json_to_yaml_error: formatting the error payload logged on failed requests;
+- validate_kwargs: validating the keyword arguments of the external monitoring registration;
+- polling_waste: wall-clock time `MLOpsExecution.wait_ready` keeps waiting after an execution finished. The
+  emulator and the polling sleep run on a scaled clock, the results are reported in real seconds.
+
+The report is JSON. Save it with `--output` and pass it as `--baseline` to a later run to compare two commits:
+the run fails when a benchmark gets slower than `--threshold` times its baseline.
+
+Usage:
+    python benchmarks/client_overhead.py
+    python benchmarks/client_overhead.py --output before.json
+    python benchmarks/client_overhead.py --baseline before.json --threshold 1.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mlops_codex import base  # noqa: E402
+from mlops_codex.__utils import parse_json_to_yaml, validate_kwargs  # noqa: E402
+from mlops_codex.base import MLOpsExecution  # noqa: E402
+from mlops_codex.external_monitoring import MLOpsExternalMonitoringClient  # noqa: E402
+from mlops_codex.logger_config import configure_logger  # noqa: E402
+from mlops_codex.model import MLOpsModel  # noqa: E402
+from mlops_codex.prediction_cache import PredictionCache  # noqa: E402
+from mlops_codex.session import SessionConfig  # noqa: E402
+from mlops_codex.testing import MLOpsEmulator  # noqa: E402
+
+GROUP = "bench"
+GROUP_TOKEN = "bench-token"
+
+# Error payload like the ones the API returns on failed uploads
+ERROR_PAYLOAD = {
+    "Error": "Invalid parameters",
+    "Message": "Schema does not match the input of the model",
+    "Details": [{"Field": f"feature_{i}", "Expected": "float", "Received": "str"} for i in range(10)],
+}
+
+MONITORING_KWARGS = {
+    "name": "monitoring",
+    "group": GROUP,
+    "training_execution_id": 1,
+    "period": "Day",
+    "input_cols": ["a", "b"],
+    "output_cols": ["score"],
+    "datasource_name": "datasource",
+    "extraction_type": "Full",
+    "datasource_uri": "gs://bucket/data.csv",
+    "column_name": None,
+    "reference_date": None,
+    "python_version": "3.10",
+}
+
+
+def payload(rows: int) -> list:
+    return [{"id": i, "age": 30 + i % 40, "income": 1000.5 * i, "segment": f"s{i % 7}"} for i in range(rows)]
+
+
+def measure(func: Callable[[], object], *, number: int, repeat: int) -> Dict[str, float]:
+    """CPU and wall time per call of the fastest round, in microseconds"""
+    cpu, wall = [], []
+    for _ in range(repeat):
+        cpu_start, wall_start = time.thread_time(), time.perf_counter()
+        for _ in range(number):
+            func()
+        cpu.append((time.thread_time() - cpu_start) / number)
+        wall.append((time.perf_counter() - wall_start) / number)
+    return {
+        "cpu_us": round(min(cpu) * 1e6, 2),
+        "wall_us": round(min(wall) * 1e6, 2),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def polling_waste(context, emulator: MLOpsEmulator, durations: list, scale: float) -> dict:
+    """Run executions of known durations and measure how long wait_ready keeps waiting after each one ends"""
+    real_sleep = base.sleep
+    base.sleep = lambda seconds: time.sleep(seconds * scale)
+    model_id = emulator.add_model(group=GROUP, operation="Async")
+    model = MLOpsModel(model_id=model_id, group=GROUP, group_token=GROUP_TOKEN, context=context)
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+        f.write("id\n1\n")
+    input_file = f.name
+
+    results = {}
+    try:
+        for duration in durations:
+            emulator.config = emulator.config._replace(queue_seconds=0.0, run_seconds=duration * scale)
+            start = time.perf_counter()
+            execution = model.predict(data=input_file)
+            execution.wait_ready()
+            elapsed = (time.perf_counter() - start) / scale
+            results[f"{duration}s"] = round(max(elapsed - duration, 0.0), 2)
+    finally:
+        base.sleep = real_sleep
+        os.remove(input_file)
+
+    waste = list(results.values())
+    return {
+        "waste_seconds": results,
+        "mean_waste_seconds": round(statistics.mean(waste), 2),
+        "max_waste_seconds": round(max(waste), 2),
+        "scale": scale,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> dict:
+    """Ratio of the CPU time of each benchmark to its baseline, and the benchmarks slower than the threshold"""
+    ratios, regressions = {}, []
+    for name, result in report["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or not before["cpu_us"]:
+            continue
+        ratio = round(result["cpu_us"] / before["cpu_us"], 3)
+        ratios[name] = ratio
+        if ratio > threshold:
+            regressions.append(name)
+
+    before = baseline.get("polling", {}).get("mean_waste_seconds")
+    after = report["polling"]["mean_waste_seconds"]
+    if before is not None and after > before * threshold + 1:
+        regressions.append("polling_waste")
+    return {"baseline_commit": baseline.get("meta", {}).get("commit"), "cpu_ratio": ratios, "regressions": regressions}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200, help="Calls per round of the network benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per benchmark, the fastest one is reported")
+    parser.add_argument("--scale", type=float, default=0.01, help="Clock scale of the polling benchmark")
+    parser.add_argument("--output", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    configure_logger(log_levels=[])
+    number, local = args.number, args.number * 50
+
+    with MLOpsEmulator() as emulator:
+        emulator.create_group(GROUP, token=GROUP_TOKEN)
+        context = emulator.connect(session_config=SessionConfig(metrics=False))
+        benchmarks = {}
+
+        benchmarks["model_init"] = measure(
+            lambda: MLOpsModel(model_id="M1", group=GROUP, group_token=GROUP_TOKEN, context=context),
+            number=local,
+            repeat=args.repeat,
+        )
+        benchmarks["execution_init"] = measure(
+            lambda: MLOpsExecution(
+                parent_id="M1",
+                exec_type="AsyncModel",
+                group=GROUP,
+                exec_id="1",
+                group_token=GROUP_TOKEN,
+                context=context,
+            ),
+            number=local,
+            repeat=args.repeat,
+        )
+
+        model_id = emulator.add_model(group=GROUP, scorer=lambda data: {"Prediction": [0.5] * len(data)})
+        model = MLOpsModel(model_id=model_id, group=GROUP, group_token=GROUP_TOKEN, context=context)
+        cached = MLOpsModel(
+            model_id=model_id,
+            group=GROUP,
+            group_token=GROUP_TOKEN,
+            context=context,
+            prediction_cache=PredictionCache(),
+        )
+        for rows in (1, 100, 1000):
+            data = payload(rows)
+            body = json.dumps({"Input": data})
+            response = json.dumps({"Prediction": [0.5] * rows})
+            calls = max(number // max(rows // 100, 1), 10)
+            benchmarks[f"predict_sync_{rows}"] = measure(
+                lambda: model.predict(data=data), number=calls, repeat=args.repeat
+            )
+            benchmarks[f"predict_serialize_{rows}"] = measure(
+                lambda: json.dumps({"Input": data}), number=calls * 10, repeat=args.repeat
+            )
+            benchmarks[f"predict_parse_{rows}"] = measure(
+                lambda: json.loads(response), number=calls * 10, repeat=args.repeat
+            )
+            benchmarks[f"predict_sync_{rows}"]["request_bytes"] = len(body)
+            cached.predict(data=data)
+            benchmarks[f"predict_cached_{rows}"] = measure(
+                lambda: cached.predict(data=data), number=calls * 10, repeat=args.repeat
+            )
+
+        benchmarks["parse_json_to_yaml_error"] = measure(
+            lambda: parse_json_to_yaml(ERROR_PAYLOAD), number=number, repeat=args.repeat
+        )
+
+        validate = validate_kwargs(MLOpsExternalMonitoringClient.ExternalMonitoringData)(lambda self, **kwargs: None)
+        benchmarks["validate_kwargs"] = measure(
+            lambda: validate(None, **MONITORING_KWARGS), number=local, repeat=args.repeat
+        )
+
+        polling = polling_waste(context, emulator, [1, 10, 31, 45, 75, 100], args.scale)
+        context.session.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "unit": "microseconds per call of the calling thread",
+        },
+        "benchmarks": benchmarks,
+        "polling": polling,
+    }
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        failed = bool(report["comparison"]["regressions"])
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Cardinality of the endpoint labels
+
+The endpoint of a request names its metrics (the `endpoint` label) and its circuit breaker, so it must not carry the
+values of the path parameters: groups, hashes and execution ids would grow the Prometheus series and the breaker
+state without bound. This check collects every URL the SDK builds, from the f-strings of its modules and from
+`API_ROUTES`, renders each one twice with different random parameter values and checks that:
+
+- the URL matches one of `API_ROUTES`;
+- both renderings get the same endpoint label;
+- the label doesn't contain any of the parameter values.
+
+Parameters that only take a few fixed values (the operation, the execution kind, the period and the file names of
+the external monitoring uploads) are rendered with each of their values.
+
+Usage:
+    python benchmarks/endpoint_labels.py
+"""
+
+import argparse
+import ast
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mlops_codex.session import API_ROUTES, _match_route, metric_labels  # noqa: E402
+
+SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "mlops_codex")
+BASE_URL = "https://neomaril.example.com/api"
+
+# Parameters of the SDK URLs whose values are fixed, by the name of the expression that renders them
+FIXED_VALUES = {
+    "operation": ("sync", "async"),
+    "url_path": ("model/async", "training", "preprocessing/async"),
+    "path": ("model-file", "requirements-file", "script-file"),
+    "period": ("Day", "Week", "Month", "Quarter", "Year"),
+}
+
+
+def sdk_urls():
+    """Yield the module and the path template of every f-string that starts with an API URL"""
+    for filename in sorted(glob.glob(os.path.join(SOURCE, "*.py"))):
+        # The emulator serves the API, its URLs are not sent by the SDK
+        if os.path.basename(filename) == "testing.py":
+            continue
+        with open(filename) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.JoinedStr) or not node.values:
+                continue
+            head = node.values[0]
+            if not (isinstance(head, ast.FormattedValue) and re.search(r"url$", ast.unparse(head.value))):
+                continue
+            parts = []
+            for value in node.values[1:]:
+                if isinstance(value, ast.Constant):
+                    parts.append(str(value.value))
+                else:
+                    parts.append("{" + ast.unparse(value.value) + "}")
+            path = "".join(parts).split("?")[0]
+            if path.startswith("/"):
+                yield os.path.basename(filename), ast.unparse(head.value), path
+
+
+def fixed_values(expression: str):
+    """Values of a parameter of the SDK URLs that only takes a few ones, None for the others"""
+    for fixed, values in FIXED_VALUES.items():
+        if re.search(rf"{fixed}\b", expression):
+            if "replace('/async', '')" in expression:
+                return tuple(value.replace("/async", "") for value in values)
+            return values
+    return None
+
+
+def route_template(route: str):
+    """Turn the "a|b" segments of a route of API_ROUTES into parameters with fixed values"""
+    fixed = {}
+    segments = []
+    for segment in route.split("/"):
+        if "|" in segment:
+            name = f"choice{len(fixed)}"
+            fixed[name] = tuple(segment.split("|"))
+            segment = "{" + name + "}"
+        segments.append(segment)
+    return "/".join(segments), fixed
+
+
+def renderings(template: str, base: str, fixed: dict):
+    """Render the template with every combination of fixed values, twice with different random parameters"""
+    expressions = re.findall(r"\{([^{}]+)\}", template)
+    choices = [fixed.get(e) or (None,) for e in expressions]
+    for combination in itertools.product(*choices):
+        rendered = []
+        for _ in range(2):
+            path, values = template, []
+            for expression, value in zip(expressions, combination):
+                if value is None:
+                    value = "p" + uuid.uuid4().hex[:12]
+                    values.append(value)
+                path = path.replace("{" + expression + "}", value, 1)
+            rendered.append((base + path, values))
+        yield rendered
+
+
+def check(source: str, template: str, base: str, fixed: dict, labels: set) -> list:
+    problems = []
+    for (first, first_values), (second, _) in renderings(template, base, fixed):
+        path = first[len(BASE_URL) :]
+        label = metric_labels("GET", first, None)["endpoint"]
+        labels.add(label)
+        if _match_route([s for s in path.split("/") if s]) is None:
+            problems.append(f"{source}: {path} matches none of API_ROUTES")
+        if label != metric_labels("GET", second, None)["endpoint"]:
+            problems.append(f"{source}: one label per parameter value, e.g. {label}")
+        leaked = [value for value in first_values if value in label]
+        if leaked:
+            problems.append(f"{source}: {leaked} leaked into the label {label}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    problems, labels, checked = [], set(), 0
+    for module, base, template in sdk_urls():
+        base_url = BASE_URL + ("/external-monitoring" if base.endswith("external_monitoring_url") else "")
+        fixed = {e: fixed_values(e) for e in re.findall(r"\{([^{}]+)\}", template)}
+        problems += check(f"{module} {template}", template, base_url, fixed, labels)
+        checked += 1
+    for route in API_ROUTES:
+        template, fixed = route_template(route)
+        problems += check(f"API_ROUTES {route}", template, BASE_URL, fixed, labels)
+
+    report = {
+        "sdk_urls": checked,
+        "routes": len(API_ROUTES),
+        "labels": len(labels),
+        "problems": problems,
+        "ok": not problems,
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
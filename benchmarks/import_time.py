@@ -0,0 +1,89 @@
+"""
+Import time budget check
+
+Measures `python -X importtime -c "import <module>"` in fresh interpreters and fails
+when a module takes longer than its budget or loads a dependency that should only be
+imported on the code paths that use it.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --budget mlops_codex.model=150
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Cumulative import time budgets, in milliseconds. Most of the client modules time is requests.
+BUDGETS = {
+    "mlops_codex": 50,
+    "mlops_codex.session": 250,
+    "mlops_codex.model": 250,
+    "mlops_codex.training": 250,
+    "mlops_codex.pipeline": 250,
+}
+
+# Dependencies that must not be loaded just by importing the package modules
+LAZY_DEPENDENCIES = ["pandas", "numpy", "cloudpickle", "yaml", "loguru", "dotenv"]
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def measure(module: str) -> float:
+    """Cumulative import time of the module in a fresh interpreter, in milliseconds"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")])}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"Module {module} not found in the import time report")
+
+
+def loaded_dependencies(module: str) -> list:
+    """Lazy dependencies present in sys.modules after importing the module"""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([SRC, os.environ.get("PYTHONPATH", "")])}
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {LAZY_DEPENDENCIES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module, the fastest one is used")
+    parser.add_argument("--budget", action="append", default=[], help="Override a budget, e.g. mlops_codex.model=150")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        module, ms = item.split("=")
+        budgets[module] = float(ms)
+
+    report = {}
+    failed = False
+    for module, budget in budgets.items():
+        elapsed = min(measure(module) for _ in range(args.repeat))
+        eager = loaded_dependencies(module)
+        ok = elapsed <= budget and not eager
+        failed |= not ok
+        report[module] = {"ms": round(elapsed, 1), "budget_ms": budget, "eager_dependencies": eager, "ok": ok}
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""
+Memory footprint of large uploads and downloads
+
+Pushes synthetic artifacts of `--size-mb` megabytes through the paths of the SDK that move whole files and reports
+the peak memory of each one, so worker pods can be given hard memory ceilings:
+
+- download: `MLOpsExecution.download_result` of an async model result;
+- upload_model: the multipart upload of `MLOpsModelClient.create_model`, with a model file of the given size;
+- upload_training: the multipart upload of an External training run, with features, target and model files that
+  add up to the given size;
+- training_logger: `MLOpsTrainingLogger` writing the parquet copies of a features DataFrame of the given size.
+  Skipped when no parquet engine (pyarrow or fastparquet) is installed.
+
+Every scenario runs in a new interpreter, against a local stand-in of the MLOps API served by this process, which
+drains uploads and generates downloads without keeping them in memory. Each one reports:
+
+- peak_rss_mb: the high water mark of the resident memory of the interpreter;
+- baseline_rss_mb: the resident memory after the imports and the setup, before the measured call;
+- growth_mb: how much the measured call grew the resident memory, over the baseline;
+- tracemalloc_peak_mb: the peak of the memory allocated by Python objects during the call;
+- buffered_ratio: growth_mb over the artifact size. Close to 0 when the path streams, 1 or more when it keeps
+  whole copies of the artifact in memory.
+
+The run fails when the peak of a scenario passes `--ceiling-mb`. A scenario killed by the system (out of memory)
+is reported as failed as well. Artifacts are written to a temporary directory, that needs twice `--size-mb` of free
+disk.
+
+Usage:
+    python benchmarks/memory_footprint.py
+    python benchmarks/memory_footprint.py --size-mb 3072 --ceiling-mb 4096
+    python benchmarks/memory_footprint.py --scenario download --scenario upload_model --compression gzip
+"""
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+SCENARIOS = ("download", "upload_model", "upload_training", "training_logger")
+
+GROUP = "memory"
+GROUP_TOKEN = "memory-token"
+CHUNK = 1024 * 1024
+MB = 1024 * 1024
+
+
+def _jwt(ttl: int) -> str:
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    return f"{encode({'alg': 'none'})}.{encode({'iat': now, 'exp': now + ttl})}.signature"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal MLOps API that never keeps request or response bodies in memory"""
+
+    protocol_version = "HTTP/1.1"
+    result_size = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _drain(self) -> int:
+        remaining = int(self.headers.get("Content-Length") or 0)
+        received = remaining
+        while remaining:
+            data = self.rfile.read(min(CHUNK, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+        return received - remaining
+
+    def _stream_result(self) -> None:
+        block = bytes(range(256)) * (CHUNK // 256)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(self.result_size))
+        self.end_headers()
+        remaining = self.result_size
+        while remaining:
+            size = min(len(block), remaining)
+            self.wfile.write(block[:size])
+            remaining -= size
+
+    def _handle(self) -> None:
+        path = self.path.split("?")[0]
+        route = "/".join(path.split("/")[:4])
+        received = self._drain()
+
+        if route == "/api/health":
+            return self._reply(200, {"Version": "stand-in"})
+        if route == "/api/login":
+            return self._reply(200, {"Token": _jwt(3600)})
+        if route == "/api/model/upload":
+            return self._reply(201, {"ModelHash": "M1", "Message": f"Received {received} bytes"})
+        if route == "/api/training/upload":
+            return self._reply(201, {"ExecutionId": 1, "Message": f"Received {received} bytes"})
+        if route == "/api/model/describe":
+            return self._reply(200, {"Description": {"ExecutionState": "Succeeded"}})
+        if path.startswith("/api/model/async/status/"):
+            return self._reply(200, {"Status": "Succeeded"})
+        if path.startswith("/api/model/async/result/"):
+            return self._stream_result()
+        return self._reply(404, {"Message": f"Unknown path {path}"})
+
+    do_GET = do_POST = _handle
+
+
+def start_server(result_size: int) -> ThreadingHTTPServer:
+    StandInHandler.result_size = result_size
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_mb() -> float:
+    """High water mark of the resident memory of this process"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+def write_artifact(path: str, size: int) -> str:
+    block = os.urandom(CHUNK)
+    with open(path, "wb") as f:
+        for offset in range(0, size, CHUNK):
+            f.write(block[: min(CHUNK, size - offset)])
+    return path
+
+
+def prepare(scenario: str, url: str, size: int, workdir: str, compression: str):
+    """Build the call measured by the scenario, outside the measurement"""
+    from mlops_codex.base import MLOpsExecution
+    from mlops_codex.context import MLOpsContext
+    from mlops_codex.session import SessionConfig
+
+    context = MLOpsContext.connect(
+        login="memory@test",
+        password="memory",
+        url=url,
+        session_config=SessionConfig(compression=compression, metrics=False),
+    )
+
+    if scenario == "download":
+        execution = MLOpsExecution(
+            parent_id="M1", exec_type="AsyncModel", group=GROUP, exec_id="1", group_token=GROUP_TOKEN, context=context
+        )
+        return lambda: execution.download_result(path=workdir, filename="result.zip")
+
+    if scenario == "upload_model":
+        from mlops_codex.model import MLOpsModelClient
+
+        client = MLOpsModelClient(context=context)
+        source = os.path.join(workdir, "app.py")
+        requirements = os.path.join(workdir, "requirements.txt")
+        schema = os.path.join(workdir, "schema.json")
+        with open(source, "w") as f:
+            f.write("def score(data, base_path):\n    return data\n")
+        with open(requirements, "w") as f:
+            f.write("numpy==1.26.4\n")
+        with open(schema, "w") as f:
+            f.write('{"id": 1}')
+        model_file = write_artifact(os.path.join(workdir, "model.pkl"), size)
+        return lambda: client._MLOpsModelClient__upload_model(
+            model_name="memory",
+            model_reference="score",
+            source_file=source,
+            model_file=model_file,
+            requirements_file=requirements,
+            schema=schema,
+            group=GROUP,
+        )
+
+    if scenario == "upload_training":
+        from mlops_codex.training import MLOpsTrainingExperiment
+
+        experiment = MLOpsTrainingExperiment(training_id="1", group=GROUP, context=context)
+        features = write_artifact(os.path.join(workdir, "features.parquet"), size // 2)
+        target = write_artifact(os.path.join(workdir, "target.parquet"), size // 4)
+        model_file = write_artifact(os.path.join(workdir, "model.pkl"), size - size // 2 - size // 4)
+        return lambda: experiment._MLOpsTrainingExperiment__upload_training(
+            run_name="memory",
+            training_type="External",
+            X_train=features,
+            y_train=target,
+            model_file=model_file,
+        )
+
+    if scenario == "training_logger":
+        import numpy as np
+        import pandas as pd
+
+        from mlops_codex.training import MLOpsTrainingLogger
+
+        rows = max(size // (8 * 16), 1)
+        X = pd.DataFrame(np.random.default_rng(0).random((rows, 16)), columns=[f"f{i}" for i in range(16)])
+        y = pd.Series(np.arange(rows) % 2, name="target")
+        os.chdir(workdir)
+        trainer = MLOpsTrainingLogger(name="memory", X_train=X, y_train=y)
+        trainer.save_model_output(pd.DataFrame({"score": np.zeros(rows)}))
+        del X, y
+        return trainer._processing_logging_inputs
+
+    raise ValueError(f"Unknown scenario '{scenario}'")
+
+
+def run_scenario(scenario: str, url: str, size: int, compression: str) -> dict:
+    """Measure one scenario in this interpreter"""
+    from mlops_codex.logger_config import configure_logger
+
+    configure_logger(log_levels=[])
+    with tempfile.TemporaryDirectory() as workdir:
+        call = prepare(scenario, url, size, workdir, compression)
+        baseline = peak_rss_mb()
+        tracemalloc.start()
+        start = time.perf_counter()
+        call()
+        seconds = time.perf_counter() - start
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = peak_rss_mb()
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    growth = max(peak - baseline, 0.0)
+    return {
+        "size_mb": round(size / MB, 1),
+        "seconds": round(seconds, 2),
+        "peak_rss_mb": round(peak, 1),
+        "baseline_rss_mb": round(baseline, 1),
+        "growth_mb": round(growth, 1),
+        "tracemalloc_peak_mb": round(traced_peak / MB, 1),
+        "buffered_ratio": round(growth / (size / MB), 3),
+    }
+
+
+def spawn(scenario: str, url: str, args) -> dict:
+    """Run a scenario in a new interpreter, so its peak memory is its own"""
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--child",
+        scenario,
+        "--url",
+        url,
+        "--size-mb",
+        str(args.size_mb),
+    ]
+    if args.compression:
+        command += ["--compression", args.compression]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        killed = process.returncode < 0
+        return {
+            "ok": False,
+            "error": "killed by the system, out of memory?" if killed else process.stderr.strip()[-2000:],
+        }
+    # The upload paths print to stdout, the report is the last line
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["ok"] = result["peak_rss_mb"] <= args.ceiling_mb
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=512, help="Size of the synthetic artifacts")
+    parser.add_argument("--ceiling-mb", type=float, default=4096, help="Peak resident memory allowed per scenario")
+    parser.add_argument(
+        "--scenario", action="append", choices=SCENARIOS, help="Scenario to run, repeat for more. Defaults to all"
+    )
+    parser.add_argument("--compression", choices=("gzip", "deflate"), help="Compress request bodies")
+    parser.add_argument("--child", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = args.size_mb * MB
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child, args.url, size, args.compression)))
+        return 0
+
+    server = start_server(size)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    results = {}
+    try:
+        for scenario in args.scenario or SCENARIOS:
+            if scenario == "training_logger" and not (
+                importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet")
+            ):
+                results[scenario] = {"ok": True, "skipped": "pyarrow or fastparquet is required to write parquet"}
+                continue
+            results[scenario] = spawn(scenario, url, args)
+    finally:
+        server.shutdown()
+
+    report = {
+        "size_mb": args.size_mb,
+        "ceiling_mb": args.ceiling_mb,
+        "compression": args.compression,
+        "scenarios": results,
+        "ok": all(result["ok"] for result in results.values()),
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+MLOpsModel thread safety stress check
+
+Shares one MLOpsModel between many threads against a local stand-in of the MLOps API and checks that:
+
+- every prediction gets the response of its own input;
+- the model is described once, even though all threads start with an unknown model;
+- the group token informed by the first callers is saved once and used by the others;
+- stale status refreshes are made by one thread at a time.
+
+Usage:
+    python benchmarks/thread_safety.py
+    python benchmarks/thread_safety.py --threads 64 --calls 200
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from mlops_codex.context import MLOpsContext  # noqa: E402
+from mlops_codex.model import MLOpsModel  # noqa: E402
+
+GROUP_TOKEN = "group-token"
+
+
+def _jwt(ttl: int) -> str:
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    return f"{encode({'alg': 'none'})}.{encode({'iat': now, 'exp': now + ttl})}.signature"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal MLOps API: health, login, model describe, status and sync run"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    hits = Counter()
+    hits_lock = threading.Lock()
+    bad_tokens = Counter()
+    delay = 0.002
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self) -> None:
+        path = self.path.split("?")[0]
+        route = "/".join(path.split("/")[:4])
+        with self.hits_lock:
+            self.hits[route] += 1
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        time.sleep(self.delay)
+
+        if route == "/api/health":
+            return self._reply(200, {"Version": "stand-in"})
+        if route == "/api/login":
+            return self._reply(200, {"Token": _jwt(3600)})
+        if route == "/api/model/describe":
+            return self._reply(
+                200, {"Description": {"Name": "stress", "Status": "Deployed", "Operation": "Sync"}}
+            )
+        if route == "/api/model/status":
+            return self._reply(200, {"Status": "Deployed"})
+        if route == "/api/model/sync":
+            if self.headers.get("Authorization") != f"Bearer {GROUP_TOKEN}":
+                with self.hits_lock:
+                    self.bad_tokens[self.headers.get("Authorization")] += 1
+                return self._reply(401, {"Message": "Invalid group token"})
+            return self._reply(200, {"Output": json.loads(body)["Input"]})
+        return self._reply(404, {"Message": f"Unknown path {path}"})
+
+    do_GET = do_POST = _handle
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def hammer_predict(model: MLOpsModel, threads: int, calls: int) -> dict:
+    """Every thread predicts its own inputs, informing the group token only in its first call"""
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int) -> list:
+        barrier.wait()
+        errors = []
+        for call in range(calls):
+            data = {"thread": index, "call": call}
+            token = GROUP_TOKEN if call == 0 else None
+            try:
+                result = model.predict(data=data, group_token=token)
+                if result.get("Output") != data:
+                    errors.append(f"Wrong response {result} for {data}")
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+        return errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        errors = [e for result in executor.map(worker, range(threads)) for e in result]
+    return {"seconds": round(time.perf_counter() - start, 3), "errors": errors[:10], "error_count": len(errors)}
+
+
+def hammer_status(model: MLOpsModel, threads: int, duration: float) -> dict:
+    """Every thread reads the status in a loop while it keeps expiring"""
+    stop = time.monotonic() + duration
+    errors = []
+
+    def worker() -> int:
+        reads = 0
+        while time.monotonic() < stop:
+            try:
+                if model.status.name != "Deployed":
+                    errors.append(f"Unexpected status {model.status}")
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+            reads += 1
+        return reads
+
+    with ThreadPoolExecutor(threads) as executor:
+        reads = sum(executor.map(lambda _: worker(), range(threads)))
+    return {"reads": reads, "errors": errors[:10], "error_count": len(errors)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32, help="Threads sharing the model")
+    parser.add_argument("--calls", type=int, default=50, help="Predictions per thread")
+    parser.add_argument("--status-seconds", type=float, default=1.0, help="Duration of the status phase")
+    args = parser.parse_args()
+
+    server = start_server()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    context = MLOpsContext.connect(login="stress@test", password="stress", url=url)
+    # No group token and no description: the threads race to load both
+    model = MLOpsModel(model_id="M1", group="stress", context=context, status_ttl=0.05)
+
+    predict = hammer_predict(model, args.threads, args.calls)
+    status = hammer_status(model, args.threads, args.status_seconds)
+    hits = StandInHandler.hits
+
+    # At most one status check per expired TTL, the status reads in between are served from memory
+    max_status_checks = int(args.status_seconds / model.status_ttl) + 2
+    checks = {
+        "predictions_ok": predict["error_count"] == 0,
+        "single_describe": hits["/api/model/describe"] == 1,
+        "single_login": hits["/api/login"] == 1,
+        "token_always_sent": not StandInHandler.bad_tokens,
+        "status_ok": status["error_count"] == 0,
+        "status_checks_bounded": hits["/api/model/status"] <= max_status_checks,
+    }
+    report = {
+        "threads": args.threads,
+        "predictions": args.threads * args.calls,
+        "predict": predict,
+        "status": status,
+        "requests": dict(hits),
+        "checks": checks,
+        "ok": all(checks.values()),
+    }
+    print(json.dumps(report, indent=2))
+    server.shutdown()
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,12 @@ setup(name=MODULE_NAME,
       version=MODULE_VERSION,
       download_url=f'https://github.com/datarisk-io/mlops_codex/archive/refs/tags/v{MODULE_VERSION}.tar.gz',
       install_requires=requirements_from_pip(),
+      extras_require={
+          'async': ['httpx>=0.23'],
+          'tracing': ['opentelemetry-api>=1.0'],
+          'orjson': ['orjson>=3.6'],
+          'ujson': ['ujson>=5.2'],
+      },
       include_package_data=True,
       zip_safe=False,
       classifiers=['Programming Language :: Python :: 3'])
@@ -0,0 +1,61 @@
+"""
+MLOps Codex
+
+The classes below are loaded on first access, so `import mlops_codex` doesn't pay for
+the dependencies of the modules that are not used.
+"""
+
+import sys
+from typing import TYPE_CHECKING
+
+from lazy_imports import LazyImporter
+
+_import_structure = {
+    "base": ["MLOpsExecution"],
+    "context": ["MLOpsContext"],
+    "credentials": ["Account", "CredentialPool"],
+    "datasources": ["MLOpsDataSourceClient", "MLOpsDataSource", "MLOpsDataset"],
+    "external_monitoring": [
+        "MLOpsExternalMonitoringClient",
+        "MLOpsExternalMonitoring",
+    ],
+    "model": ["MLOpsModelClient", "MLOpsModel"],
+    "pipeline": ["MLOpsPipeline"],
+    "preprocessing": ["MLOpsPreprocessingClient", "MLOpsPreprocessing"],
+    "session": ["MLOpsSession", "SessionConfig", "RetryPolicy"],
+    "training": [
+        "MLOpsTrainingClient",
+        "MLOpsTrainingExperiment",
+        "MLOpsTrainingExecution",
+        "MLOpsTrainingLogger",
+    ],
+}
+
+if TYPE_CHECKING:
+    from mlops_codex.base import MLOpsExecution
+    from mlops_codex.context import MLOpsContext
+    from mlops_codex.credentials import Account, CredentialPool
+    from mlops_codex.datasources import (
+        MLOpsDataset,
+        MLOpsDataSource,
+        MLOpsDataSourceClient,
+    )
+    from mlops_codex.external_monitoring import (
+        MLOpsExternalMonitoring,
+        MLOpsExternalMonitoringClient,
+    )
+    from mlops_codex.model import MLOpsModel, MLOpsModelClient
+    from mlops_codex.pipeline import MLOpsPipeline
+    from mlops_codex.preprocessing import MLOpsPreprocessing, MLOpsPreprocessingClient
+    from mlops_codex.session import MLOpsSession, RetryPolicy, SessionConfig
+    from mlops_codex.training import (
+        MLOpsTrainingClient,
+        MLOpsTrainingExecution,
+        MLOpsTrainingExperiment,
+        MLOpsTrainingLogger,
+    )
+else:
+    sys.modules[__name__] = LazyImporter(
+        __name__, globals()["__file__"], _import_structure
+    )
+    sys.modules[__name__].__spec__ = __spec__
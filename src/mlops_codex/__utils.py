@@ -1,14 +1,14 @@
 import io
 import json
 from functools import wraps
-from typing import Tuple, Union, Type, Callable
+from typing import Optional, Tuple, Union, Type, Callable
 import typing
 
 import requests
-import yaml
-from cachetools.func import ttl_cache
 
+from mlops_codex.auth import get_token_manager
 from mlops_codex.exceptions import AuthenticationError, ServerError
+from mlops_codex.session import get_default_session
 
 
 def parse_dict_or_file(obj):
@@ -31,7 +31,10 @@ def parse_url(url):
 
 
 def try_login(
-    login: str, password: str, base_url: str
+    login: str,
+    password: str,
+    base_url: str,
+    session: Optional[requests.Session] = None,
 ) -> Union[Tuple[str, str], Exception]:
     """Try to sign in MLOps
 
@@ -39,6 +42,7 @@ def try_login(
         login: User email
         password: User password
         base_url: URL that will handle the requests
+        session: Session used for the health check. Defaults to the process wide session
 
     Returns:
         User login token
@@ -48,7 +52,10 @@ def try_login(
         ServerError: Raises if the server is not running correctly
         BaseException: Raises if the server status is something different from 200
     """
-    response = requests.get(f"{base_url}/health")
+    if session is None:
+        session = get_default_session()
+
+    response = session.get(f"{base_url}/health")
 
     server_status = response.status_code
 
@@ -61,21 +68,27 @@ def try_login(
     if server_status != 200:
         raise Exception(f"Unexpected error! {response.text}")
 
-    token = refresh_token(login, password, base_url)
+    token = get_token_manager(login, password, base_url, session).get_token()
     version = response.json().get("Version")
     return token, version
 
 
-@ttl_cache
-def refresh_token(login: str, password: str, base_url: str):
-    respose = requests.post(
-        f"{base_url}/login", data={"user": login, "password": password}
-    )
+def refresh_token(login: str, password: str, base_url: str) -> str:
+    """Get a valid user token for the account, logging in only when needed.
+    The token is refreshed ahead of its expiration by :py:class:`mlops_codex.auth.TokenManager`.
 
-    if respose.status_code == 200:
-        return respose.json()["Token"]
-    else:
-        raise AuthenticationError(respose.text)
+    Args:
+        login: User email
+        password: User password
+        base_url: URL that will handle the requests
+
+    Returns:
+        User login token
+
+    Raises:
+        AuthenticationError: Raises if the `login` or `password` are wrong
+    """
+    return get_token_manager(login, password, base_url).get_token()
 
 
 def parse_json_to_yaml(data) -> str:
@@ -87,6 +100,8 @@ def parse_json_to_yaml(data) -> str:
     Returns:
         str: data in the yaml format
     """
+    import yaml
+
     return yaml.dump(data, allow_unicode=True, default_flow_style=False)
 
 
@@ -0,0 +1,1215 @@
+"""
+Asyncio module
+
+Non-blocking counterparts of the clients, for applications that follow many deploys and
+executions from one event loop, including the loop of a Jupyter notebook. Requests are sent
+with httpx, that must be installed (`pip install datarisk-mlops-codex[async]`).
+
+The async objects share the :py:class:`mlops_codex.context.MLOpsContext` of the sync clients,
+so both use the same login and user token. Every coroutine can be cancelled; the waits poll
+with `asyncio.sleep`, so `asyncio.wait_for` bounds them.
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import ExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+from lazy_imports import try_import
+
+from mlops_codex.__model_states import ModelExecutionState, ModelState, MonitoringStatus
+from mlops_codex.__utils import parse_dict_or_file, parse_json_to_yaml
+from mlops_codex.codec import encode_input, get_codec
+from mlops_codex.context import MLOpsContext
+from mlops_codex.exceptions import (
+    AuthenticationError,
+    ExecutionError,
+    ExternalMonitoringError,
+    InputError,
+    ModelError,
+    ServerError,
+)
+from mlops_codex.logger_config import get_logger
+from mlops_codex.metrics import MetricsRegistry, get_registry
+from mlops_codex.session import (
+    CircuitBreaker,
+    SessionConfig,
+    compress_body,
+    endpoint_key,
+    is_unsafe_request,
+    metric_labels,
+    renew_authorization,
+    retry_delay,
+)
+from mlops_codex.tracing import get_tracer
+from mlops_codex.validations import validate_python_version
+
+logger = get_logger()
+
+
+class AsyncMLOpsSession:
+    """
+    Non-blocking counterpart of :py:class:`mlops_codex.session.MLOpsSession`, built on `httpx.AsyncClient`.
+
+    It applies the same :py:class:`mlops_codex.session.SessionConfig`: default timeouts, retries with backoff for
+    idempotent requests, per endpoint circuit breaker, request body compression, metrics and tracing spans. Requests
+    whose user token is refused with 401 are sent again once with a new token.
+    `pool_maxsize` limits the connections kept alive and, when `pool_block` is set, the connections open at once.
+
+    A session is bound to the event loop where it sends its first request.
+
+    Parameters
+    ----------
+    config: Optional[SessionConfig], optional
+        Connection pool and request execution configuration. Defaults to `SessionConfig()`
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None) -> None:
+        with try_import() as httpx_import:
+            import httpx
+        try:
+            httpx_import.check()
+        except ImportError as e:
+            raise ImportError(
+                "The async clients require httpx, install it with `pip install datarisk-mlops-codex[async]`"
+            ) from e
+
+        self.config = config if config else SessionConfig()
+        if self.config.compression not in (None, "gzip", "deflate"):
+            raise InputError(
+                f"Invalid compression '{self.config.compression}'. Valid options are 'gzip' and 'deflate'"
+            )
+        if self.config.cassette is not None:
+            raise InputError("Cassettes are only supported by the sync sessions")
+        self.codec = get_codec(self.config.json_codec)
+
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=self.config.failure_threshold,
+            reset_timeout=self.config.reset_timeout,
+        )
+        self.metrics: Optional[MetricsRegistry] = None
+        if self.config.metrics:
+            self.metrics = (
+                self.config.metrics_registry
+                if self.config.metrics_registry is not None
+                else get_registry()
+            )
+
+        timeout = self.config.timeout
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        self.__transport_errors = (httpx.TransportError,)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.config.pool_maxsize if self.config.pool_block else None,
+                max_keepalive_connections=self.config.pool_maxsize if self.config.keep_alive else 0,
+            ),
+            headers=None if self.config.keep_alive else {"Connection": "close"},
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncMLOpsSession":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    def __compress(self, content: Any, headers: Dict[str, str]) -> Any:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if (
+            self.config.compression is None
+            or not isinstance(content, bytes)
+            or len(content) < self.config.compression_threshold
+            or "Content-Encoding" in headers
+        ):
+            return content
+
+        compressed = compress_body(content, self.config.compression, self.config.compression_level)
+        if len(compressed) >= len(content):
+            return content
+        headers["Content-Encoding"] = self.config.compression
+        return compressed
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[Union[bytes, str]] = None,
+        **kwargs,
+    ):
+        """
+        Send a request.
+
+        Parameters
+        ----------
+        method: str
+            HTTP method
+        url: str
+            Request URL
+        headers: Optional[Dict[str, str]], optional
+            Request headers
+        content: Optional[Union[bytes, str]], optional
+            Request body, compressed when `config.compression` is set
+        kwargs:
+            Other arguments of `httpx.AsyncClient.request`, like `params`, `data` and `files`
+
+        Returns
+        -------
+        httpx.Response
+            The response, with its body already read
+        """
+        response = await self.__request(method, url, headers=headers, content=content, **kwargs)
+        # The user token may have been revoked before its expiration. The request is sent again once, with a new
+        # token, unless it uploads files that were already read
+        if response.status_code != 401 or kwargs.get("files") is not None or not headers:
+            return response
+        loop = asyncio.get_running_loop()
+        authorization = await loop.run_in_executor(None, renew_authorization, headers)
+        if authorization is None:
+            return response
+        return await self.__request(
+            method, url, headers={**headers, "Authorization": authorization}, content=content, **kwargs
+        )
+
+    async def __request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        content: Optional[Union[bytes, str]] = None,
+        **kwargs,
+    ):
+        method = method.upper()
+        headers = dict(headers or {})
+        if content is not None:
+            content = self.__compress(content, headers)
+            kwargs["content"] = content
+            if self.metrics is not None:
+                self.metrics.inc(
+                    "mlops_codex_request_bytes_sent_total",
+                    metric_labels(method, url, headers),
+                    len(content),
+                )
+
+        tracer = get_tracer()
+        if tracer is None:
+            return await self.__measure(method, url, headers, kwargs)
+
+        labels = metric_labels(method, url, headers)
+        attributes = {"http.request.method": method, "url.full": url}
+        if labels["method"]:
+            attributes["mlops.method"] = labels["method"]
+
+        with tracer.start_span(labels["endpoint"], attributes) as span:
+            tracer.inject(headers)
+            response = await self.__measure(method, url, headers, kwargs)
+            if content is not None:
+                span.set_attribute("http.request.body.size", len(content))
+            span.set_attribute("http.response.status_code", response.status_code)
+            span.set_attribute("http.response.body.size", response.num_bytes_downloaded)
+            if response.status_code >= 500:
+                span.set_error(f"Server returned {response.status_code}")
+            return response
+
+    async def get(self, url: str, **kwargs):
+        """Send a GET request, see :py:meth:`request`"""
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        """Send a POST request, see :py:meth:`request`"""
+        return await self.request("POST", url, **kwargs)
+
+    async def __measure(self, method: str, url: str, headers: Dict[str, str], kwargs: dict):
+        if self.metrics is None:
+            return await self.__send_with_retries(None, method, url, headers, kwargs)
+
+        labels = metric_labels(method, url, headers)
+        start = time.perf_counter()
+        try:
+            response = await self.__send_with_retries(labels, method, url, headers, kwargs)
+        except Exception as exc:
+            self.__record(labels, start, type(exc).__name__)
+            raise
+
+        self.__record(labels, start, str(response.status_code))
+        if response.status_code >= 400:
+            self.metrics.inc(
+                "mlops_codex_request_errors_total", {**labels, "code": str(response.status_code)}
+            )
+        self.metrics.inc(
+            "mlops_codex_response_bytes_received_total", labels, response.num_bytes_downloaded
+        )
+        return response
+
+    def __record(self, labels: Dict[str, str], start: float, status: str) -> None:
+        self.metrics.observe(
+            "mlops_codex_request_duration_seconds", labels, time.perf_counter() - start
+        )
+        self.metrics.inc("mlops_codex_requests_total", {**labels, "status": status})
+        if not status.isdigit():
+            self.metrics.inc("mlops_codex_request_errors_total", {**labels, "code": status})
+
+    async def __send_with_retries(
+        self,
+        labels: Optional[Dict[str, str]],
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        kwargs: dict,
+    ):
+        policy = self.config.retry
+        endpoint = endpoint_key(method, url)
+        retryable = method in policy.allowed_methods and not is_unsafe_request(policy, method, url)
+        attempt = 0
+
+        while True:
+            self.circuit_breaker.before_request(endpoint)
+            try:
+                response = await self.client.request(method, url, headers=headers, **kwargs)
+            except self.__transport_errors:
+                self.circuit_breaker.record_failure(endpoint)
+                if not retryable or attempt >= policy.total:
+                    raise
+                wait = retry_delay(policy, attempt)
+                logger.debug(f"Connection failed on '{endpoint}'. Retrying in {wait:.2f}s")
+            else:
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure(endpoint)
+                else:
+                    self.circuit_breaker.record_success(endpoint)
+
+                if (
+                    not retryable
+                    or attempt >= policy.total
+                    or response.status_code not in policy.status_forcelist
+                ):
+                    return response
+
+                wait = retry_delay(policy, attempt, response.headers.get("Retry-After"))
+                logger.debug(
+                    f"Server returned {response.status_code} on '{endpoint}'. Retrying in {wait:.2f}s"
+                )
+
+            attempt += 1
+            if labels is not None:
+                self.metrics.inc("mlops_codex_request_retries_total", labels)
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, *, headers: Optional[Dict[str, str]] = None, **kwargs
+    ) -> AsyncIterator[Any]:
+        """
+        Send a request whose response body is read in chunks, e.g. `async for chunk in response.aiter_bytes()`.
+        Streamed requests are not retried.
+
+        Returns
+        -------
+        AsyncIterator[httpx.Response]
+            Context manager that yields the response
+        """
+        method = method.upper()
+        headers = dict(headers or {})
+        tracer = get_tracer()
+        if tracer is not None:
+            tracer.inject(headers)
+
+        endpoint = endpoint_key(method, url)
+        self.circuit_breaker.before_request(endpoint)
+        start = time.perf_counter()
+        try:
+            async with self.client.stream(method, url, headers=headers, **kwargs) as response:
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure(endpoint)
+                else:
+                    self.circuit_breaker.record_success(endpoint)
+                yield response
+        except self.__transport_errors:
+            self.circuit_breaker.record_failure(endpoint)
+            raise
+        finally:
+            if self.metrics is not None:
+                labels = metric_labels(method, url, headers)
+                self.metrics.observe(
+                    "mlops_codex_request_duration_seconds", labels, time.perf_counter() - start
+                )
+
+
+def _raise_for_status(response, error: Exception) -> None:
+    """Raise the error of a failed response, using the same messages of the sync clients"""
+    if response.status_code == 401:
+        logger.error("Login or password are invalid, please check your credentials.")
+        raise AuthenticationError("Login not authorized.")
+
+    if response.status_code >= 500:
+        logger.error("Server is not available. Please, try it later.")
+        raise ServerError("Server is not available!")
+
+    try:
+        logger.error(f"Something went wrong...\n{parse_json_to_yaml(response.json())}")
+    except ValueError:
+        logger.error(f"Something went wrong...\n{response.text}")
+    raise error
+
+
+class AsyncBaseMLOps:
+    """
+    Base class of the async clients and objects.
+
+    Parameters
+    ----------
+    context: MLOpsContext
+        Authenticated context, shared with the sync clients. Use :py:meth:`connect` to create one without blocking the
+        event loop
+    session: Optional[AsyncMLOpsSession], optional
+        Async session shared with the object that created this one. If None, a new session is created with the
+        configuration of the context session
+    """
+
+    def __init__(self, *, context: MLOpsContext, session: Optional[AsyncMLOpsSession] = None) -> None:
+        self.context = context
+        self.credentials = context.credentials
+        self.base_url = context.base_url
+        self.session = (
+            session if session is not None else AsyncMLOpsSession(context.session.config)
+        )
+
+    @classmethod
+    async def connect(
+        cls,
+        *,
+        login: Optional[str] = None,
+        password: Optional[str] = None,
+        url: Optional[str] = None,
+        session_config: Optional[SessionConfig] = None,
+        **kwargs,
+    ):
+        """
+        Connect without blocking the event loop.
+
+        Parameters
+        ----------
+        login: Optional[str], optional
+            Login for authenticating with the client. You can also use the env variable MLOPS_USER to set this
+        password: Optional[str], optional
+            Password for authenticating with the client. You can also use the env variable MLOPS_PASSWORD to set this
+        url: Optional[str], optional
+            URL to MLOps Server. You can also use the env variable MLOPS_URL to set this
+        session_config: Optional[SessionConfig], optional
+            Configuration of the sync and async sessions
+
+        Returns
+        -------
+        The connected object
+        """
+        loop = asyncio.get_running_loop()
+        context = await loop.run_in_executor(
+            None,
+            functools.partial(
+                MLOpsContext.connect,
+                login=login,
+                password=password,
+                url=url,
+                session_config=session_config,
+            ),
+        )
+        return cls(context=context, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the async session"""
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def _user_headers(self, method: Optional[str] = None) -> Dict[str, str]:
+        token = self.context.token_manager.peek_token()
+        if token is None:
+            # Logging in blocks, it is done out of the event loop
+            loop = asyncio.get_running_loop()
+            token = await loop.run_in_executor(None, self.context.token_manager.get_token)
+        headers = {"Authorization": "Bearer " + token, "Neomaril-Origin": "Codex"}
+        if method:
+            headers["Neomaril-Method"] = method
+        return headers
+
+
+class AsyncMLOpsExecution(AsyncBaseMLOps):
+    """
+    Async counterpart of :py:class:`mlops_codex.base.MLOpsExecution`.
+
+    Parameters
+    ----------
+    parent_id: str
+        Model, preprocessing or training id of the execution
+    exec_type: str
+        'AsyncModel', 'AsyncPreprocessing' or 'Training'
+    group: str
+        Group of the execution
+    exec_id: str
+        Execution id
+    group_token: Optional[str], optional
+        Group token, used by model and preprocessing executions. Defaults to the env variable MLOPS_GROUP_TOKEN
+    context: MLOpsContext
+        Authenticated context
+    session: Optional[AsyncMLOpsSession], optional
+        Async session shared with the object that created this execution
+
+    Example
+    -------
+    .. code-block:: python
+
+        execution = await model.predict(data='./input.csv')
+        await asyncio.wait_for(execution.wait_ready(poll_interval=5), timeout=600)
+        await execution.download_result(path='./results/')
+    """
+
+    def __init__(
+        self,
+        *,
+        parent_id: str,
+        exec_type: str,
+        group: str,
+        exec_id: str,
+        context: MLOpsContext,
+        group_token: Optional[str] = None,
+        session: Optional[AsyncMLOpsSession] = None,
+    ) -> None:
+        super().__init__(context=context, session=session)
+        if exec_type == "AsyncModel":
+            self.__url_path = "model/async"
+        elif exec_type == "Training":
+            self.__url_path = "training"
+        elif exec_type == "AsyncPreprocessing":
+            self.__url_path = "preprocessing/async"
+        else:
+            raise InputError(
+                f"Invalid execution type '{exec_type}'. "
+                "Valid options are 'AsyncModel', 'AsyncPreprocessing' and 'Training'"
+            )
+
+        self.parent_id = parent_id
+        self.exec_type = exec_type
+        self.group = group
+        self.exec_id = exec_id
+        self.__token = group_token if group_token else context.getenv("MLOPS_GROUP_TOKEN")
+        self.status = ModelExecutionState.Requested
+        self.execution_data: Optional[dict] = None
+
+    def __repr__(self) -> str:
+        return f"""AsyncMLOps{self.exec_type}Execution(exec_id="{self.exec_id}", status="{self.status}")"""
+
+    async def __headers(self, method: Optional[str] = None) -> Dict[str, str]:
+        if self.exec_type == "Training":
+            return await self._user_headers(method)
+        headers = {"Authorization": f"Bearer {self.__token}", "Neomaril-Origin": "Codex"}
+        if method:
+            headers["Neomaril-Method"] = method
+        return headers
+
+    async def describe(self) -> dict:
+        """
+        Get the execution description.
+
+        Returns
+        -------
+        dict
+            The execution description
+        """
+        url = f"{self.base_url}/{self.__url_path.replace('/async', '')}/describe/{self.group}/{self.parent_id}/{self.exec_id}"
+        response = await self.session.get(url, headers=await self._user_headers())
+        if response.status_code != 200:
+            _raise_for_status(response, ModelError(f'Execution "{self.exec_id}" not found.'))
+
+        self.execution_data = response.json()["Description"]
+        if "ExecutionState" in self.execution_data:
+            self.status = ModelExecutionState[self.execution_data["ExecutionState"]]
+        return self.execution_data
+
+    async def get_status(self) -> dict:
+        """
+        Get the execution status.
+
+        Raises
+        ------
+        ExecutionError
+            Execution unavailable
+
+        Returns
+        -------
+        dict
+            The execution status
+        """
+        url = f"{self.base_url}/{self.__url_path}/status/{self.group}/{self.exec_id}"
+        response = await self.session.get(url, headers=await self.__headers())
+        if response.status_code not in [200, 410]:
+            _raise_for_status(response, ExecutionError(f'Execution "{self.exec_id}" unavailable'))
+
+        result = response.json()
+        self.status = ModelExecutionState[result["Status"]]
+        return result
+
+    async def wait_ready(self, *, poll_interval: float = 30) -> None:
+        """
+        Wait until the execution is no longer running.
+
+        Parameters
+        ----------
+        poll_interval: float
+            Seconds between two status checks. Defaults to 30
+
+        Raises
+        ------
+        ExecutionError
+            The execution failed
+        """
+        await self.get_status()
+        while self.status in [ModelExecutionState.Requested, ModelExecutionState.Running]:
+            await asyncio.sleep(poll_interval)
+            await self.get_status()
+
+        if self.status == ModelExecutionState.Failed:
+            logger.error("Execution failed! Please check the logs")
+            raise ExecutionError("Execution failed")
+        logger.info("Execution completed successfully")
+
+    async def download_result(self, *, path: str = "./", filename: str = "output.zip") -> None:
+        """
+        Stream the output of the execution to a file.
+
+        Parameters
+        ----------
+        path: str
+            Path of the result file. Defaults to './'
+        filename: str
+            Name of the result file. Defaults to 'output.zip'
+
+        Raises
+        ------
+        ExecutionError
+            Execution is unavailable or failed
+        """
+        if self.status in [ModelExecutionState.Running, ModelExecutionState.Requested]:
+            await self.get_status()
+
+        if self.status == ModelExecutionState.Failed:
+            raise ExecutionError("Execution failed")
+        if self.status != ModelExecutionState.Succeeded:
+            logger.info(f"Execution not ready. Status is {self.status}")
+            return
+
+        url = f"{self.base_url}/{self.__url_path}/result/{self.group}/{self.exec_id}"
+        if not path.endswith("/"):
+            filename = "/" + filename
+
+        headers = await self.__headers("MLOpsExecution.download_result")
+        async with self.session.stream("GET", url, headers=headers) as response:
+            if response.status_code not in [200, 410]:
+                await response.aread()
+                _raise_for_status(response, ExecutionError(f'Execution "{self.exec_id}" unavailable'))
+
+            with open(path + filename, "wb") as f:
+                async for chunk in response.aiter_bytes(1024 * 1024):
+                    f.write(chunk)
+
+        logger.info(f"Output saved in {path + filename}")
+
+
+class AsyncMLOpsModel(AsyncBaseMLOps):
+    """
+    Async counterpart of :py:class:`mlops_codex.model.MLOpsModel`.
+
+    Parameters
+    ----------
+    model_id: str
+        Model id (hash)
+    group: str
+        Group the model is inserted
+    group_token: Optional[str], optional
+        Token for executing the model. Defaults to the env variable MLOPS_GROUP_TOKEN
+    context: MLOpsContext
+        Authenticated context
+    session: Optional[AsyncMLOpsSession], optional
+        Async session shared with the client that created this model
+    """
+
+    def __init__(
+        self,
+        *,
+        model_id: str,
+        group: str,
+        context: MLOpsContext,
+        group_token: Optional[str] = None,
+        session: Optional[AsyncMLOpsSession] = None,
+    ) -> None:
+        super().__init__(context=context, session=session)
+        self.model_id = model_id
+        self.group = group
+        self.__token = group_token if group_token else context.getenv("MLOPS_GROUP_TOKEN")
+        self.model_data: Optional[dict] = None
+        self.status: Optional[ModelState] = None
+
+    def __repr__(self) -> str:
+        return f"""AsyncMLOpsModel(group="{self.group}", model_id="{self.model_id}", status="{self.status}")"""
+
+    def set_token(self, group_token: str) -> None:
+        """
+        Save the group token for this model instance.
+
+        Parameters
+        ----------
+        group_token: str
+            Token for executing the model
+        """
+        self.__token = group_token
+
+    async def describe(self) -> dict:
+        """
+        Get the model description.
+
+        Raises
+        ------
+        ModelError
+            Model not found
+
+        Returns
+        -------
+        dict
+            The model description
+        """
+        url = f"{self.base_url}/model/describe/{self.group}/{self.model_id}"
+        response = await self.session.get(url, headers=await self._user_headers())
+        if response.status_code != 200:
+            _raise_for_status(response, ModelError(f'Model "{self.model_id}" not found.'))
+
+        self.model_data = response.json()["Description"]
+        self.status = ModelState[self.model_data["Status"]]
+        return self.model_data
+
+    async def get_status(self) -> ModelState:
+        """
+        Get the model status.
+
+        Raises
+        ------
+        ModelError
+            Model unavailable
+
+        Returns
+        -------
+        ModelState
+            The model status
+        """
+        url = f"{self.base_url}/model/status/{self.group}/{self.model_id}"
+        response = await self.session.get(url, headers=await self._user_headers())
+        if response.status_code not in [200, 410]:
+            _raise_for_status(response, ModelError("Could not get the status of the model"))
+
+        self.status = ModelState[response.json()["Status"]]
+        return self.status
+
+    async def wait_ready(self, *, poll_interval: float = 30) -> ModelState:
+        """
+        Wait while the model is being deployed.
+
+        Parameters
+        ----------
+        poll_interval: float
+            Seconds between two status checks. Defaults to 30
+
+        Returns
+        -------
+        ModelState
+            The final status
+        """
+        await self.get_status()
+        while self.status in [ModelState.Ready, ModelState.Building]:
+            await asyncio.sleep(poll_interval)
+            await self.get_status()
+        return self.status
+
+    async def predict(
+        self,
+        *,
+        data: Union[dict, str, bytes],
+        group_token: Optional[str] = None,
+        wait_complete: bool = False,
+    ) -> Union[dict, AsyncMLOpsExecution]:
+        """
+        Run a prediction.
+
+        Parameters
+        ----------
+        data: Union[dict, str, bytes]
+            For Sync models, the input of the scoring function, or its JSON already encoded as `bytes`. For Async
+            models, the path of the input file
+        group_token: Optional[str], optional
+            Token for executing the model. Defaults to the token of the model
+        wait_complete: bool
+            Wait for the execution of Async models to finish. Defaults to False
+
+        Raises
+        ------
+        ModelError
+            Model is not available
+        InputError
+            Group token not informed
+
+        Returns
+        -------
+        Union[dict, AsyncMLOpsExecution]
+            The return of the scoring function for Sync models or the execution for Async models
+        """
+        if self.model_data is None or self.status != ModelState.Deployed:
+            await self.describe()
+            if self.status != ModelState.Deployed:
+                raise ModelError("Model is not available to predictions")
+
+        group_token = group_token or self.__token
+        if not group_token:
+            raise InputError("Group token not informed")
+
+        operation = self.model_data["Operation"].lower()
+        url = f"{self.base_url}/model/{operation}/run/{self.group}/{self.model_id}"
+        headers = {
+            "Authorization": "Bearer " + group_token,
+            "Neomaril-Origin": "Codex",
+            "Neomaril-Method": "MLOpsModel.predict",
+        }
+
+        if operation == "sync":
+            headers["Content-Type"] = "application/json"
+            response = await self.session.post(
+                url, content=encode_input(self.session.codec, data), headers=headers
+            )
+            return self.session.codec.loads(response.content)
+
+        with open(data, "rb") as f:
+            response = await self.session.post(
+                url, files=[("input", (data.split("/")[-1], f))], headers=headers
+            )
+        if response.status_code != 202:
+            _raise_for_status(response, ModelError("Unexpected error"))
+
+        message = response.json()
+        logger.info(message["Message"])
+        execution = AsyncMLOpsExecution(
+            parent_id=self.model_id,
+            exec_type="AsyncModel",
+            group=self.group,
+            exec_id=message["ExecutionId"],
+            group_token=group_token,
+            context=self.context,
+            session=self.session,
+        )
+        if wait_complete:
+            await execution.wait_ready()
+        return execution
+
+    def get_model_execution(self, exec_id: str) -> AsyncMLOpsExecution:
+        """
+        Get an execution of this model.
+
+        Parameters
+        ----------
+        exec_id: str
+            Execution id
+
+        Returns
+        -------
+        AsyncMLOpsExecution
+            The execution
+        """
+        return AsyncMLOpsExecution(
+            parent_id=self.model_id,
+            exec_type="AsyncModel",
+            group=self.group,
+            exec_id=exec_id,
+            group_token=self.__token,
+            context=self.context,
+            session=self.session,
+        )
+
+
+class AsyncMLOpsPreprocessing(AsyncBaseMLOps):
+    """
+    Async counterpart of the status and wait of :py:class:`mlops_codex.preprocessing.MLOpsPreprocessing`.
+
+    Parameters
+    ----------
+    preprocessing_id: str
+        Preprocessing id (hash)
+    group: str
+        Group the preprocessing is inserted
+    context: MLOpsContext
+        Authenticated context
+    session: Optional[AsyncMLOpsSession], optional
+        Async session shared with the object that created this preprocessing
+    """
+
+    def __init__(
+        self,
+        *,
+        preprocessing_id: str,
+        group: str,
+        context: MLOpsContext,
+        session: Optional[AsyncMLOpsSession] = None,
+    ) -> None:
+        super().__init__(context=context, session=session)
+        self.preprocessing_id = preprocessing_id
+        self.group = group
+        self.status: Optional[str] = None
+
+    async def get_status(self) -> dict:
+        """
+        Get the preprocessing status.
+
+        Returns
+        -------
+        dict
+            The preprocessing status
+        """
+        url = f"{self.base_url}/preprocessing/status/{self.group}/{self.preprocessing_id}"
+        response = await self.session.get(url, headers=await self._user_headers())
+        if response.status_code != 200:
+            _raise_for_status(response, ModelError("Could not get the status of the preprocessing"))
+
+        result = response.json()
+        self.status = result["Status"]
+        return result
+
+    async def wait_ready(self, *, poll_interval: float = 30) -> str:
+        """
+        Wait while the preprocessing is being deployed.
+
+        Parameters
+        ----------
+        poll_interval: float
+            Seconds between two status checks. Defaults to 30
+
+        Returns
+        -------
+        str
+            The final status
+        """
+        await self.get_status()
+        while self.status in ["Ready", "Building"]:
+            await asyncio.sleep(poll_interval)
+            await self.get_status()
+        return self.status
+
+
+class AsyncMLOpsExternalMonitoring(AsyncBaseMLOps):
+    """
+    Async counterpart of the status and wait of :py:class:`mlops_codex.external_monitoring.MLOpsExternalMonitoring`.
+
+    Parameters
+    ----------
+    ex_monitoring_hash: str
+        External monitoring hash
+    context: MLOpsContext
+        Authenticated context
+    session: Optional[AsyncMLOpsSession], optional
+        Async session shared with the object that created this monitoring
+    """
+
+    def __init__(
+        self,
+        *,
+        ex_monitoring_hash: str,
+        context: MLOpsContext,
+        session: Optional[AsyncMLOpsSession] = None,
+    ) -> None:
+        super().__init__(context=context, session=session)
+        self.ex_monitoring_hash = ex_monitoring_hash
+        self.status: Optional[MonitoringStatus] = None
+
+    async def get_status(self) -> dict:
+        """
+        Get the external monitoring status.
+
+        Returns
+        -------
+        dict
+            The status and, when it is invalidated, a message
+        """
+        url = f"{self.base_url}/external-monitoring/{self.ex_monitoring_hash}/status"
+        response = await self.session.get(url, headers=await self._user_headers())
+        if response.status_code != 200:
+            _raise_for_status(
+                response, ExternalMonitoringError("Unexpected error. Could not get the monitoring status.")
+            )
+
+        result = response.json()
+        self.status = MonitoringStatus(result["Status"])
+        return result
+
+    async def wait_ready(self, *, poll_interval: float = 30) -> None:
+        """
+        Wait until the external monitoring is validated.
+
+        Parameters
+        ----------
+        poll_interval: float
+            Seconds between two status checks. Defaults to 30
+
+        Raises
+        ------
+        ExecutionError
+            The monitoring was invalidated
+        """
+        result = await self.get_status()
+        while self.status not in [MonitoringStatus.Validated, MonitoringStatus.Invalidated]:
+            await asyncio.sleep(poll_interval)
+            result = await self.get_status()
+
+        if self.status == MonitoringStatus.Invalidated:
+            logger.debug(f"Model monitoring host message: {result.get('Message')}")
+            raise ExecutionError("Monitoring host failed")
+
+
+class AsyncMLOpsModelClient(AsyncBaseMLOps):
+    """
+    Async counterpart of :py:class:`mlops_codex.model.MLOpsModelClient`.
+
+    Parameters
+    ----------
+    context: MLOpsContext
+        Authenticated context, e.g. the context of a sync client
+    session: Optional[AsyncMLOpsSession], optional
+        Async session to reuse
+
+    Example
+    -------
+    .. code-block:: python
+
+        import asyncio
+        from mlops_codex.aio import AsyncMLOpsModelClient
+
+        async def main(deploys):
+            async with await AsyncMLOpsModelClient.connect(login='user@company.com', password='123456') as client:
+                models = [client.get_model_handle(model_id=model_id, group='group') for model_id in deploys]
+                return await asyncio.gather(*(model.wait_ready(poll_interval=10) for model in models))
+
+        # In a notebook the running loop is used directly: await main(deploys)
+        asyncio.run(main(deploys))
+    """
+
+    def get_model_handle(
+        self, *, model_id: str, group: str, group_token: Optional[str] = None
+    ) -> AsyncMLOpsModel:
+        """
+        Get a model without checking its status.
+
+        Parameters
+        ----------
+        model_id: str
+            Model id (hash)
+        group: str
+            Group the model is inserted
+        group_token: Optional[str], optional
+            Token for executing the model
+
+        Returns
+        -------
+        AsyncMLOpsModel
+            The model
+        """
+        return AsyncMLOpsModel(
+            model_id=model_id,
+            group=group,
+            group_token=group_token,
+            context=self.context,
+            session=self.session,
+        )
+
+    async def get_model(
+        self,
+        *,
+        model_id: str,
+        group: str,
+        group_token: Optional[str] = None,
+        wait_for_ready: bool = True,
+        poll_interval: float = 10,
+    ) -> AsyncMLOpsModel:
+        """
+        Get a model, waiting for its deploy.
+
+        Parameters
+        ----------
+        model_id: str
+            Model id (hash)
+        group: str
+            Group the model is inserted
+        group_token: Optional[str], optional
+            Token for executing the model
+        wait_for_ready: bool
+            If the model is being deployed, wait for it to be ready instead of failing. Defaults to True
+        poll_interval: float
+            Seconds between two status checks. Defaults to 10
+
+        Raises
+        ------
+        ModelError
+            Model unavailable
+
+        Returns
+        -------
+        AsyncMLOpsModel
+            The model
+        """
+        model = self.get_model_handle(model_id=model_id, group=group, group_token=group_token)
+        status = await model.get_status()
+
+        if status == ModelState.Building:
+            if not wait_for_ready:
+                logger.info("Returning model, but model is not ready.")
+                return model
+            status = await model.wait_ready(poll_interval=poll_interval)
+
+        if status in [ModelState.Disabled, ModelState.Ready]:
+            raise ModelError(
+                f'Model "{model_id}" unavailable (disabled or deploy process is incomplete)'
+            )
+        if status == ModelState.Failed:
+            raise ModelError(f'Model "{model_id}" deploy failed, so model is unavailable.')
+        return model
+
+    async def create_model(
+        self,
+        *,
+        model_name: str,
+        model_reference: str,
+        source_file: str,
+        model_file: str,
+        requirements_file: str,
+        group: str,
+        schema: Optional[Union[str, dict]] = None,
+        extra_files: Optional[list] = None,
+        env: Optional[str] = None,
+        python_version: str = "3.10",
+        operation: str = "Sync",
+        input_type: str = "json|csv|parquet",
+        wait_for_ready: bool = True,
+        poll_interval: float = 10,
+    ) -> AsyncMLOpsModel:
+        """
+        Upload and deploy a new model. The parameters are the same of
+        :py:meth:`mlops_codex.model.MLOpsModelClient.create_model`.
+
+        Raises
+        ------
+        InputError
+            Some input parameters is invalid
+
+        Returns
+        -------
+        AsyncMLOpsModel
+            The new model
+        """
+        validate_python_version(python_version)
+        if not schema:
+            raise InputError("Schema file is mandatory")
+        if operation == "Sync":
+            input_type = "json"
+        elif input_type == "json|csv|parquet":
+            raise InputError("Choose a input type from " + input_type)
+
+        file_extensions = {"py": "script.py", "ipynb": "notebook.ipynb"}
+        source_name = file_extensions.get(source_file.split(".")[-1])
+        if source_name is None:
+            raise InputError(
+                f"Invalid source file '{source_file}'. Valid extensions are 'py' and 'ipynb'"
+            )
+
+        form_data = {
+            "name": model_name,
+            "model_reference": model_reference,
+            "operation": operation,
+            "input_type": input_type,
+            "python_version": "Python" + python_version.replace(".", ""),
+        }
+
+        # Every file opened so far is closed if opening the next one fails
+        with ExitStack() as stack:
+            files = [
+                ("source", (source_name, stack.enter_context(open(source_file, "rb")))),
+                ("model", (model_file.split("/")[-1], stack.enter_context(open(model_file, "rb")))),
+                ("requirements", ("requirements.txt", stack.enter_context(open(requirements_file, "rb")))),
+                ("schema", (schema, stack.enter_context(parse_dict_or_file(schema)))),
+            ]
+            if env:
+                files.append(("env", (".env", stack.enter_context(open(env, "rb")))))
+            for extra in extra_files or []:
+                files.append(("extra", (extra.split("/")[-1], stack.enter_context(open(extra, "rb")))))
+
+            response = await self.session.post(
+                f"{self.base_url}/model/upload/{group}",
+                data=form_data,
+                files=files,
+                headers=await self._user_headers("MLOpsModelClient.create_model"),
+            )
+
+        if response.status_code != 201:
+            _raise_for_status(response, InputError("Invalid parameters for model creation"))
+        model_id = response.json()["ModelHash"]
+        logger.info(f'{response.json()["Message"]} - Hash: "{model_id}"')
+
+        response = await self.session.get(
+            f"{self.base_url}/model/{operation.lower()}/host/{group}/{model_id}",
+            headers=await self._user_headers("MLOpsModelClient.create_model"),
+        )
+        if response.status_code != 202:
+            _raise_for_status(response, InputError("Invalid parameters for model creation"))
+        logger.info(f"Model host in process - Hash: {model_id}")
+
+        return await self.get_model(
+            model_id=model_id,
+            group=group,
+            wait_for_ready=wait_for_ready,
+            poll_interval=poll_interval,
+        )
+
+    def get_model_execution(
+        self, *, model_id: str, exec_id: str, group: str, group_token: Optional[str] = None
+    ) -> AsyncMLOpsExecution:
+        """
+        Get an execution of an Async model.
+
+        Parameters
+        ----------
+        model_id: str
+            Model id (hash)
+        exec_id: str
+            Execution id
+        group: str
+            Group the model is inserted
+        group_token: Optional[str], optional
+            Token for executing the model
+
+        Returns
+        -------
+        AsyncMLOpsExecution
+            The execution
+        """
+        return AsyncMLOpsExecution(
+            parent_id=model_id,
+            exec_type="AsyncModel",
+            group=group,
+            exec_id=exec_id,
+            group_token=group_token,
+            context=self.context,
+            session=self.session,
+        )
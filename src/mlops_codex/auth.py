@@ -0,0 +1,391 @@
+"""
+Authentication module
+
+Keeps the user token of each account, refreshing it ahead of its expiration.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import requests
+
+from mlops_codex.exceptions import AuthenticationError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.session import get_default_session
+
+logger = get_logger()
+
+
+def token_lifetime(token: str) -> Optional[float]:
+    """
+    Read the lifetime of a JWT token from its `exp` claim (and `iat`, when informed).
+    The signature is not verified, the claims are only used to schedule the refresh.
+
+    Parameters
+    ----------
+    token: str
+        The JWT token
+
+    Returns
+    -------
+    Optional[float]
+        Seconds until the token expires, or None if the token has no readable expiration
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        expires = float(claims["exp"])
+        # Using the issued date avoids trusting that both clocks are in sync
+        issued = float(claims.get("iat", time.time()))
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+    return expires - issued
+
+
+class _TokenState(NamedTuple):
+    token: str
+    refresh_at: float
+    expires_at: float
+
+
+class TokenManager:
+    """
+    Keeps the user token of one account valid.
+
+    The token expiration is read from the JWT itself. Once `refresh_ratio` of its lifetime has passed, the token is
+    refreshed in the background while callers keep using the current one, so they only wait for a login when there is
+    no valid token at all. Concurrent callers share a single in-flight login. When the server refuses the token before
+    its expiration (e.g. it was revoked), the sessions discard it with :py:func:`renew_token` and send the request
+    again once, with a new token.
+
+    Managers can be pickled, e.g. to send a client to a process pool. The current token travels with the manager, so
+    the new process only logs in when the token is about to expire. Note that the password is pickled as well.
+
+    Parameters
+    ----------
+    login: str
+        User email
+    password: str
+        User password
+    base_url: str
+        URL that will handle the requests
+    session: Optional[requests.Session], optional
+        Session used to login. Defaults to the process wide session
+    refresh_ratio: float
+        Fraction of the token lifetime after which the token is refreshed. Defaults to 0.8
+    expiry_skew: float
+        Seconds before the expiration in which the token is no longer used. Defaults to 30
+    default_ttl: float
+        Lifetime assumed for tokens without a readable expiration. Defaults to 600
+    background: bool
+        Schedule the refresh even if no one asks for the token, so the next caller never waits for the login. Defaults to True
+    """
+
+    def __init__(
+        self,
+        *,
+        login: str,
+        password: str,
+        base_url: str,
+        session: Optional[requests.Session] = None,
+        refresh_ratio: float = 0.8,
+        expiry_skew: float = 30.0,
+        default_ttl: float = 600.0,
+        background: bool = True,
+    ) -> None:
+        self.login = login
+        self.__password = password
+        self.base_url = base_url
+        self.session = session
+        self.refresh_ratio = refresh_ratio
+        self.expiry_skew = expiry_skew
+        self.default_ttl = default_ttl
+        self.background = background
+
+        self.__state: Optional[_TokenState] = None
+        # Token replaced by the last refresh, still sent by requests started before it
+        self.__previous: Optional[str] = None
+        self.__lock = threading.Lock()
+        self.__inflight: Optional[Future] = None
+        self.__timer: Optional[threading.Timer] = None
+        _live_managers.add(self)
+
+    def __repr__(self) -> str:
+        return f'TokenManager(login="{self.login}", url="{self.base_url}")'
+
+    def __reduce__(self):
+        return (
+            _restore_token_manager,
+            (self.login, self.__password, self.base_url, None, self._snapshot()),
+        )
+
+    def _snapshot(self) -> Optional[Tuple[str, float, float]]:
+        """The current token with the seconds left until its refresh and its expiration"""
+        state = self.__state
+        if state is None:
+            return None
+        now = time.monotonic()
+        return state.token, state.refresh_at - now, state.expires_at - now
+
+    def _adopt(self, snapshot: Optional[Tuple[str, float, float]]) -> None:
+        """Use a token taken by `_snapshot` in another process, unless this manager has a valid one"""
+        if snapshot is None or snapshot[2] <= 0:
+            return
+        token, refresh_in, expires_in = snapshot
+        now = time.monotonic()
+        with self.__lock:
+            if self.__state is not None and now < self.__state.expires_at:
+                return
+            self.__state = _TokenState(
+                token=token, refresh_at=now + refresh_in, expires_at=now + expires_in
+            )
+
+    def _reset_after_fork(self) -> None:
+        # Locks may have been held and threads don't exist in the child process
+        self.__lock = threading.Lock()
+        self.__inflight = None
+        self.__timer = None
+
+    def get_token(self) -> str:
+        """
+        Get a valid user token, logging in only if there is no valid token.
+
+        Raises
+        ------
+        AuthenticationError
+            Raised if the login fails
+
+        Returns
+        -------
+        str
+            The user token
+        """
+        token = self.peek_token()
+        return token if token is not None else self.__refresh(wait=True)
+
+    def peek_token(self) -> Optional[str]:
+        """
+        Get the current token without blocking. A token close to its expiration is refreshed in the background.
+
+        Returns
+        -------
+        Optional[str]
+            The user token, or None if there is no valid token and :py:meth:`get_token` has to log in
+        """
+        state = self.__state
+        if state is not None:
+            now = time.monotonic()
+            if now < state.refresh_at:
+                return state.token
+            if now < state.expires_at:
+                self.__refresh(wait=False)
+                return state.token
+        return None
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """
+        Discard the current token, so the next call logs in again.
+
+        Parameters
+        ----------
+        token: Optional[str], optional
+            Only discard the current token if it is this one, so callers refused with the same token don't discard
+            the new one. Defaults to any token
+        """
+        with self.__lock:
+            if token is not None and (self.__state is None or self.__state.token != token):
+                return
+            if self.__state is not None:
+                self.__previous = self.__state.token
+            self.__state = None
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+
+    def _issued(self, token: str) -> bool:
+        """Check if the token was issued by this manager and is the current or the previous one"""
+        state = self.__state
+        return (state is not None and state.token == token) or token == self.__previous
+
+    def _refresh_in_background(self) -> None:
+        self.__refresh(wait=False)
+
+    def __refresh(self, *, wait: bool) -> Optional[str]:
+        with self.__lock:
+            future = self.__inflight
+            leader = future is None
+            if leader:
+                future = self.__inflight = Future()
+
+        if leader:
+            if wait:
+                self.__run(future)
+            else:
+                threading.Thread(target=self.__run, args=(future,), daemon=True).start()
+
+        if wait:
+            return future.result()
+
+    def __run(self, future: Future) -> None:
+        try:
+            token = self.__login()
+        except BaseException as exc:
+            logger.debug(f"Failed to refresh the token of '{self.login}': {exc}")
+            with self.__lock:
+                state = self.__state
+                if state is not None and time.monotonic() < state.expires_at:
+                    # Keep the current token and try again later instead of on every call
+                    retry_at = time.monotonic() + min(30.0, (state.expires_at - time.monotonic()) / 2)
+                    self.__state = state._replace(refresh_at=retry_at)
+                self.__inflight = None
+            future.set_exception(exc)
+            return
+
+        lifetime = token_lifetime(token)
+        if lifetime is None or lifetime <= 0:
+            lifetime = self.default_ttl
+
+        now = time.monotonic()
+        state = _TokenState(
+            token=token,
+            refresh_at=now + lifetime * self.refresh_ratio,
+            expires_at=now + max(lifetime - self.expiry_skew, lifetime * self.refresh_ratio),
+        )
+
+        with self.__lock:
+            if self.__state is not None:
+                self.__previous = self.__state.token
+            self.__state = state
+            self.__inflight = None
+            if self.background:
+                self.__schedule(state.refresh_at - now)
+
+        future.set_result(token)
+
+    def __schedule(self, delay: float) -> None:
+        if self.__timer is not None:
+            self.__timer.cancel()
+        # The timer only holds a weak reference, so it doesn't keep unused managers alive
+        self.__timer = threading.Timer(max(delay, 0), _background_refresh, args=(weakref.ref(self),))
+        self.__timer.daemon = True
+        self.__timer.start()
+
+    def __login(self) -> str:
+        session = self.session if self.session is not None else get_default_session()
+        response = session.post(
+            f"{self.base_url}/login",
+            data={"user": self.login, "password": self.__password},
+        )
+
+        if response.status_code == 200:
+            return response.json()["Token"]
+
+        raise AuthenticationError(response.text)
+
+
+def _background_refresh(manager_ref: weakref.ref) -> None:
+    manager = manager_ref()
+    if manager is not None:
+        manager._refresh_in_background()
+
+
+_managers: Dict[str, TokenManager] = {}
+_managers_lock = threading.Lock()
+_live_managers: "weakref.WeakSet[TokenManager]" = weakref.WeakSet()
+
+
+def _reset_managers_after_fork() -> None:
+    global _managers_lock
+    _managers_lock = threading.Lock()
+    for manager in list(_live_managers):
+        manager._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_managers_after_fork)
+
+
+def _restore_token_manager(
+    login: str,
+    password: str,
+    base_url: str,
+    session: Optional[requests.Session],
+    snapshot: Optional[Tuple[str, float, float]],
+) -> TokenManager:
+    manager = get_token_manager(login, password, base_url, session)
+    manager._adopt(snapshot)
+    return manager
+
+
+def get_token_manager(
+    login: str,
+    password: str,
+    base_url: str,
+    session: Optional[requests.Session] = None,
+) -> TokenManager:
+    """
+    Get the token manager of an account, creating it on the first call.
+    Every client of the same account and URL shares one manager, so one login serves all of them.
+
+    Parameters
+    ----------
+    login: str
+        User email
+    password: str
+        User password
+    base_url: str
+        URL that will handle the requests
+    session: Optional[requests.Session], optional
+        Session used to login when the manager is created
+
+    Returns
+    -------
+    TokenManager
+        The account token manager
+    """
+    # The registry is keyed by a digest, so the password is never kept as a key
+    key = hashlib.sha256(
+        "\0".join((str(login), str(password), base_url)).encode("utf-8")
+    ).hexdigest()
+
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = TokenManager(
+                login=login, password=password, base_url=base_url, session=session
+            )
+    return manager
+
+
+def renew_token(token: str) -> Optional[str]:
+    """
+    Discard a user token refused by the server and get a new one from the manager that issued it.
+
+    Parameters
+    ----------
+    token: str
+        The refused token
+
+    Raises
+    ------
+    AuthenticationError
+        Raised if the login fails
+
+    Returns
+    -------
+    Optional[str]
+        The new token, or None if the token wasn't issued by a manager of this process (e.g. a group token)
+    """
+    manager = next((m for m in list(_live_managers) if m._issued(token)), None)
+    if manager is None:
+        return None
+    logger.debug(f"Token of '{manager.login}' refused by the server, logging in again")
+    manager.invalidate(token)
+    return manager.get_token()
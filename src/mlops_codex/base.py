@@ -1,19 +1,11 @@
-import os
 from datetime import datetime, timedelta
 from http import HTTPStatus
-from time import sleep
+from time import monotonic, sleep
 from typing import Optional
 
-import requests
-from dotenv import load_dotenv, find_dotenv
-
 from mlops_codex.__model_states import ModelExecutionState
-from mlops_codex.__utils import (
-    parse_json_to_yaml,
-    parse_url,
-    refresh_token,
-    try_login,
-)
+from mlops_codex.__utils import parse_json_to_yaml, refresh_token
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     ExecutionError,
@@ -23,6 +15,8 @@ from mlops_codex.exceptions import (
     ServerError,
 )
 from mlops_codex.logger_config import get_logger
+from mlops_codex.session import MLOpsSession, SessionConfig
+from mlops_codex.tracing import traced
 
 logger = get_logger()
 
@@ -30,6 +24,29 @@ logger = get_logger()
 class BaseMLOps:
     """
     Super base class to initialize other variables and URLs for other MLOps classes.
+
+    Every client authenticates once and keeps the result in `self.context`, with its pooled HTTP session
+    (`self.session`). Objects created by a client receive the client context, so they reuse its login and open
+    connections instead of logging in again.
+
+    Clients and the objects they create can be pickled, e.g. to fan work out to a `ProcessPoolExecutor`. Unpickling
+    makes no requests: the objects get the restored context of their account and its session.
+
+    Parameters
+    ----------
+    login: Optional[str], optional
+        Login for authenticating with the client. You can also use the env variable MLOPS_USER to set this
+    password: Optional[str], optional
+        Password for authenticating with the client. You can also use the env variable MLOPS_PASSWORD to set this
+    url: Optional[str], optional
+        URL to MLOps Server. You can also use the env variable MLOPS_URL to set this
+    session: Optional[MLOpsSession], optional
+        An existing session to reuse. If None, a new session is created using `session_config`
+    session_config: Optional[SessionConfig], optional
+        Connection pool configuration (pool size, keep-alive and per-host connection limit) for the new session
+    context: Optional[MLOpsContext], optional
+        Authenticated context of the client that created this object. When informed, the credentials, URL and session
+        come from it and no new login is made
     """
 
     def __init__(
@@ -38,31 +55,35 @@ class BaseMLOps:
         login: Optional[str] = None,
         password: Optional[str] = None,
         url: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        session_config: Optional[SessionConfig] = None,
+        context: Optional[MLOpsContext] = None,
     ) -> None:
-        loaded = load_dotenv()
-        # Something's when running as a script the default version might not work
-        if not loaded:
-            load_dotenv(find_dotenv(usecwd=True))
-        logger.info("Loading .env")
-
-        if url is None:
-            url = os.getenv("MLOPS_URL")
-        if url is None:
-            url = "https://neomaril.datarisk.net/"
-
-        self.credentials = (
-            login if login else os.getenv("MLOPS_USER"),
-            password if password else os.getenv("MLOPS_PASSWORD"),
-        )
-        self.base_url = url
-        self.base_url = parse_url(self.base_url)
+        if context is None:
+            context = MLOpsContext.connect(
+                login=login,
+                password=password,
+                url=url,
+                session=session,
+                session_config=session_config,
+            )
 
-        self.user_token, self.version = try_login(
-            self.credentials[0],
-            self.credentials[1],
-            self.base_url,
-        )
-        logger.info("Successfully connected to MLOps")
+        self.context = context
+        self.credentials = context.credentials
+        self.base_url = context.base_url
+        self.session = context.session
+        self.user_token = context.user_token
+        self.version = context.version
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # The session is restored with the context
+        state.pop("session", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.session = self.context.session
 
     def _logs(
         self,
@@ -98,7 +119,7 @@ class BaseMLOps:
             assert type in ["Ok", "Error", "Debug", "Warning"]
             query["type"] = type
 
-        response = requests.get(
+        response = self.session.get(
             url,
             params=query,
             headers={
@@ -138,6 +159,10 @@ class BaseMLOpsClient(BaseMLOps):
         Password for authenticating with the client. You can also use the env variable MLOPS_PASSWORD to set this
     url: str
         URL to MLOps Server. Default value is https://neomaril.datarisk.net/, use it to test your deployment first before changing to production. You can also use the env variable MLOPS_URL to set this
+    session_config: Optional[SessionConfig], optional
+        Connection pool configuration for the client session. Every object returned by the client reuses this session
+    context: Optional[MLOpsContext], optional
+        Authenticated context to reuse, e.g. from another client. Every object returned by the client shares it
 
     Raises
     ------
@@ -180,7 +205,7 @@ class BaseMLOpsClient(BaseMLOps):
 
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer " + token,
@@ -239,7 +264,7 @@ class BaseMLOpsClient(BaseMLOps):
         url = f"{self.base_url}/groups"
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=data,
             headers={
@@ -322,7 +347,7 @@ class BaseMLOpsClient(BaseMLOps):
         url = f"{self.base_url}/groups/refresh/{name}"
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.get(
+        response = self.session.get(
             url,
             params={"force": str(force).lower()},
             headers={
@@ -373,6 +398,14 @@ class MLOpsExecution(BaseMLOps):
         Password for authenticating with the client. You can also use the env variable MLOPS_PASSWORD to set this
     url: Optional[str], optional
         URL to MLOps Server. Default value is https://neomaril.datarisk.net/, use it to test your deployment first before changing to production. You can also use the env variable MLOPS_URL to set this
+    group_token: Optional[str], optional
+        Token for executing the model (show when creating a group). You can also use the env variable MLOPS_GROUP_TOKEN to set this
+    session: Optional[MLOpsSession], optional
+        Session shared with the object that created this execution
+    context: Optional[MLOpsContext], optional
+        Context shared with the object that created this execution. When informed, no new login is made
+    status_ttl: float
+        Seconds a known status of an unfinished execution is reused before it is checked again. Defaults to 10
 
     Raises
     ------
@@ -420,19 +453,25 @@ class MLOpsExecution(BaseMLOps):
         password: Optional[str] = None,
         url: str = None,
         group_token: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
+        status_ttl: float = 10.0,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
-        loaded = load_dotenv()
-        # Something when running as a script the default version might not work
-        if not loaded:
-            load_dotenv(find_dotenv(usecwd=True))
-        logger.info("Loading .env")
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
 
         self.exec_type = exec_type
         self.exec_id = exec_id
-        self.status = ModelExecutionState.Requested
         self.group = group
-        self.__token = group_token if group_token else os.getenv("MLOPS_GROUP_TOKEN")
+        self.status_ttl = status_ttl
+        self.__parent_id = parent_id
+        self.__token = (
+            group_token if group_token else self.context.getenv("MLOPS_GROUP_TOKEN")
+        )
+        self.__execution_data = None
+        self.__status = ModelExecutionState.Requested
+        self.__status_checked_at = None
 
         if exec_type == "AsyncModel":
             self.__url_path = "model/async"
@@ -452,41 +491,85 @@ class MLOpsExecution(BaseMLOps):
 
             self.status = ModelExecutionState.Running
 
-        else:
-            url = f"{self.base_url}/{self.__url_path.replace('/async', '')}/describe/{group}/{parent_id}/{exec_id}"
-            response = requests.get(
-                url,
-                headers={
-                    "Authorization": "Bearer "
-                    + refresh_token(*self.credentials, self.base_url)
-                },
-            )
+    def __describe(self) -> dict:
+        url = f"{self.base_url}/{self.__url_path.replace('/async', '')}/describe/{self.group}/{self.__parent_id}/{self.exec_id}"
+        response = self.session.get(
+            url,
+            headers={
+                "Authorization": "Bearer "
+                + refresh_token(*self.credentials, self.base_url)
+            },
+        )
 
-            if response.status_code == 401:
-                logger.error(
-                    "Login or password are invalid, please check your credentials."
-                )
-                raise AuthenticationError("Login not authorized.")
+        if response.status_code == 401:
+            logger.error(
+                "Login or password are invalid, please check your credentials."
+            )
+            raise AuthenticationError("Login not authorized.")
 
-            if response.status_code == 404:
-                logger.error(
-                    f'Unable to retrieve execution "{exec_id}"\n{response.text}'
-                )
-                raise ModelError(f'Execution "{exec_id}" not found.')
+        if response.status_code == 404:
+            logger.error(
+                f'Unable to retrieve execution "{self.exec_id}"\n{response.text}'
+            )
+            raise ModelError(f'Execution "{self.exec_id}" not found.')
 
-            if response.status_code >= 500:
-                logger.error("Server is not available. Please, try it later.")
-                raise ServerError("Server is not available!")
+        if response.status_code >= 500:
+            logger.error("Server is not available. Please, try it later.")
+            raise ServerError("Server is not available!")
 
-            self.execution_data = response.json()["Description"]
+        return response.json()["Description"]
 
-            self.status = ModelExecutionState[self.execution_data["ExecutionState"]]
+    @property
+    def execution_data(self) -> dict:
+        """
+        Execution description. It is fetched from the server on the first access.
+        """
+        if self.__execution_data is None:
+            self.execution_data = self.__describe()
+        return self.__execution_data
+
+    @execution_data.setter
+    def execution_data(self, value: dict) -> None:
+        self.__execution_data = value
+        if "ExecutionState" in value:
+            self.status = ModelExecutionState[value["ExecutionState"]]
+
+    @property
+    def status(self) -> ModelExecutionState:
+        """
+        Execution status. When it was checked more than `status_ttl` seconds ago and the execution is not finished,
+        it is refreshed from the server.
+        """
+        if self.__status_checked_at is None:
+            if self.__execution_data is None:
+                self.execution_data = self.__describe()
+        elif (
+            self.__status
+            not in [ModelExecutionState.Succeeded, ModelExecutionState.Failed]
+            and self.exec_type != "AsyncPreprocessing"
+            and monotonic() - self.__status_checked_at > self.status_ttl
+        ):
+            self.execution_data = self.__describe()
+        return self.__status
+
+    @status.setter
+    def status(self, value: ModelExecutionState) -> None:
+        self.__status = value
+        self.__status_checked_at = monotonic()
+        if self.__execution_data is not None:
+            self.__execution_data["ExecutionState"] = str(value)
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        # Monotonic clocks of different processes can't be compared, the status is checked again on the next access
+        if self.__status_checked_at is not None:
+            self.__status_checked_at = float("-inf")
 
     def __repr__(self) -> str:
-        return f"""MLOps{self.exec_type}Execution(exec_id="{self.exec_id}", status="{self.status}")"""
+        return f"""MLOps{self.exec_type}Execution(exec_id="{self.exec_id}", status="{self.__status}")"""
 
     def __str__(self):
-        return f'MLOPS {self.exec_type }Execution:{self.exec_id} (Status: {self.status})"'
+        return f'MLOPS {self.exec_type }Execution:{self.exec_id} (Status: {self.__status})"'
 
     def get_status(self) -> dict:
         """
@@ -505,7 +588,7 @@ class MLOpsExecution(BaseMLOps):
 
         url = f"{self.base_url}/{self.__url_path}/status/{self.group}/{self.exec_id}"
 
-        response = requests.get(
+        response = self.session.get(
             url, headers={"Authorization": "Bearer " + self.__token}
         )
         if response.status_code not in [200, 410]:
@@ -516,10 +599,10 @@ class MLOpsExecution(BaseMLOps):
         result = response.json()
 
         self.status = ModelExecutionState[result["Status"]]
-        self.execution_data["ExecutionState"] = result["Status"]
 
         return result
 
+    @traced("MLOpsExecution.wait_ready")
     def wait_ready(self) -> None:
         """
         Waits the execution until is no longer running
@@ -543,6 +626,7 @@ class MLOpsExecution(BaseMLOps):
             )  # TODO: how to improve this message?
         logger.info("Execution completed successfully")
 
+    @traced("MLOpsExecution.download_result")
     def download_result(
         self, *, path: Optional[str] = "./", filename: Optional[str] = "output.zip"
     ) -> None:
@@ -573,13 +657,15 @@ class MLOpsExecution(BaseMLOps):
             url = (
                 f"{self.base_url}/{self.__url_path}/result/{self.group}/{self.exec_id}"
             )
-            response = requests.get(
+            # The result is streamed to the file, so large outputs are never fully kept in memory
+            response = self.session.get(
                 url,
                 headers={
                     "Authorization": "Bearer " + token,
                     "Neomaril-Origin": "Codex",
                     "Neomaril-Method": self.download_result.__qualname__,
                 },
+                stream=True,
             )
             if response.status_code not in [200, 410]:
                 formatted_msg = parse_json_to_yaml(response.json())
@@ -589,8 +675,9 @@ class MLOpsExecution(BaseMLOps):
             if not path.endswith("/"):
                 filename = "/" + filename
 
-            with open(path + filename, "wb") as f:
-                f.write(response.content)
+            with response, open(path + filename, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
 
             logger.info(f"Output saved in {path+filename}")
         elif self.status == ModelExecutionState.Failed:
@@ -0,0 +1,280 @@
+"""
+Batching module
+
+Aggregates the single record predictions of many concurrent callers into multi-record requests to a sync model,
+whose scoring function accepts a list of records, and hands each caller the part of the response of its record.
+At peak load this replaces one request per record by one request per batch.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple
+
+from mlops_codex.exceptions import InputError, ModelError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.model import MLOpsModel, PredictionFailure
+
+if TYPE_CHECKING:
+    from mlops_codex.preprocessing import MLOpsPreprocessing
+
+logger = get_logger()
+
+_STOP = object()
+
+
+def split_response(response: Any, size: int) -> Sequence[Any]:
+    """
+    Split the response of a batch into the results of its records. Used by default by :py:class:`MicroBatcher`.
+
+    Parameters
+    ----------
+    response: Any
+        The return of the scoring function for the list of records: a list with one result per record, or a dict of
+        lists with one value per record, like `{'pred': [1, 0], 'proba': [0.9, 0.2]}`
+    size: int
+        Number of records of the batch
+
+    Raises
+    ------
+    ModelError
+        The response doesn't have one result per record
+
+    Returns
+    -------
+    Sequence[Any]
+        The result of each record, in the order of the batch
+    """
+    if isinstance(response, list) and len(response) == size:
+        return response
+    if (
+        isinstance(response, dict)
+        and response
+        and all(isinstance(value, list) and len(value) == size for value in response.values())
+    ):
+        return [{key: value[i] for key, value in response.items()} for i in range(size)]
+    raise ModelError(
+        f"The response of a batch of {size} records doesn't have one result per record, inform a split function"
+    )
+
+
+class MicroBatcher:
+    """
+    Sends the predictions of concurrent callers to a sync model in batches.
+
+    Records are buffered until `max_batch_size` records are waiting or the oldest one has waited `max_wait`
+    seconds. The batch is sent as a single prediction whose input is the list of records, so the scoring function
+    of the model (or the sync preprocessing script run before it) must accept a list. Its response is split back
+    with `split`, and each caller gets the result of its own record. When a batch fails, every caller of the batch
+    gets the error.
+
+    A batcher is safe to share between threads. Close it, or use it as a context manager, to send the records still
+    buffered and stop its threads.
+
+    Parameters
+    ----------
+    model: MLOpsModel
+        A deployed sync model whose scoring function accepts a list of records
+    max_batch_size: int
+        Maximum records per request. Defaults to 64
+    max_wait: float
+        Maximum seconds a record waits for others before its batch is sent. Defaults to 0.005
+    max_concurrent_batches: int
+        Batches in flight at once, while the next one is being filled. Defaults to 4
+    group_token: Optional[str], optional
+        Token for executing the model. Defaults to the token of `model`
+    preprocessing: Optional[MLOpsPreprocessing], optional
+        Sync preprocessing script that receives the list of records before the model
+    split: Optional[Callable[[Any, int], Sequence[Any]]], optional
+        Function that splits the response of a batch into the result of each record, called with the response and the
+        number of records. Defaults to :py:func:`split_response`
+
+    Raises
+    ------
+    InputError
+        Invalid batch size, wait or concurrency
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.model import MLOpsModelClient
+
+        client = MLOpsModelClient()
+        model = client.get_model(model_id='M9c3af308c754ee7b96b2f4a273984414d40a33be90242908f9fc4aa28ba8ec4',
+                                 group='ex_group')
+
+        with model.batcher(max_batch_size=100, max_wait=0.01) as batcher:
+            # Called by many request threads, each with a single record
+            result = batcher.predict(data={'mean_radius': 17.99, 'mean_texture': 10.38})
+    """
+
+    def __init__(
+        self,
+        model: MLOpsModel,
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 4,
+        group_token: Optional[str] = None,
+        preprocessing: Optional["MLOpsPreprocessing"] = None,
+        split: Optional[Callable[[Any, int], Sequence[Any]]] = None,
+    ) -> None:
+        if max_batch_size < 1 or max_concurrent_batches < 1:
+            raise InputError("max_batch_size and max_concurrent_batches must be positive")
+        if max_wait < 0:
+            raise InputError("max_wait can't be negative")
+
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.preprocessing = preprocessing
+        self.split = split if split else split_response
+        self.batches = 0
+        self.records = 0
+
+        self.__group_token = group_token
+        self.__queue: "queue.Queue" = queue.Queue()
+        self.__lock = threading.Lock()
+        self.__closed = False
+        self.__executor = ThreadPoolExecutor(
+            max_concurrent_batches, thread_name_prefix="mlops-batch"
+        )
+        self.__collector = threading.Thread(
+            target=self.__collect, name="mlops-batch-collector", daemon=True
+        )
+        self.__collector.start()
+
+    def __repr__(self) -> str:
+        return (
+            f"MicroBatcher(model_id={self.model.model_id!r}, max_batch_size={self.max_batch_size}, "
+            f"max_wait={self.max_wait}, batches={self.batches}, records={self.records})"
+        )
+
+    def __enter__(self) -> "MicroBatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def submit(self, data: Any) -> Future:
+        """
+        Add a record to the next batch.
+
+        Parameters
+        ----------
+        data: Any
+            The record, one item of the list received by the scoring function
+
+        Raises
+        ------
+        InputError
+            The batcher is closed
+
+        Returns
+        -------
+        Future
+            Future of the result of the record
+        """
+        future = Future()
+        with self.__lock:
+            if self.__closed:
+                raise InputError("The batcher is closed")
+            self.__queue.put((data, future))
+        return future
+
+    def predict(self, *, data: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run the prediction of a record in the next batch and wait for its result.
+
+        Parameters
+        ----------
+        data: Any
+            The record, one item of the list received by the scoring function
+        timeout: Optional[float], optional
+            Seconds to wait for the result. Defaults to no limit besides the session timeouts
+
+        Raises
+        ------
+        ModelError
+            The batch failed or its response couldn't be split
+        AuthenticationError
+            Invalid group token
+        ServerError
+            The server failed
+        TimeoutError
+            No result after `timeout` seconds
+
+        Returns
+        -------
+        Any
+            The result of the record
+        """
+        return self.submit(data).result(timeout)
+
+    def __call__(self, data: Any) -> Any:
+        return self.predict(data=data)
+
+    def close(self) -> None:
+        """Send the buffered records, wait for the batches in flight and stop the threads"""
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__queue.put(_STOP)
+        self.__collector.join()
+        self.__executor.shutdown(wait=True)
+
+    def __collect(self) -> None:
+        stop = False
+        while not stop:
+            item = self.__queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - monotonic()
+                try:
+                    item = self.__queue.get(timeout=remaining) if remaining > 0 else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self.__executor.submit(self.__send, batch)
+
+    def __send(self, batch: List[Tuple[Any, Future]]) -> None:
+        # Records whose callers cancelled their future are left out
+        batch = [(data, future) for data, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            group_token = self.model._prediction_token(self.__group_token)
+            if self.model.operation != "sync":
+                raise ModelError("Batched predictions are only available for sync models")
+            result = self.model._score_row(
+                0,
+                [data for data, _ in batch],
+                group_token,
+                self.preprocessing,
+                method=self.predict.__qualname__,
+            )
+            if isinstance(result, PredictionFailure):
+                raise result.error
+            results = self.split(result, len(batch))
+            if len(results) != len(batch):
+                raise ModelError(f"The split of a batch of {len(batch)} records returned {len(results)} results")
+        except Exception as exc:
+            logger.debug(f"Batch of {len(batch)} records failed: {exc}")
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        with self.__lock:
+            self.batches += 1
+            self.records += len(batch)
+        for (_, future), value in zip(batch, results):
+            future.set_result(value)
@@ -0,0 +1,354 @@
+"""
+Cassette module
+
+Records the requests of a live session, with their responses and timings, to a cassette file and replays them
+offline. Replays run every client side step (retries, cache, decoding, metrics and tracing) against the recorded
+responses, so the overhead of real workloads can be benchmarked and regression tested without a platform.
+"""
+
+import base64
+import io
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.client import responses
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from mlops_codex.auth import token_lifetime
+from mlops_codex.exceptions import CassetteError, InputError
+from mlops_codex.logger_config import get_logger
+
+logger = get_logger()
+
+CASSETTE_VERSION = 1
+
+# Headers that describe the original transfer, not the recorded body
+_DROPPED_HEADERS = {"transfer-encoding", "connection", "keep-alive", "set-cookie"}
+
+_REDACTED_TOKEN = "redacted-token"
+
+
+class Interaction(NamedTuple):
+    """
+    Request and response recorded in a :py:class:`Cassette`.
+
+    Parameters
+    ----------
+    method: str
+        HTTP method
+    url: str
+        Path and query of the request, without the host
+    status: int
+        Response status code
+    headers: Dict[str, str]
+        Response headers
+    body: bytes
+        Response body as received, before decoding its `Content-Encoding`
+    elapsed: float
+        Seconds between sending the request and reading the whole response
+    offset: float
+        Seconds between the start of the recording and the request
+    token_ttl: Optional[float], optional
+        Lifetime of the user token of a login response, that is replaced by a new token when replayed
+    """
+
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    elapsed: float
+    offset: float
+    token_ttl: Optional[float] = None
+
+
+def _request_key(method: str, url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return method.upper(), parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+def _jwt(ttl: float) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode({'iat': now, 'exp': now + int(ttl)})}.replay"
+
+
+class Cassette:
+    """
+    File of recorded requests and responses.
+
+    In 'record' mode, the requests of the sessions that use the cassette are sent to the server and their responses
+    are kept, with the time each one took. In 'replay' mode, no request leaves the process: each one is answered with
+    the next recorded response of the same method, path and query. The requests of the session are matched in the
+    order they were recorded, so polling loops and retries replay the same sequence of statuses.
+
+    User tokens and group tokens are never written to the file. Login responses are replayed with a new token with the
+    lifetime of the recorded one, and request bodies (which contain the password of the login) are not recorded.
+
+    Use the cassette through :py:class:`mlops_codex.session.SessionConfig`, so every request of the client, including
+    the login, goes through it. The responses are kept in memory while recording, including the downloaded results.
+
+    Parameters
+    ----------
+    path: str
+        Path of the cassette file
+    mode: str
+        'record' or 'replay'. Defaults to 'replay'
+    speed: Optional[float], optional
+        Replay speed relative to the recording: 1 waits the recorded time of each response, 2 waits half of it. If None,
+        responses are replayed as fast as possible
+    repeat: bool
+        When the recorded responses of a request are exhausted, replay its last response again instead of raising
+        :py:class:`mlops_codex.exceptions.CassetteError`. Defaults to True
+
+    Raises
+    ------
+    InputError
+        Invalid mode or speed
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.cassette import Cassette
+        from mlops_codex.model import MLOpsModelClient
+        from mlops_codex.session import SessionConfig
+
+        # Live session: record the workload
+        with Cassette('search_models.json', mode='record') as cassette:
+            client = MLOpsModelClient(session_config=SessionConfig(cassette=cassette))
+            client.search_models(group='groupname')
+
+        # Offline: replay it as fast as possible, to measure the client overhead
+        client = MLOpsModelClient(session_config=SessionConfig(cassette=Cassette('search_models.json')))
+        client.search_models(group='groupname')
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        mode: str = "replay",
+        speed: Optional[float] = None,
+        repeat: bool = True,
+    ) -> None:
+        if mode not in ("record", "replay"):
+            raise InputError(f"Invalid cassette mode '{mode}'. Valid options are 'record' and 'replay'")
+        if speed is not None and speed <= 0:
+            raise InputError("Replay speed must be positive")
+
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.repeat = repeat
+
+        self.__lock = threading.Lock()
+        self.__interactions: List[Interaction] = []
+        self.__pending: Dict[Tuple[str, str], Deque[Interaction]] = defaultdict(deque)
+        self.__last: Dict[Tuple[str, str], Interaction] = {}
+        self.__started_at = time.perf_counter()
+
+        if mode == "replay":
+            self.__load()
+
+    def __repr__(self) -> str:
+        return f"Cassette(path={self.path!r}, mode={self.mode!r}, interactions={len(self.__interactions)})"
+
+    def __reduce__(self):
+        return _restore_cassette, (self.path, self.mode, self.speed, self.repeat)
+
+    def __enter__(self) -> "Cassette":
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self.mode == "record":
+            self.save()
+
+    @property
+    def interactions(self) -> Tuple[Interaction, ...]:
+        """Recorded interactions, in the order their requests were sent"""
+        with self.__lock:
+            return tuple(self.__interactions)
+
+    def rewind(self) -> None:
+        """Replay the cassette again from its first interaction"""
+        with self.__lock:
+            self.__pending.clear()
+            self.__last.clear()
+            for interaction in self.__interactions:
+                self.__pending[(interaction.method, interaction.url)].append(interaction)
+
+    def save(self) -> None:
+        """Write the recorded interactions to the cassette file"""
+        with self.__lock:
+            interactions = [
+                {
+                    **interaction._asdict(),
+                    "body": base64.b64encode(interaction.body).decode("ascii"),
+                }
+                for interaction in self.__interactions
+            ]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": CASSETTE_VERSION, "interactions": interactions}, f, indent=1)
+        logger.debug(f"{len(interactions)} interactions saved in {self.path}")
+
+    def __load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise CassetteError(f"Unsupported cassette version {data.get('version')} in {self.path}")
+
+        self.__interactions = [
+            Interaction(**{**item, "body": base64.b64decode(item["body"])})
+            for item in data["interactions"]
+        ]
+        self.rewind()
+
+    def adapter(self, adapter: HTTPAdapter) -> HTTPAdapter:
+        """
+        Wrap the transport adapter of a session, used by :py:class:`mlops_codex.session.MLOpsSession`.
+
+        Parameters
+        ----------
+        adapter: HTTPAdapter
+            Adapter that sends the requests to the server
+
+        Returns
+        -------
+        HTTPAdapter
+            Adapter that records the requests sent by `adapter` or replays them
+        """
+        if self.mode == "record":
+            return _RecordingAdapter(self, adapter)
+        return _ReplayAdapter(self)
+
+    def _record(
+        self,
+        request: requests.PreparedRequest,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        start: float,
+    ) -> None:
+        elapsed = time.perf_counter() - start
+        method, url = _request_key(request.method, request.url)
+        body, headers, token_ttl = self.__redact(method, url, body, headers)
+
+        interaction = Interaction(
+            method=method,
+            url=url,
+            status=status,
+            headers=headers,
+            body=body,
+            elapsed=elapsed,
+            offset=start - self.__started_at,
+            token_ttl=token_ttl,
+        )
+        with self.__lock:
+            self.__interactions.append(interaction)
+
+    @staticmethod
+    def __redact(
+        method: str, url: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[bytes, Dict[str, str], Optional[float]]:
+        if b"Token" not in body and not any(k.lower() == "content-encoding" for k in headers):
+            return body, headers, None
+
+        try:
+            data = json.loads(_raw_response(200, headers, body).read())
+        except ValueError:
+            return body, headers, None
+        if not isinstance(data, dict) or not isinstance(data.get("Token"), str):
+            return body, headers, None
+
+        token_ttl = None
+        if method == "POST" and url.rstrip("/").endswith("/login"):
+            token_ttl = token_lifetime(data["Token"]) or 3600.0
+        data["Token"] = _REDACTED_TOKEN
+        # The redacted body is stored decoded
+        headers = {k: v for k, v in headers.items() if k.lower() != "content-encoding"}
+        return json.dumps(data).encode(), headers, token_ttl
+
+    def _next(self, request: requests.PreparedRequest) -> Interaction:
+        key = _request_key(request.method, request.url)
+        with self.__lock:
+            pending = self.__pending.get(key)
+            if pending:
+                interaction = pending.popleft()
+                self.__last[key] = interaction
+                return interaction
+            if self.repeat and key in self.__last:
+                return self.__last[key]
+        raise CassetteError(f"No recorded response for '{key[0]} {key[1]}' in {self.path}")
+
+
+def _restore_cassette(path: str, mode: str, speed: Optional[float], repeat: bool) -> Cassette:
+    return Cassette(path, mode=mode, speed=speed, repeat=repeat)
+
+
+def _raw_response(status: int, headers: Dict[str, str], body: bytes) -> HTTPResponse:
+    headers = {k: v for k, v in headers.items() if k.lower() != "content-length"}
+    headers["Content-Length"] = str(len(body))
+    return HTTPResponse(
+        body=io.BytesIO(body),
+        headers=headers,
+        status=status,
+        reason=responses.get(status, ""),
+        preload_content=False,
+        decode_content=True,
+    )
+
+
+class _RecordingAdapter(HTTPAdapter):
+    """Sends the requests with the wrapped adapter and records their responses"""
+
+    def __init__(self, cassette: Cassette, adapter: HTTPAdapter) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        start = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        try:
+            # The body is read as received, so the replay decodes it like the live session did
+            body = response.raw.read(decode_content=False)
+        finally:
+            response.close()
+
+        headers = {
+            k: v for k, v in response.raw.headers.items() if k.lower() not in _DROPPED_HEADERS
+        }
+        self.cassette._record(request, response.status_code, headers, body, start)
+        return self.build_response(request, _raw_response(response.status_code, headers, body))
+
+    def close(self) -> None:
+        self.adapter.close()
+        super().close()
+
+
+class _ReplayAdapter(HTTPAdapter):
+    """Answers the requests with the recorded responses"""
+
+    def __init__(self, cassette: Cassette) -> None:
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        interaction = self.cassette._next(request)
+        if self.cassette.speed is not None:
+            time.sleep(interaction.elapsed / self.cassette.speed)
+        body = interaction.body
+        if interaction.token_ttl is not None:
+            data = json.loads(body)
+            data["Token"] = _jwt(interaction.token_ttl)
+            body = json.dumps(data).encode()
+        return self.build_response(request, _raw_response(interaction.status, interaction.headers, body))
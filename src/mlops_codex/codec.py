@@ -0,0 +1,217 @@
+"""
+Codec module
+
+JSON encoders and decoders used for the payloads of predictions and sync preprocessing runs. The standard library
+is used by default. orjson and ujson spend a fraction of its CPU time on large payloads and can be chosen with the
+`json_codec` of :py:class:`mlops_codex.session.SessionConfig`, after installing them
+(`pip install datarisk-mlops-codex[orjson]` or `[ujson]`). orjson doesn't encode every payload the same way:
+
+- orjson encodes NaN and Infinity as null, where the standard library and ujson write `NaN` and `Infinity`;
+- orjson raises TypeError on integers beyond 64 bits, that the other codecs encode.
+
+Every codec encodes numpy scalars and arrays, datetimes and pandas objects, so data taken from a DataFrame can be
+sent as is.
+"""
+
+import datetime
+import decimal
+import json
+import sys
+import uuid
+from typing import Any, Callable, Dict, NamedTuple, Union
+
+from lazy_imports import try_import
+
+from mlops_codex.exceptions import InputError
+
+
+class JSONCodec(NamedTuple):
+    """
+    JSON encoder and decoder of the payloads.
+
+    Parameters
+    ----------
+    name: str
+        Name of the codec
+    dumps: Callable[[Any], bytes]
+        Encode an object to JSON
+    loads: Callable[[Union[bytes, str]], Any]
+        Decode JSON to an object
+    """
+
+    name: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[Union[bytes, str]], Any]
+
+
+def to_json_native(obj: Any) -> Any:
+    """
+    Convert an object that JSON can't encode to one that it can. Used as the `default` of the encoders.
+
+    numpy scalars and arrays become numbers and lists, dates and times become ISO 8601 strings, pandas Series and
+    Index become lists, DataFrames become lists of records and missing values (NaT, NA) become null.
+
+    Parameters
+    ----------
+    obj: Any
+        The object to convert
+
+    Raises
+    ------
+    TypeError
+        The object can't be converted
+
+    Returns
+    -------
+    Any
+        An object made of JSON types
+    """
+    module = type(obj).__module__.split(".")[0]
+    if module == "pandas":
+        pd = sys.modules["pandas"]
+        if isinstance(obj, pd.DataFrame):
+            return obj.to_dict(orient="records")
+        if isinstance(obj, (pd.Series, pd.Index)):
+            return obj.tolist()
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+        if isinstance(obj, pd.Timedelta):
+            return obj.isoformat()
+    if module == "numpy":
+        numpy = sys.modules["numpy"]
+        if isinstance(obj, numpy.datetime64):
+            return None if numpy.isnat(obj) else str(obj)
+        if isinstance(obj, (numpy.generic, numpy.ndarray)):
+            return obj.tolist()
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, default=to_json_native).encode("utf-8")
+
+
+def _json_loads(data: Union[bytes, str]) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    import orjson
+
+    return orjson.dumps(
+        obj,
+        default=to_json_native,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+def _orjson_loads(data: Union[bytes, str]) -> Any:
+    import orjson
+
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN, Infinity and integers beyond 64 bits are only accepted by the standard library
+        return json.loads(data)
+
+
+def _ujson_dumps(obj: Any) -> bytes:
+    import ujson
+
+    return ujson.dumps(obj, default=to_json_native, ensure_ascii=False).encode("utf-8")
+
+
+def _ujson_loads(data: Union[bytes, str]) -> Any:
+    import ujson
+
+    try:
+        return ujson.loads(data)
+    except (ujson.JSONDecodeError, ValueError):
+        return json.loads(data)
+
+
+CODECS: Dict[str, JSONCodec] = {
+    "orjson": JSONCodec("orjson", _orjson_dumps, _orjson_loads),
+    "ujson": JSONCodec("ujson", _ujson_dumps, _ujson_loads),
+    "json": JSONCodec("json", _json_dumps, _json_loads),
+}
+
+
+def get_codec(codec: Union[str, JSONCodec] = "json") -> JSONCodec:
+    """
+    Get a JSON codec.
+
+    Parameters
+    ----------
+    codec: Union[str, JSONCodec]
+        'orjson', 'ujson', 'json', or 'auto' for the fastest one installed. A :py:class:`JSONCodec` is returned as is.
+        Defaults to 'json'. orjson and ujson encode some payloads differently, see the module documentation
+
+    Raises
+    ------
+    InputError
+        Unknown codec
+    ImportError
+        The library of the codec is not installed
+
+    Returns
+    -------
+    JSONCodec
+        The codec
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        for name in ("orjson", "ujson"):
+            with try_import() as codec_import:
+                __import__(name)
+            if codec_import.is_successful():
+                return CODECS[name]
+        return CODECS["json"]
+    if codec not in CODECS:
+        raise InputError(
+            f"Invalid JSON codec '{codec}'. Valid options are 'auto', 'orjson', 'ujson' and 'json'"
+        )
+    if codec != "json":
+        with try_import() as codec_import:
+            __import__(codec)
+        try:
+            codec_import.check()
+        except ImportError as e:
+            raise ImportError(
+                f"The {codec} codec requires {codec}, install it with `pip install datarisk-mlops-codex[{codec}]`"
+            ) from e
+    return CODECS[codec]
+
+
+def encode_input(codec: JSONCodec, data: Any, **fields: Any) -> bytes:
+    """
+    Encode the body of a sync run, `{"Input": data, **fields}`.
+
+    Parameters
+    ----------
+    codec: JSONCodec
+        The encoder
+    data: Any
+        The input. `bytes` are taken as the JSON of the input, already encoded, and are sent without being decoded
+    fields: Any
+        Other fields of the body, like `ScriptHash`
+
+    Returns
+    -------
+    bytes
+        The body
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        extra = b"".join(
+            b"," + codec.dumps(key) + b":" + codec.dumps(value) for key, value in fields.items()
+        )
+        return b'{"Input":' + bytes(data) + extra + b"}"
+    return codec.dumps({"Input": data, **fields})
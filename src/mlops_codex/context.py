@@ -0,0 +1,305 @@
+"""
+Connection context module
+
+A client authenticates once and shares the resulting context with every object it
+creates, so those objects don't load the .env file or login again.
+"""
+
+import hashlib
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from mlops_codex.__utils import parse_url, try_login
+from mlops_codex.auth import TokenManager, get_token_manager
+from mlops_codex.logger_config import get_logger
+from mlops_codex.session import MLOpsSession, SessionConfig
+
+logger = get_logger()
+
+DEFAULT_URL = "https://neomaril.datarisk.net/"
+
+
+def load_env() -> Dict[str, str]:
+    """
+    Load the .env file and get the MLOps environment variables.
+
+    Returns
+    -------
+    Dict[str, str]
+        The environment variables starting with `MLOPS_`
+    """
+    from dotenv import find_dotenv, load_dotenv
+
+    loaded = load_dotenv()
+    # Something's when running as a script the default version might not work
+    if not loaded:
+        load_dotenv(find_dotenv(usecwd=True))
+    logger.info("Loading .env")
+
+    return {k: v for k, v in os.environ.items() if k.startswith("MLOPS_")}
+
+
+class MLOpsContext:
+    """
+    Authenticated connection shared by a client and every object it creates.
+
+    Parameters
+    ----------
+    credentials: Tuple[str, str]
+        Login and password
+    base_url: str
+        Parsed URL to the MLOps API
+    session: MLOpsSession
+        Pooled session used by every request
+    token_manager: TokenManager
+        Manager of the account user token
+    version: str
+        API version informed by the server
+    env: Dict[str, str]
+        MLOps environment variables resolved when connecting
+
+    Contexts can be pickled with the objects that reference them, e.g. to send a model to a process pool. In the new
+    process, every object of the same account shares one restored context, with a new session and the current user
+    token, so unpickling makes no requests. Note that the credentials are pickled as well.
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.context import MLOpsContext
+        from mlops_codex.model import MLOpsModelClient
+        from mlops_codex.training import MLOpsTrainingClient
+
+        context = MLOpsContext.connect(login='user@company.com', password='123456')
+        model_client = MLOpsModelClient(context=context)
+        training_client = MLOpsTrainingClient(context=context)
+    """
+
+    def __init__(
+        self,
+        *,
+        credentials: Tuple[str, str],
+        base_url: str,
+        session: MLOpsSession,
+        token_manager: TokenManager,
+        version: str,
+        env: Dict[str, str],
+    ) -> None:
+        self.credentials = credentials
+        self.base_url = base_url
+        self.session = session
+        self.token_manager = token_manager
+        self.version = version
+        self.env = env
+
+        self.__handles = weakref.WeakValueDictionary()
+        self.__handles_lock = threading.Lock()
+        _contexts.add(self)
+
+    def __repr__(self) -> str:
+        return f'MLOpsContext(url="{self.base_url}", login="{self.credentials[0]}")'
+
+    def __reduce__(self):
+        return (
+            _restore_context,
+            (
+                self.credentials,
+                self.base_url,
+                self.session.config,
+                self.version,
+                self.env,
+                self.token_manager._snapshot(),
+            ),
+        )
+
+    def _reset_after_fork(self) -> None:
+        self.__handles_lock = threading.Lock()
+
+    def getenv(self, name: str) -> Optional[str]:
+        """
+        Get an MLOps environment variable: its current value, so variables set after connecting are used, or else
+        the value resolved when connecting, e.g. from the .env file or in a process that unpickled the context.
+
+        Parameters
+        ----------
+        name: str
+            Name of the variable, e.g. 'MLOPS_GROUP_TOKEN'
+
+        Returns
+        -------
+        Optional[str]
+            The value, or None if the variable is not set
+        """
+        return os.environ.get(name) or self.env.get(name)
+
+    @classmethod
+    def connect(
+        cls,
+        *,
+        login: Optional[str] = None,
+        password: Optional[str] = None,
+        url: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        session_config: Optional[SessionConfig] = None,
+    ) -> "MLOpsContext":
+        """
+        Resolve the credentials, check the server health and login.
+
+        Parameters
+        ----------
+        login: Optional[str], optional
+            Login for authenticating with the client. You can also use the env variable MLOPS_USER to set this
+        password: Optional[str], optional
+            Password for authenticating with the client. You can also use the env variable MLOPS_PASSWORD to set this
+        url: Optional[str], optional
+            URL to MLOps Server. You can also use the env variable MLOPS_URL to set this
+        session: Optional[MLOpsSession], optional
+            An existing session to reuse. If None, a new session is created using `session_config`
+        session_config: Optional[SessionConfig], optional
+            Configuration of the new session
+
+        Raises
+        ------
+        AuthenticationError
+            Invalid credentials
+        ServerError
+            Server unavailable
+
+        Returns
+        -------
+        MLOpsContext
+            The authenticated context
+        """
+        env = load_env()
+
+        if url is None:
+            url = env.get("MLOPS_URL", DEFAULT_URL)
+
+        credentials = (
+            login if login else env.get("MLOPS_USER"),
+            password if password else env.get("MLOPS_PASSWORD"),
+        )
+        base_url = parse_url(url)
+        if session is None:
+            session = MLOpsSession(session_config)
+
+        _, version = try_login(credentials[0], credentials[1], base_url, session)
+        logger.info("Successfully connected to MLOps")
+
+        return cls(
+            credentials=credentials,
+            base_url=base_url,
+            session=session,
+            token_manager=get_token_manager(
+                credentials[0], credentials[1], base_url, session
+            ),
+            version=version,
+            env=env,
+        )
+
+    @property
+    def user_token(self) -> str:
+        """A valid user token"""
+        return self.token_manager.get_token()
+
+    def get_handle(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Get the object cached for the key, creating it with `factory` if there is none.
+        Objects are only kept while someone still references them.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the object, e.g. ('model', group, model_id)
+        factory: Callable[[], Any]
+            Function that creates the object
+
+        Returns
+        -------
+        Any
+            The cached or the new object
+        """
+        with self.__handles_lock:
+            handle = self.__handles.get(key)
+        if handle is not None:
+            return handle
+
+        handle = factory()
+        with self.__handles_lock:
+            # Another thread may have created the same handle meanwhile
+            return self.__handles.setdefault(key, handle)
+
+    def forget_handle(self, key: Hashable) -> None:
+        """
+        Remove the object cached for the key, e.g. after it was deleted in the server.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the object
+        """
+        with self.__handles_lock:
+            self.__handles.pop(key, None)
+
+
+_contexts: "weakref.WeakSet[MLOpsContext]" = weakref.WeakSet()
+_restored: Dict[Hashable, MLOpsContext] = {}
+_restored_lock = threading.Lock()
+
+
+def _reset_contexts_after_fork() -> None:
+    global _restored_lock
+    _restored_lock = threading.Lock()
+    for context in list(_contexts):
+        context._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_contexts_after_fork)
+
+
+def _restore_context(
+    credentials: Tuple[str, str],
+    base_url: str,
+    config: SessionConfig,
+    version: str,
+    env: Dict[str, str],
+    snapshot: Optional[Tuple[str, float, float]],
+) -> MLOpsContext:
+    # The registry is keyed by a digest, so the password is never kept as a key
+    key = (
+        hashlib.sha256(
+            "\0".join((str(credentials[0]), str(credentials[1]), base_url)).encode("utf-8")
+        ).hexdigest(),
+        config,
+    )
+    with _restored_lock:
+        context = _restored.get(key)
+        if context is None:
+            # Copies made in the same process share the original context
+            context = next(
+                (
+                    c
+                    for c in list(_contexts)
+                    if c.credentials == tuple(credentials)
+                    and c.base_url == base_url
+                    and c.session.config == config
+                ),
+                None,
+            )
+        if context is None:
+            session = MLOpsSession(config)
+            context = _restored[key] = MLOpsContext(
+                credentials=credentials,
+                base_url=base_url,
+                session=session,
+                token_manager=get_token_manager(
+                    credentials[0], credentials[1], base_url, session
+                ),
+                version=version,
+                env=env,
+            )
+    context.token_manager._adopt(snapshot)
+    return context
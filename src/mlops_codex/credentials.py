@@ -0,0 +1,354 @@
+"""
+Credential pool module
+
+Services that work with the groups of many accounts keep every account in one pool. Each
+account connects once, with its own session and user token, and the requests of a group
+are sent with the credentials and group token of the account that owns it.
+"""
+
+import threading
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple, Type
+
+from mlops_codex.context import MLOpsContext
+from mlops_codex.exceptions import GroupError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.session import SessionConfig
+
+logger = get_logger()
+
+
+class Account(NamedTuple):
+    """
+    Account registered in a :py:class:`CredentialPool`.
+
+    Parameters
+    ----------
+    login: str
+        User email
+    password: str
+        User password
+    group_tokens: Dict[str, Optional[str]]
+        Groups served by this account and their group tokens. Use None for groups that are only managed, never
+        used to run models
+    url: Optional[str], optional
+        URL to MLOps Server. Defaults to the pool URL
+    """
+
+    login: str
+    password: str
+    group_tokens: Dict[str, Optional[str]]
+    url: Optional[str] = None
+
+
+class CredentialPool:
+    """
+    Credentials of many accounts, routed by group.
+
+    Accounts connect on their first use. Each one keeps its own :py:class:`mlops_codex.context.MLOpsContext`, so their
+    user tokens are refreshed independently and their requests use separate connection pools. Objects got from the
+    pool are kept and reused, so a service can get the model of each request from the pool without logging in or
+    describing the model again.
+
+    Parameters
+    ----------
+    accounts: Iterable[Account]
+        Accounts of the pool. More accounts can be added with :py:meth:`add_account`
+    url: Optional[str], optional
+        URL to MLOps Server used by the accounts that don't inform one. You can also use the env variable MLOPS_URL to set this
+    session_config: Optional[SessionConfig], optional
+        Configuration of the session of each account
+
+    Raises
+    ------
+    GroupError
+        A group is served by more than one account
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.credentials import Account, CredentialPool
+
+        pool = CredentialPool(
+            accounts=[
+                Account('team-a@company.com', '123456', {'groupa': 'd1a9e3...'}),
+                Account('team-b@company.com', '654321', {'groupb': '7f0c2b...', 'groupc': '95ad41...'}),
+            ]
+        )
+
+        def score(group, model_id, data):
+            return pool.get_model(group=group, model_id=model_id).predict(data=data)
+    """
+
+    def __init__(
+        self,
+        *,
+        accounts: Iterable[Account] = (),
+        url: Optional[str] = None,
+        session_config: Optional[SessionConfig] = None,
+    ) -> None:
+        self.url = url
+        self.session_config = session_config
+
+        self.__accounts: Dict[str, Account] = {}
+        self.__contexts: Dict[Tuple[str, Optional[str]], MLOpsContext] = {}
+        self.__connect_locks: Dict[str, threading.Lock] = {}
+        self.__handles: Dict[Tuple[Any, ...], Any] = {}
+        self.__lock = threading.Lock()
+
+        for account in accounts:
+            self.add_account(account)
+
+    def __repr__(self) -> str:
+        accounts = len(set(map(self.__key, self.__accounts.values())))
+        return f"CredentialPool(accounts={accounts}, groups={self.groups})"
+
+    def __key(self, account: Account) -> Tuple[str, Optional[str]]:
+        return account.login, account.url or self.url
+
+    def __contains__(self, group: str) -> bool:
+        return group in self.__accounts
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_CredentialPool__connect_locks"]
+        del state["_CredentialPool__lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        locks = {self.__key(a): threading.Lock() for a in self.__accounts.values()}
+        self.__connect_locks = {g: locks[self.__key(a)] for g, a in self.__accounts.items()}
+        self.__lock = threading.Lock()
+
+    @property
+    def groups(self) -> Tuple[str, ...]:
+        """Groups served by the pool"""
+        return tuple(self.__accounts)
+
+    def add_account(self, account: Account) -> None:
+        """
+        Add an account to the pool.
+
+        Parameters
+        ----------
+        account: Account
+            The account and the groups it serves
+
+        Raises
+        ------
+        GroupError
+            A group of the account is already served by another account
+        """
+        with self.__lock:
+            key = self.__key(account)
+            for group in account.group_tokens:
+                current = self.__accounts.get(group)
+                if current is not None and self.__key(current) != key:
+                    raise GroupError(
+                        f"Group '{group}' is already served by the account '{current.login}'"
+                    )
+
+            # Every group of the account shares one lock, so the account connects once
+            lock = next(
+                (
+                    self.__connect_locks[g]
+                    for g, a in self.__accounts.items()
+                    if self.__key(a) == key
+                ),
+                threading.Lock(),
+            )
+            for group in account.group_tokens:
+                self.__accounts[group] = account
+                self.__connect_locks[group] = lock
+
+    def account(self, group: str) -> Account:
+        """
+        Get the account that serves a group.
+
+        Parameters
+        ----------
+        group: str
+            Group name
+
+        Raises
+        ------
+        GroupError
+            No account serves the group
+
+        Returns
+        -------
+        Account
+            The account
+        """
+        account = self.__accounts.get(group)
+        if account is None:
+            raise GroupError(f"No account of the pool serves the group '{group}'")
+        return account
+
+    def group_token(self, group: str) -> Optional[str]:
+        """
+        Get the token of a group.
+
+        Parameters
+        ----------
+        group: str
+            Group name
+
+        Returns
+        -------
+        Optional[str]
+            The group token
+        """
+        return self.account(group).group_tokens.get(group)
+
+    def context(self, group: str) -> MLOpsContext:
+        """
+        Get the connected context of the account that serves a group, connecting it on the first call.
+
+        Parameters
+        ----------
+        group: str
+            Group name
+
+        Raises
+        ------
+        GroupError
+            No account serves the group
+        AuthenticationError
+            Invalid credentials
+
+        Returns
+        -------
+        MLOpsContext
+            The account context
+        """
+        account = self.account(group)
+        key = self.__key(account)
+        context = self.__contexts.get(key)
+        if context is not None:
+            return context
+
+        with self.__connect_locks[group]:
+            context = self.__contexts.get(key)
+            if context is None:
+                context = MLOpsContext.connect(
+                    login=account.login,
+                    password=account.password,
+                    url=account.url or self.url,
+                    session_config=self.session_config,
+                )
+                self.__contexts[key] = context
+                logger.info(f"Account '{account.login}' connected to the pool")
+        return context
+
+    def client(self, client_class: Type, *, group: str) -> Any:
+        """
+        Get a client of the account that serves a group, e.g. `pool.client(MLOpsModelClient, group='groupa')`.
+
+        Parameters
+        ----------
+        client_class: Type
+            Client class, like :py:class:`mlops_codex.model.MLOpsModelClient`
+        group: str
+            Group name
+
+        Returns
+        -------
+        Any
+            The client, shared by every group of the account
+        """
+        context = self.context(group)
+        return self.__handle(
+            (client_class, self.__key(self.account(group))),
+            lambda: client_class(context=context),
+        )
+
+    def get_model(self, *, model_id: str, group: str) -> Any:
+        """
+        Get a model with the credentials and the group token of its group.
+
+        Parameters
+        ----------
+        model_id: str
+            Model id (hash)
+        group: str
+            Group the model is inserted
+
+        Raises
+        ------
+        GroupError
+            No account serves the group
+
+        Returns
+        -------
+        MLOpsModel
+            The model, shared by every caller of the pool
+        """
+        from mlops_codex.model import MLOpsModel
+
+        context = self.context(group)
+        group_token = self.group_token(group)
+
+        def factory():
+            # The model may already be used by a client of the same account with the same token
+            return context.get_handle(
+                ("model", group, model_id, group_token),
+                lambda: MLOpsModel(
+                    model_id=model_id, group=group, group_token=group_token, context=context
+                ),
+            )
+
+        return self.__handle(("model", group, model_id), factory)
+
+    def get_preprocessing(self, *, preprocessing_id: str, group: str) -> Any:
+        """
+        Get a preprocessing script with the credentials and the group token of its group.
+
+        Parameters
+        ----------
+        preprocessing_id: str
+            Preprocessing id (hash)
+        group: str
+            Group the preprocessing is inserted
+
+        Raises
+        ------
+        GroupError
+            No account serves the group
+
+        Returns
+        -------
+        MLOpsPreprocessing
+            The preprocessing, shared by every caller of the pool
+        """
+        from mlops_codex.preprocessing import MLOpsPreprocessing
+
+        context = self.context(group)
+        return self.__handle(
+            ("preprocessing", group, preprocessing_id),
+            lambda: MLOpsPreprocessing(
+                preprocessing_id=preprocessing_id,
+                group=group,
+                group_token=self.group_token(group),
+                context=context,
+            ),
+        )
+
+    def close(self) -> None:
+        """Close the sessions of every connected account"""
+        with self.__lock:
+            contexts = list(self.__contexts.values())
+            self.__contexts.clear()
+            self.__handles.clear()
+        for context in contexts:
+            context.session.close()
+
+    def __handle(self, key: Tuple[Any, ...], factory) -> Any:
+        # The pool keeps its objects alive, the context cache only holds weak references
+        handle = self.__handles.get(key)
+        if handle is None:
+            handle = factory()
+            with self.__lock:
+                handle = self.__handles.setdefault(key, handle)
+        return handle
@@ -2,10 +2,9 @@ import json
 from http import HTTPStatus
 from typing import Optional, Union
 
-import requests
-
 from mlops_codex.__utils import parse_json_to_yaml, refresh_token
 from mlops_codex.base import BaseMLOps, BaseMLOpsClient
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     CredentialError,
@@ -14,6 +13,7 @@ from mlops_codex.exceptions import (
     ServerError,
 )
 from mlops_codex.logger_config import get_logger
+from mlops_codex.session import MLOpsSession
 
 logger = get_logger()
 
@@ -86,6 +86,7 @@ class MLOpsDataSourceClient(BaseMLOpsClient):
             login=self.credentials[0],
             password=self.credentials[1],
             url=self.base_url,
+            context=self.context,
         )
 
         url = f"{self.base_url}/datasource/register/{group}"
@@ -108,7 +109,7 @@ class MLOpsDataSourceClient(BaseMLOpsClient):
         }
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.post(
+        response = self.session.post(
             url=url,
             data=form_data,
             files=files,
@@ -183,7 +184,7 @@ class MLOpsDataSourceClient(BaseMLOpsClient):
 
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={
                 "Authorization": "Bearer " + token,
@@ -243,6 +244,7 @@ class MLOpsDataSourceClient(BaseMLOpsClient):
                     login=self.credentials[0],
                     password=self.credentials[1],
                     url=self.base_url,
+                    context=self.context,
                 )
         raise InputError("Datasource not found!")
 
@@ -270,6 +272,10 @@ class MLOpsDataSource(BaseMLOps):
         Google GCP as "GCP".
     group: str
         Name of the group where we will search the datasources
+    session: Optional[MLOpsSession], optional
+        Session shared with the client that created this datasource
+    context: Optional[MLOpsContext], optional
+        Context shared with the client that created this datasource. When informed, no new login is made
     """
 
     def __init__(
@@ -281,8 +287,12 @@ class MLOpsDataSource(BaseMLOps):
         login: str,
         password: str,
         url: str,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
         self.datasource_name = datasource_name
         self.provider = provider
         self.group = group
@@ -329,7 +339,7 @@ class MLOpsDataSource(BaseMLOps):
 
         token = refresh_token(*self.credentials, self.base_url)
         url = f"{self.base_url}/datasource/import/{self.group}/{self.datasource_name}?force={force}"
-        response = requests.post(
+        response = self.session.post(
             url=url,
             data=form_data,
             headers={
@@ -351,6 +361,7 @@ class MLOpsDataSource(BaseMLOps):
                 login=self.credentials[0],
                 password=self.credentials[1],
                 url=self.base_url,
+                context=self.context,
             )
             return dataset
 
@@ -380,7 +391,7 @@ class MLOpsDataSource(BaseMLOps):
         url = f"{self.base_url}/datasources/{self.group}/{self.datasource_name}"
 
         token = refresh_token(*self.credentials, self.base_url)
-        response = requests.delete(
+        response = self.session.delete(
             url=url,
             headers={
                 "Authorization": "Bearer " + token,
@@ -428,6 +439,7 @@ class MLOpsDataSource(BaseMLOps):
                     login=self.credentials[0],
                     password=self.credentials[1],
                     url=self.base_url,
+                    context=self.context,
                 )
         raise DatasetNotFoundError("Dataset hash not found!")
 
@@ -454,6 +466,10 @@ class MLOpsDataset(BaseMLOps):
         Name given previously to the datasource.
     group: str
         Name of the group where we will search the datasource
+    session: Optional[MLOpsSession], optional
+        Session shared with the object that created this dataset
+    context: Optional[MLOpsContext], optional
+        Context shared with the object that created this dataset. When informed, no new login is made
     """
 
     def __init__(
@@ -466,8 +482,12 @@ class MLOpsDataset(BaseMLOps):
             login: str,
             password: str,
             url: Optional[str] = None,
+            session: Optional[MLOpsSession] = None,
+            context: Optional[MLOpsContext] = None,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
         self.group = group
         self.dataset_hash = dataset_hash
         self.dataset_name = dataset_name
@@ -504,7 +524,7 @@ class MLOpsDataset(BaseMLOps):
 
         token = refresh_token(*self.credentials, self.base_url)
 
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={
                 "Authorization": "Bearer " + token,
@@ -546,7 +566,7 @@ class MLOpsDataset(BaseMLOps):
         url = f"{self.base_url}/datasets/{self.group}/{self.dataset_hash}"
 
         token = refresh_token(*self.credentials, self.base_url)
-        response = requests.delete(
+        response = self.session.delete(
             url=url,
             headers={
                 "Authorization": "Bearer " + token,
@@ -625,7 +645,7 @@ class MLOpsDataset(BaseMLOps):
             if datasource_name:
                 query["datasource"] = datasource_name
 
-        response = requests.get(
+        response = self.session.get(
             url=url,
             params=query,
             headers={
@@ -73,3 +73,15 @@ class CredentialError(Exception):
 class ExternalMonitoringError(Exception):
     """Raised when a external monitoring is not available"""
     pass
+
+
+class CircuitOpenError(ServerError):
+    """Raised when requests to an endpoint are short-circuited after repeated server failures"""
+
+    pass
+
+
+class CassetteError(Exception):
+    """Raised when a replayed request has no recorded response in the cassette"""
+
+    pass
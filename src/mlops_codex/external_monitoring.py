@@ -6,11 +6,10 @@ from datetime import datetime
 from time import sleep
 from typing import Optional, NamedTuple, Union
 
-import requests
-
 from mlops_codex.__model_states import MonitoringStatus
 from mlops_codex.__utils import parse_json_to_yaml, refresh_token, validate_kwargs
 from mlops_codex.base import BaseMLOps, BaseMLOpsClient
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     ExecutionError,
@@ -20,6 +19,8 @@ from mlops_codex.exceptions import (
     ServerError,
 )
 from mlops_codex.logger_config import get_logger
+from mlops_codex.session import MLOpsSession
+from mlops_codex.tracing import traced
 from mlops_codex.validations import validate_python_version
 
 logger = get_logger()
@@ -38,6 +39,8 @@ class MLOpsExternalMonitoring(BaseMLOps):
         login: Optional[str] = None,
         password: Optional[str] = None,
         url: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
     ):
         """
         Parameters
@@ -48,9 +51,13 @@ class MLOpsExternalMonitoring(BaseMLOps):
         login:
         password:
         url:
+        session:
+        context:
         """
 
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
         self.external_monitoring_url = f"{self.base_url}/external-monitoring"
         self.ex_monitoring_hash = ex_monitoring_hash
         self.group = group
@@ -94,7 +101,7 @@ class MLOpsExternalMonitoring(BaseMLOps):
             file_name = file_extensions[file.split(".")[-1]]
 
         upload_data = [(field, (file_name, open(file, "rb")))]
-        response = requests.patch(
+        response = self.session.patch(
             url,
             data=form,
             files=upload_data,
@@ -256,7 +263,7 @@ class MLOpsExternalMonitoring(BaseMLOps):
             )
             return
 
-        response = requests.patch(
+        response = self.session.patch(
             url=f"{self.external_monitoring_url}/{self.ex_monitoring_hash}/status",
             headers={
                 "Authorization": "Bearer "
@@ -291,6 +298,7 @@ class MLOpsExternalMonitoring(BaseMLOps):
 
         raise ExternalMonitoringError("Unknown error. Please contact administrator.")
 
+    @traced("MLOpsExternalMonitoring.wait_ready")
     def wait_ready(self):
         """
         Check the status of the external monitoring.
@@ -300,7 +308,7 @@ class MLOpsExternalMonitoring(BaseMLOps):
         str
             The status of the external monitoring.
         """
-        response = requests.get(
+        response = self.session.get(
             url=f"{self.external_monitoring_url}/{self.ex_monitoring_hash}/status",
             headers={
                 "Authorization": "Bearer "
@@ -314,7 +322,7 @@ class MLOpsExternalMonitoring(BaseMLOps):
         print("Waiting the monitoring host...", end="")
 
         while status not in [MonitoringStatus.Validated, MonitoringStatus.Invalidated]:
-            response = requests.get(
+            response = self.session.get(
                 url=f"{self.external_monitoring_url}/{self.ex_monitoring_hash}/status",
                 headers={
                     "Authorization": "Bearer "
@@ -451,7 +459,7 @@ class MLOpsExternalMonitoringClient(BaseMLOpsClient):
         Returns:
             External monitoring Hash
         """
-        response = requests.post(
+        response = self.session.post(
             url,
             json=configuration,
             headers={
@@ -593,6 +601,7 @@ class MLOpsExternalMonitoringClient(BaseMLOpsClient):
             login=self.credentials[0],
             password=self.credentials[1],
             url=self.base_url,
+            context=self.context,
             group=kwargs["group"],
             ex_monitoring_hash=external_monitoring_hash,
             status=MonitoringStatus.Unvalidated,
@@ -606,7 +615,7 @@ class MLOpsExternalMonitoringClient(BaseMLOpsClient):
 
     def __list_external_monitoring(self):
         url = f"{self.base_url}/external-monitoring"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={
                 "Authorization": "Bearer "
@@ -673,6 +682,7 @@ class MLOpsExternalMonitoringClient(BaseMLOpsClient):
                     login=self.credentials[0],
                     password=self.credentials[1],
                     url=self.base_url,
+                    context=self.context,
                     group=group,
                     ex_monitoring_hash=external_monitoring_hash,
                 )
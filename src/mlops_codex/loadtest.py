@@ -0,0 +1,553 @@
+"""
+Load test module
+
+Drives :py:meth:`mlops_codex.model.MLOpsModel.predict` of a deployed sync model at a target rate (open loop) or
+with a fixed number of concurrent callers (closed loop), and reports latency percentiles, error rates and the
+throughput over time. Checks a deploy against a latency SLO before it is released:
+
+.. code-block:: bash
+
+    python -m mlops_codex.loadtest --model-id M9c3af... --group groupname --rps 50 --duration 60 --slo-p99 250
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from mlops_codex.exceptions import InputError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.model import MLOpsModel
+
+logger = get_logger()
+
+PERCENTILES = (("p50", 50.0), ("p90", 90.0), ("p99", 99.0), ("p99.9", 99.9))
+
+
+class SLO(NamedTuple):
+    """
+    Latency and error objectives checked by :py:meth:`LoadTestReport.violations`.
+
+    Parameters
+    ----------
+    p50: Optional[float], optional
+        Maximum median latency, in seconds
+    p90: Optional[float], optional
+        Maximum 90th percentile latency, in seconds
+    p99: Optional[float], optional
+        Maximum 99th percentile latency, in seconds
+    p999: Optional[float], optional
+        Maximum 99.9th percentile latency, in seconds
+    max_error_rate: Optional[float], optional
+        Maximum share of failed requests, from 0 to 1
+    """
+
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+    p999: Optional[float] = None
+    max_error_rate: Optional[float] = None
+
+
+class LoadTestWindow(NamedTuple):
+    """
+    Requests completed in one interval of a load test.
+
+    Parameters
+    ----------
+    start: float
+        Seconds between the end of the warmup and the start of the window
+    requests: int
+        Requests completed in the window
+    errors: int
+        Failed requests completed in the window
+    throughput: float
+        Requests completed per second
+    p50: Optional[float]
+        Median latency of the window, in seconds
+    p99: Optional[float]
+        99th percentile latency of the window, in seconds
+    """
+
+    start: float
+    requests: int
+    errors: int
+    throughput: float
+    p50: Optional[float]
+    p99: Optional[float]
+
+
+class LoadTestReport(NamedTuple):
+    """
+    Result of :py:func:`run_load_test`. Requests sent during the warmup are left out.
+
+    Parameters
+    ----------
+    mode: str
+        'open' when the requests were sent at a target rate, 'closed' when they were sent by concurrent callers
+    target_rps: Optional[float]
+        Target rate of the open loop
+    concurrency: int
+        Concurrent callers of the closed loop, or maximum requests in flight of the open loop
+    duration: float
+        Seconds measured, without the warmup
+    requests: int
+        Requests completed
+    errors: int
+        Requests that failed
+    dropped: int
+        Requests of the open loop that were never sent, because every caller was busy until the end of the test
+    throughput: float
+        Requests completed per second
+    latency: Dict[str, float]
+        Latency percentiles ('p50', 'p90', 'p99', 'p99.9'), 'mean' and 'max', in seconds. In the open loop, the
+        latency is counted from the time each request was scheduled, so the time it waited for a free caller is
+        included
+    error_kinds: Dict[str, int]
+        Failed requests by HTTP status ('HTTP 503') or by exception name
+    timeline: List[LoadTestWindow]
+        Throughput and latency over time
+    """
+
+    mode: str
+    target_rps: Optional[float]
+    concurrency: int
+    duration: float
+    requests: int
+    errors: int
+    dropped: int
+    throughput: float
+    latency: Dict[str, float]
+    error_kinds: Dict[str, int]
+    timeline: List[LoadTestWindow]
+
+    @property
+    def error_rate(self) -> float:
+        """Share of the completed requests that failed"""
+        return self.errors / self.requests if self.requests else 0.0
+
+    def violations(self, slo: SLO) -> List[str]:
+        """
+        Check the report against an SLO.
+
+        Parameters
+        ----------
+        slo: SLO
+            The objectives to check
+
+        Returns
+        -------
+        List[str]
+            A message for each objective that was missed. Empty when the SLO is met
+        """
+        messages = []
+        if not self.requests:
+            return ["No request completed"]
+        for (name, _), limit in zip(PERCENTILES, (slo.p50, slo.p90, slo.p99, slo.p999)):
+            if limit is not None and self.latency[name] > limit:
+                messages.append(
+                    f"{name} latency {self.latency[name] * 1000:.1f} ms is above {limit * 1000:.1f} ms"
+                )
+        if slo.max_error_rate is not None and self.error_rate > slo.max_error_rate:
+            messages.append(f"Error rate {self.error_rate:.2%} is above {slo.max_error_rate:.2%}")
+        return messages
+
+    def to_dict(self) -> dict:
+        """The report as a JSON serializable dict"""
+        return {
+            **self._asdict(),
+            "error_rate": self.error_rate,
+            "timeline": [window._asdict() for window in self.timeline],
+        }
+
+    def summary(self) -> str:
+        """Human readable summary of the report"""
+        target = f"{self.target_rps:g} rps" if self.mode == "open" else f"{self.concurrency} callers"
+        lines = [
+            f"{self.mode.title()} loop, {target}, {self.duration:.1f}s",
+            f"Requests: {self.requests}  Errors: {self.errors} ({self.error_rate:.2%})  "
+            f"Dropped: {self.dropped}  Throughput: {self.throughput:.1f} rps",
+        ]
+        if self.requests:
+            lines.append(
+                "Latency: "
+                + "  ".join(f"{name} {self.latency[name] * 1000:.1f} ms" for name, _ in PERCENTILES)
+                + f"  max {self.latency['max'] * 1000:.1f} ms"
+            )
+        for kind, count in sorted(self.error_kinds.items(), key=lambda item: -item[1]):
+            lines.append(f"  {kind}: {count}")
+        return "\n".join(lines)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Nearest rank percentile.
+
+    Parameters
+    ----------
+    values: Sequence[float]
+        Sorted values
+    q: float
+        Percentile, from 0 to 100
+
+    Returns
+    -------
+    Optional[float]
+        The percentile, or None when there are no values
+    """
+    if not values:
+        return None
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def load_payloads(path: str) -> List[Any]:
+    """
+    Read the payloads of a load test from a sample file.
+
+    Parameters
+    ----------
+    path: str
+        A '.json' file with one payload, a '.jsonl' file with one payload per line or a '.csv' file with one payload
+        per row, sent as a dict of column names to values
+
+    Raises
+    ------
+    InputError
+        Unsupported or empty file
+
+    Returns
+    -------
+    List[Any]
+        The payloads, sent in turns
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            payloads = [json.load(f)]
+    elif extension in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+    elif extension == ".csv":
+        import pandas as pd
+
+        # Converted through JSON, so numpy values become plain Python values
+        payloads = json.loads(pd.read_csv(path).to_json(orient="records"))
+    else:
+        raise InputError(f"Unsupported payload file '{path}'. Use a .json, .jsonl or .csv file")
+
+    if not payloads:
+        raise InputError(f"No payload in '{path}'")
+    return payloads
+
+
+def schema_payloads(model: MLOpsModel) -> List[Any]:
+    """
+    Use the input sample uploaded with the model, its `Schema`, as the payload of a load test.
+
+    Parameters
+    ----------
+    model: MLOpsModel
+        The model under test
+
+    Raises
+    ------
+    InputError
+        The model has no schema
+
+    Returns
+    -------
+    List[Any]
+        The schema of the model, as a single payload
+    """
+    schema = model.model_data.get("Schema")
+    if not schema:
+        raise InputError(f'Model "{model.model_id}" has no schema, inform the payloads')
+    return [json.loads(schema) if isinstance(schema, str) else schema]
+
+
+class _Sample(NamedTuple):
+    scheduled: float
+    finished: float
+    latency: float
+    error: Optional[str]
+
+
+class _Recorder:
+    """Sends the predictions and keeps their latency and outcome"""
+
+    def __init__(self, model: MLOpsModel, payloads: Sequence[Any], group_token: Optional[str]) -> None:
+        self.model = model
+        self.payloads = payloads
+        self.group_token = group_token
+        self.samples: List[_Sample] = []
+        self.__count = 0
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def response_hook(self, response, *args, **kwargs):
+        # Sync predictions return the body of failed responses as well, so the status is taken from here
+        self.__local.status = response.status_code
+        return response
+
+    def next_payload(self) -> Any:
+        with self.__lock:
+            index = self.__count
+            self.__count += 1
+        return self.payloads[index % len(self.payloads)]
+
+    def call(self, payload: Any, scheduled: float) -> None:
+        self.__local.status = None
+        error = None
+        try:
+            self.model.predict(data=payload, group_token=self.group_token)
+            if self.__local.status is not None and self.__local.status >= 400:
+                error = f"HTTP {self.__local.status}"
+        except Exception as exc:
+            error = type(exc).__name__
+        finished = time.perf_counter()
+        self.samples.append(_Sample(scheduled, finished, finished - scheduled, error))
+
+
+def _open_loop(recorder: _Recorder, rps: float, workers: int, end: float) -> int:
+    interval = 1.0 / rps
+    start = time.perf_counter()
+    dropped = []
+
+    def send(payload: Any, scheduled: float) -> None:
+        # Requests still waiting for a caller when the test ends are not sent
+        if time.perf_counter() > end:
+            dropped.append(scheduled)
+        else:
+            recorder.call(payload, scheduled)
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="mlops-loadtest") as executor:
+        for sent in range(math.ceil((end - start) * rps)):
+            scheduled = start + sent * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, recorder.next_payload(), scheduled)
+    return len(dropped)
+
+
+def _closed_loop(recorder: _Recorder, concurrency: int, end: float) -> int:
+    def caller() -> None:
+        while time.perf_counter() < end:
+            recorder.call(recorder.next_payload(), time.perf_counter())
+
+    threads = [
+        threading.Thread(target=caller, name=f"mlops-loadtest-{i}", daemon=True) for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return 0
+
+
+def _timeline(samples: List[_Sample], start: float, duration: float, interval: float) -> List[LoadTestWindow]:
+    windows = []
+    finished = [sample.finished for sample in samples]
+    for index in range(max(math.ceil(duration / interval), 1)):
+        window_start = start + index * interval
+        low = bisect.bisect_left(finished, window_start)
+        high = bisect.bisect_left(finished, window_start + interval)
+        window = samples[low:high]
+        latencies = sorted(sample.latency for sample in window)
+        windows.append(
+            LoadTestWindow(
+                start=round(index * interval, 3),
+                requests=len(window),
+                errors=sum(sample.error is not None for sample in window),
+                throughput=len(window) / interval,
+                p50=percentile(latencies, 50),
+                p99=percentile(latencies, 99),
+            )
+        )
+    return windows
+
+
+def run_load_test(
+    model: MLOpsModel,
+    *,
+    payloads: Optional[Sequence[Any]] = None,
+    rps: Optional[float] = None,
+    concurrency: Optional[int] = None,
+    duration: float = 60.0,
+    warmup: float = 0.0,
+    max_workers: int = 64,
+    interval: float = 1.0,
+    group_token: Optional[str] = None,
+) -> LoadTestReport:
+    """
+    Send predictions to a sync model for `duration` seconds and measure them.
+
+    Inform `rps` for an open loop, where requests are sent at a constant rate whether or not the previous ones were
+    answered, like the traffic of independent users. Inform `concurrency` for a closed loop, where each caller sends
+    its next request as soon as the previous one is answered. The requests of the model session are observed with a
+    response hook while the test runs, so the session should not be shared with other work meanwhile.
+
+    Parameters
+    ----------
+    model: MLOpsModel
+        A deployed sync model
+    payloads: Optional[Sequence[Any]], optional
+        Inputs of the predictions, sent in turns. Defaults to the schema of the model
+    rps: Optional[float], optional
+        Requests per second of the open loop
+    concurrency: Optional[int], optional
+        Concurrent callers of the closed loop
+    duration: float
+        Seconds measured. Defaults to 60
+    warmup: float
+        Seconds of load sent before the measurement starts, left out of the report. Defaults to 0
+    max_workers: int
+        Maximum requests in flight of the open loop. Defaults to 64
+    interval: float
+        Seconds of each window of the timeline. Defaults to 1
+    group_token: Optional[str], optional
+        Token of the group of the model. Defaults to the token of `model`
+
+    Raises
+    ------
+    InputError
+        Invalid load profile or no payload
+
+    Returns
+    -------
+    LoadTestReport
+        The measured latency, errors and throughput
+    """
+    if (rps is None) == (concurrency is None):
+        raise InputError("Inform either rps (open loop) or concurrency (closed loop)")
+    if (rps is not None and rps <= 0) or (concurrency is not None and concurrency < 1):
+        raise InputError("rps and concurrency must be positive")
+    if duration <= 0 or warmup < 0 or interval <= 0 or max_workers < 1:
+        raise InputError("duration, interval and max_workers must be positive and warmup can't be negative")
+
+    payloads = list(payloads) if payloads is not None else schema_payloads(model)
+    if not payloads:
+        raise InputError("No payload to send")
+
+    recorder = _Recorder(model, payloads, group_token)
+    session = model.session
+    session.hooks["response"].append(recorder.response_hook)
+    mode = "open" if rps is not None else "closed"
+    logger.info(
+        f"Load testing model {model.model_id} for {warmup + duration:g}s, "
+        + (f"{rps:g} rps" if mode == "open" else f"{concurrency} callers")
+    )
+    try:
+        started = time.perf_counter()
+        measured_from = started + warmup
+        end = measured_from + duration
+        if mode == "open":
+            dropped = _open_loop(recorder, rps, max_workers, end)
+        else:
+            dropped = _closed_loop(recorder, concurrency, end)
+    finally:
+        session.hooks["response"].remove(recorder.response_hook)
+
+    samples = sorted(
+        (sample for sample in recorder.samples if sample.scheduled >= measured_from), key=lambda s: s.finished
+    )
+    latencies = sorted(sample.latency for sample in samples)
+    errors = Counter(sample.error for sample in samples if sample.error is not None)
+    measured = max(samples[-1].finished - measured_from, duration) if samples else duration
+
+    latency = {name: percentile(latencies, q) for name, q in PERCENTILES}
+    if latencies:
+        latency.update(mean=sum(latencies) / len(latencies), max=latencies[-1])
+
+    return LoadTestReport(
+        mode=mode,
+        target_rps=rps,
+        concurrency=max_workers if mode == "open" else concurrency,
+        duration=measured,
+        requests=len(samples),
+        errors=sum(errors.values()),
+        dropped=dropped,
+        throughput=len(samples) / measured,
+        latency=latency,
+        error_kinds=dict(errors),
+        timeline=_timeline(samples, measured_from, measured, interval),
+    )
+
+
+def _milliseconds(value: Optional[float]) -> Optional[float]:
+    return value / 1000 if value is not None else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line of the load test. Credentials are read from the MLOPS_USER, MLOPS_PASSWORD and MLOPS_URL environment
+    variables, and the group token from MLOPS_GROUP_TOKEN when `--group-token` isn't informed.
+
+    Returns
+    -------
+    int
+        0 when the SLO is met, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m mlops_codex.loadtest",
+        description="Load test a deployed sync model and check it against a latency SLO",
+    )
+    parser.add_argument("--model-id", required=True, help="Hash of the model")
+    parser.add_argument("--group", required=True, help="Group of the model")
+    parser.add_argument("--group-token", help="Token of the group")
+    parser.add_argument("--url", help="URL of the MLOps server")
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument("--rps", type=float, help="Requests per second (open loop)")
+    load.add_argument("--concurrency", type=int, help="Concurrent callers (closed loop)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Seconds of load before the measurement")
+    parser.add_argument("--max-workers", type=int, default=64, help="Maximum requests in flight of the open loop")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds of each window of the timeline")
+    parser.add_argument("--payloads", help="A .json, .jsonl or .csv file. Defaults to the schema of the model")
+    parser.add_argument("--slo-p50", type=float, help="Maximum median latency, in milliseconds")
+    parser.add_argument("--slo-p90", type=float, help="Maximum p90 latency, in milliseconds")
+    parser.add_argument("--slo-p99", type=float, help="Maximum p99 latency, in milliseconds")
+    parser.add_argument("--slo-p999", type=float, help="Maximum p99.9 latency, in milliseconds")
+    parser.add_argument("--max-error-rate", type=float, help="Maximum share of failed requests, from 0 to 1")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    model = MLOpsModel(model_id=args.model_id, group=args.group, group_token=args.group_token, url=args.url)
+    report = run_load_test(
+        model,
+        payloads=load_payloads(args.payloads) if args.payloads else None,
+        rps=args.rps,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        max_workers=args.max_workers,
+        interval=args.interval,
+    )
+    slo = SLO(
+        p50=_milliseconds(args.slo_p50),
+        p90=_milliseconds(args.slo_p90),
+        p99=_milliseconds(args.slo_p99),
+        p999=_milliseconds(args.slo_p999),
+        max_error_rate=args.max_error_rate,
+    )
+    violations = report.violations(slo)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({**report.to_dict(), "violations": violations}, f, indent=2)
+    print(report.summary())
+    for message in violations:
+        print(f"SLO violated: {message}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,59 @@
 import sys
+import threading
 
-from loguru import logger
+_configured = False
+_handler_ids = []
+_lock = threading.Lock()
+
+# Handler loguru adds to stderr when it is imported
+_LOGURU_DEFAULT_HANDLER = 0
 
 
 def configure_logger(log_levels=["INFO", "ERROR"]):
-    logger.remove()
+    """
+    Replace the sinks of the SDK with one stdout sink per level.
+
+    Only the sinks added by the SDK and the default stderr sink of loguru are removed, the sinks added by the
+    application are kept.
+    """
+    global _configured
+    from loguru import logger
+
+    with _lock:
+        for handler_id in _handler_ids + ([] if _configured else [_LOGURU_DEFAULT_HANDLER]):
+            try:
+                logger.remove(handler_id)
+            except ValueError:
+                # Already removed by the application
+                pass
+        _handler_ids.clear()
+
+        for level in log_levels:
+            _handler_ids.append(
+                logger.add(
+                    sys.stdout,
+                    level=level,
+                    format=f"{{time:MMMM D, YYYY}} | {level}: {{function}} {{message}}",
+                )
+            )
+        _configured = True
+
+
+class _LazyLogger:
+    """
+    Stand-in for the loguru logger, so loguru is only imported and configured on the first log call.
+    """
+
+    def __getattr__(self, name):
+        from loguru import logger
 
-    for level in log_levels:
-        logger.add(
-            sys.stdout,
-            level=level,
-            format=f"{{time:MMMM D, YYYY}} | {level}: {{function}} {{message}}",
-        )
+        if not _configured:
+            configure_logger()
+        return getattr(logger, name)
 
 
-configure_logger()
+_logger = _LazyLogger()
 
 
 def get_logger():
-    return logger
+    return _logger
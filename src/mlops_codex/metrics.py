@@ -0,0 +1,312 @@
+"""
+Metrics module
+
+Every request sent by an :py:class:`mlops_codex.session.MLOpsSession` is recorded in a
+metrics registry, labeled by the `Neomaril-Method` header of the call (e.g.
+'MLOpsModel.predict') and by its endpoint (e.g. 'POST /model/sync/run'). The registry
+can be exported in the Prometheus text format or served by a small HTTP endpoint.
+"""
+
+import functools
+import os
+import threading
+import weakref
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricInfo(NamedTuple):
+    type: str
+    help: str
+
+
+METRICS = {
+    "mlops_codex_requests_total": MetricInfo(
+        "counter", "Requests sent to MLOps, by final status code"
+    ),
+    "mlops_codex_request_errors_total": MetricInfo(
+        "counter", "Requests that failed, by status code or exception"
+    ),
+    "mlops_codex_request_duration_seconds": MetricInfo(
+        "histogram", "Duration of the requests, retries and backoff included"
+    ),
+    "mlops_codex_request_retries_total": MetricInfo(
+        "counter", "Retried attempts"
+    ),
+    "mlops_codex_request_bytes_sent_total": MetricInfo(
+        "counter", "Request body bytes sent, after compression"
+    ),
+    "mlops_codex_response_bytes_received_total": MetricInfo(
+        "counter", "Response body bytes received"
+    ),
+    "mlops_codex_cache_hits_total": MetricInfo(
+        "counter", "Requests answered by the response cache"
+    ),
+    "mlops_codex_coalesced_requests_total": MetricInfo(
+        "counter", "Requests that shared the response of an identical request in flight"
+    ),
+    "mlops_codex_prediction_cache_hits_total": MetricInfo(
+        "counter", "Sync predictions answered by the prediction cache"
+    ),
+    "mlops_codex_prediction_cache_misses_total": MetricInfo(
+        "counter", "Sync predictions looked up in the prediction cache and sent to the model"
+    ),
+}
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    content = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels)
+    return "{" + content + "}" if content else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    Thread safe registry of counters and histograms.
+
+    Metrics are per process: a pickled registry is restored empty, and a forked child process starts from zero.
+
+    Parameters
+    ----------
+    buckets: Iterable[float]
+        Upper bounds of the histogram buckets, in seconds
+    """
+
+    def __init__(self, *, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        self.__counters: Dict[str, Dict[Labels, float]] = {}
+        self.__histograms: Dict[str, Dict[Labels, list]] = {}
+        _registries.add(self)
+
+    def __reduce__(self):
+        if self is _registry:
+            return get_registry, ()
+        return functools.partial(MetricsRegistry, buckets=self.buckets), ()
+
+    def _reset_after_fork(self) -> None:
+        self.__lock = threading.Lock()
+        self.__counters = {}
+        self.__histograms = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0) -> None:
+        """
+        Increment a counter.
+
+        Parameters
+        ----------
+        name: str
+            Metric name
+        labels: Dict[str, str]
+            Metric labels
+        value: float
+            Amount to add. Defaults to 1
+        """
+        key = _labels(labels)
+        with self.__lock:
+            series = self.__counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float) -> None:
+        """
+        Record a value in a histogram.
+
+        Parameters
+        ----------
+        name: str
+            Metric name
+        labels: Dict[str, str]
+            Metric labels
+        value: float
+            Observed value, in seconds
+        """
+        key = _labels(labels)
+        with self.__lock:
+            series = self.__histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                # Bucket counts, sum and count
+                histogram = series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Get the current values.
+
+        Returns
+        -------
+        dict
+            Counters as {name: {labels: value}} and histograms as {name: {labels: {'buckets', 'sum', 'count'}}},
+            where labels is a tuple of (label, value) pairs
+        """
+        with self.__lock:
+            counters = {name: dict(series) for name, series in self.__counters.items()}
+            histograms = {
+                name: {
+                    key: {
+                        "buckets": dict(zip(self.buckets, h[0])),
+                        "sum": h[1],
+                        "count": h[2],
+                    }
+                    for key, h in series.items()
+                }
+                for name, series in self.__histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def clear(self) -> None:
+        """Reset every metric"""
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def render(self) -> str:
+        """
+        Export the metrics in the Prometheus text format.
+
+        Returns
+        -------
+        str
+            The metrics in the Prometheus exposition format (version 0.0.4)
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        for name, series in sorted(snapshot["counters"].items()):
+            info = METRICS.get(name, MetricInfo("counter", name))
+            lines.append(f"# HELP {name} {info.help}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+        for name, series in sorted(snapshot["histograms"].items()):
+            info = METRICS.get(name, MetricInfo("histogram", name))
+            lines.append(f"# HELP {name} {info.help}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(series.items()):
+                for bound, count in histogram["buckets"].items():
+                    labels = key + (("le", _format_value(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(labels)} {count}")
+                labels = key + (("le", "+Inf"),)
+                lines.append(f"{name}_bucket{_format_labels(labels)} {histogram['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram['sum'])}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+_registries: "weakref.WeakSet[MetricsRegistry]" = weakref.WeakSet()
+_registry = MetricsRegistry()
+
+
+def _reset_registries_after_fork() -> None:
+    for registry in list(_registries):
+        registry._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_registries_after_fork)
+
+
+def get_registry() -> MetricsRegistry:
+    """
+    Get the process wide registry, used by every session unless another one is configured.
+
+    Returns
+    -------
+    MetricsRegistry
+        The default registry
+    """
+    return _registry
+
+
+def export_prometheus(registry: Optional[MetricsRegistry] = None) -> str:
+    """
+    Export the metrics in the Prometheus text format.
+
+    Parameters
+    ----------
+    registry: Optional[MetricsRegistry], optional
+        Registry to export. Defaults to the process wide registry
+
+    Returns
+    -------
+    str
+        The metrics in the Prometheus exposition format
+
+    Example
+    -------
+    >>> from mlops_codex.metrics import export_prometheus
+    >>> print(export_prometheus())
+    """
+    return (registry if registry is not None else _registry).render()
+
+
+def start_http_server(
+    port: int, *, addr: str = "0.0.0.0", registry: Optional[MetricsRegistry] = None
+):
+    """
+    Serve the metrics at http://addr:port/metrics in a background thread.
+
+    Parameters
+    ----------
+    port: int
+        Port to listen on
+    addr: str
+        Address to bind. Defaults to '0.0.0.0'
+    registry: Optional[MetricsRegistry], optional
+        Registry to serve. Defaults to the process wide registry
+
+    Returns
+    -------
+    http.server.ThreadingHTTPServer
+        The running server. Call `shutdown()` to stop it
+
+    Example
+    -------
+    >>> from mlops_codex.metrics import start_http_server
+    >>> server = start_http_server(9100)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = registry if registry is not None else _registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
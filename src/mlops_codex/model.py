@@ -1,11 +1,30 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import asyncio
 import json
 import os
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from http import HTTPStatus
-from time import sleep
-from typing import Optional, Union
+from time import monotonic, sleep
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import requests
 
@@ -17,7 +36,8 @@ from mlops_codex.__utils import (
     try_login,
 )
 from mlops_codex.base import BaseMLOps, BaseMLOpsClient, MLOpsExecution
-from mlops_codex.datasources import MLOpsDataset
+from mlops_codex.codec import encode_input
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     ExecutionError,
@@ -27,12 +47,90 @@ from mlops_codex.exceptions import (
     ServerError,
 )
 from mlops_codex.logger_config import get_logger
-from mlops_codex.preprocessing import MLOpsPreprocessing
+from mlops_codex.session import MLOpsSession, metric_labels
+from mlops_codex.tracing import traced
 from mlops_codex.validations import validate_group_existence, validate_python_version
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from mlops_codex.aio import AsyncMLOpsSession
+    from mlops_codex.batching import MicroBatcher
+    from mlops_codex.datasources import MLOpsDataset
+    from mlops_codex.prediction_cache import PredictionCache
+    from mlops_codex.preprocessing import MLOpsPreprocessing
+
 logger = get_logger()
 
 
+_models: "weakref.WeakSet[MLOpsModel]" = weakref.WeakSet()
+
+
+def _reset_models_after_fork() -> None:
+    for model in list(_models):
+        model._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_models_after_fork)
+
+
+class PredictionFailure(NamedTuple):
+    """
+    Result of an input of :py:meth:`MLOpsModel.predict_many` that failed.
+
+    Parameters
+    ----------
+    index: Any
+        Position of the input, or the index label of its row for :py:meth:`MLOpsModel.predict_dataframe`
+    error: Exception
+        Why the prediction failed: the exception raised while sending it, or an `AuthenticationError`, `ServerError`
+        or `ModelError` built from the response
+    status_code: Optional[int], optional
+        Status code of the response, when the server answered
+    """
+
+    index: Any
+    error: Exception
+    status_code: Optional[int] = None
+
+
+class _ModelSnapshot(NamedTuple):
+    data: Optional[dict]
+    status: Optional[ModelState]
+    checked_at: Optional[float]
+    described_at: Optional[float] = None
+
+
+# Fields of a model description used by the model properties, a search result that has them is used as one
+_DESCRIPTION_FIELDS = ("Name", "Operation", "Status")
+
+
+class _AsyncState(NamedTuple):
+    session: "AsyncMLOpsSession"
+    semaphore: asyncio.Semaphore
+    closer: AsyncIterator[None]
+
+
+async def _close_with_loop(session: "AsyncMLOpsSession") -> AsyncIterator[None]:
+    """
+    Close the session when its event loop finalizes its async generators: when the loop shuts down, as
+    `asyncio.run` does before closing it, or when the generator is garbage collected with the model.
+    """
+    try:
+        yield
+    finally:
+        await session.aclose()
+
+
+def _prediction_error(status_code: int, text: str) -> Exception:
+    if status_code == 401:
+        return AuthenticationError("Group token not authorized")
+    if status_code >= 500:
+        return ServerError(f"Server answered {status_code}: {text}")
+    return ModelError(f"Prediction failed with status {status_code}: {text}")
+
+
 class MLOpsModel(BaseMLOps):
     """
     Class to manage Models deployed inside MLOps
@@ -51,6 +149,21 @@ class MLOpsModel(BaseMLOps):
         Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
     url: str
         URL to MLOps Server. Default value is https://neomaril.datarisk.net/, use it to test your deployment first before changing to production. You can also use the env variable MLOPS_URL to set these
+    session: Optional[MLOpsSession], optional
+        Session shared with the client that created this model
+    context: Optional[MLOpsContext], optional
+        Context shared with the client that created this model. When informed, no new login is made
+    status_ttl: float
+        Seconds a known status is reused before it is checked again. Defaults to 10
+    max_async_requests: int
+        Maximum requests of :py:meth:`apredict` and :py:meth:`apredict_stream` in flight at once, per event loop.
+        Defaults to 100
+    prediction_cache: Optional[PredictionCache], optional
+        Cache of the sync predictions, see :py:attr:`prediction_cache`. Defaults to no cache
+
+    A single instance can be shared by many threads, e.g. the request threads of a web service. `predict` reads the
+    model state without locking; describing the model, refreshing its status and saving the group token are done by
+    one thread at a time, while the others keep using the last known state.
 
     Raises
     ------
@@ -92,15 +205,37 @@ class MLOpsModel(BaseMLOps):
         password: Optional[str] = None,
         group_token: Optional[str] = None,
         url: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
+        status_ttl: float = 10.0,
+        max_async_requests: int = 100,
+        prediction_cache: Optional["PredictionCache"] = None,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
 
         self.model_id = model_id
         self.group = group
-        self.__token = group_token if group_token else os.getenv("MLOPS_GROUP_TOKEN")
+        self.__token = (
+            group_token if group_token else self.context.getenv("MLOPS_GROUP_TOKEN")
+        )
 
+        self.status_ttl = status_ttl
+        self.max_async_requests = max_async_requests
+        self.prediction_cache = prediction_cache
+        # The description and status are replaced together, so readers never need the lock
+        self.__snapshot = _ModelSnapshot(data=None, status=None, checked_at=None)
+        self.__lock = threading.RLock()
+        self.__async_states: Dict[asyncio.AbstractEventLoop, _AsyncState] = {}
+        # Only guards the swap of `__async_states`, so the event loops never wait for a describe of another thread
+        self.__async_lock = threading.Lock()
+        self.__version: Optional[Tuple[dict, str]] = None
+        _models.add(self)
+
+    def __describe(self) -> dict:
         url = f"{self.base_url}/model/describe/{self.group}/{self.model_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -118,25 +253,189 @@ class MLOpsModel(BaseMLOps):
 
         if response.status_code == 404:
             logger.error(f"Something went wrong...\n{formatted_msg}")
-            raise ModelError(f'Model "{model_id}" not found.')
+            raise ModelError(f'Model "{self.model_id}" not found.')
 
         if response.status_code >= 500:
             logger.error("Server is not available. Please, try it later.")
             raise ServerError("Server is not available!")
 
-        self.model_data = response.json()["Description"]
-        self.name = self.model_data["Name"]
-        self.status = ModelState[self.model_data["Status"]]
-        self.operation = self.model_data["Operation"].lower()
-        self.docs = (
+        return response.json()["Description"]
+
+    def __load(self) -> _ModelSnapshot:
+        # Threads that need the description at the same time wait for a single describe
+        with self.__lock:
+            if self.__snapshot.data is None:
+                self.__replace_data(self.__describe())
+            return self.__snapshot
+
+    def __reload(self, snapshot: _ModelSnapshot) -> _ModelSnapshot:
+        # Describe again unless another thread did it since `snapshot` was read
+        changed = False
+        with self.__lock:
+            if self.__snapshot is snapshot:
+                changed = self.__replace_data(self.__describe())
+            snapshot = self.__snapshot
+        if changed:
+            self.__model_changed()
+        return snapshot
+
+    def _seed_description(self, data: dict) -> None:
+        """Use a description fetched by another request, e.g. a search, unless the model already has one"""
+        with self.__lock:
+            if self.__snapshot.data is None:
+                self.__replace_data(data)
+
+    def __replace_data(self, value: dict) -> bool:
+        # Tells whether the model changed. The caller drops the cached predictions once it released the lock, so the
+        # other threads never wait for the cache
+        with self.__lock:
+            previous = self.__snapshot
+            now = monotonic()
+            self.__snapshot = _ModelSnapshot(
+                data=value, status=ModelState[value["Status"]], checked_at=now, described_at=now
+            )
+        return previous.data is not None and (previous.data != value or previous.status != self.__snapshot.status)
+
+    def __replace_status(self, value: ModelState) -> bool:
+        with self.__lock:
+            previous = self.__snapshot.status
+            self.__snapshot = self.__snapshot._replace(status=value, checked_at=monotonic())
+        return previous is not None and previous != value
+
+    @property
+    def model_data(self) -> dict:
+        """
+        Model description. It is fetched from the server on the first access.
+        """
+        data = self.__snapshot.data
+        if data is None:
+            data = self.__load().data
+        return data
+
+    @model_data.setter
+    def model_data(self, value: dict) -> None:
+        if self.__replace_data(value):
+            self.__model_changed()
+
+    @property
+    def prediction_cache(self) -> Optional["PredictionCache"]:
+        """
+        Cache of the sync predictions, a :py:class:`mlops_codex.prediction_cache.PredictionCache`. Assign one to
+        answer repeated inputs of :py:meth:`predict` without a request, only for models whose scoring function is a
+        pure function of its input. None disables it.
+
+        While the cache is used, the model is described again when its description is older than the `version_ttl` of
+        the cache, and its cached predictions are dropped when its description or its status change. A redeploy is
+        only noticed then: call `prediction_cache.invalidate(model.model_id)` after redeploying to drop them at once.
+        """
+        return self.__prediction_cache
+
+    @prediction_cache.setter
+    def prediction_cache(self, value: Optional["PredictionCache"]) -> None:
+        self.__prediction_cache = value
+
+    def __model_changed(self) -> None:
+        # A redeploy or a restart may change the answers of the model
+        cache = self.__prediction_cache
+        if cache is not None:
+            cache.invalidate(self.model_id)
+
+    def __model_version(self, max_age: float) -> str:
+        from mlops_codex.prediction_cache import model_version
+
+        # The server doesn't notify redeploys, a description older than `max_age` is fetched again to notice them. A
+        # single thread describes the model, the others keep the known version meanwhile
+        snapshot = self.__snapshot
+        if snapshot.data is None:
+            snapshot = self.__load()
+        elif monotonic() - snapshot.described_at > max_age and self.__lock.acquire(blocking=False):
+            changed = False
+            try:
+                if self.__snapshot.described_at == snapshot.described_at:
+                    changed = self.__replace_data(self.__describe())
+                snapshot = self.__snapshot
+            finally:
+                self.__lock.release()
+            if changed:
+                self.__model_changed()
+
+        data = snapshot.data
+        version = self.__version
+        if version is None or version[0] is not data:
+            version = self.__version = (data, model_version(data))
+        return version[1]
+
+    @property
+    def name(self) -> str:
+        return self.model_data["Name"]
+
+    @property
+    def operation(self) -> str:
+        return self.model_data["Operation"].lower()
+
+    @property
+    def docs(self) -> str:
+        return (
             f"{self.base_url}/model/{self.operation}/docs/{self.group}/{self.model_id}"
         )
-        self.__model_ready = self.status == ModelState.Deployed
+
+    @property
+    def status(self) -> ModelState:
+        """
+        Model status. It is checked again when it is older than `status_ttl` seconds.
+        """
+        snapshot = self.__snapshot
+        if snapshot.checked_at is None:
+            snapshot = self.__load()
+        elif monotonic() - snapshot.checked_at > self.status_ttl and self.__lock.acquire(
+            blocking=False
+        ):
+            # A single thread checks the status, the others keep the known one meanwhile
+            changed = False
+            try:
+                if self.__snapshot is snapshot:
+                    changed = self.__replace_status(self.__get_status())
+                snapshot = self.__snapshot
+            finally:
+                self.__lock.release()
+            if changed:
+                self.__model_changed()
+        return snapshot.status
+
+    @status.setter
+    def status(self, value: ModelState) -> None:
+        if self.__replace_status(value):
+            self.__model_changed()
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        del state["_MLOpsModel__lock"]
+        del state["_MLOpsModel__async_lock"]
+        state["_MLOpsModel__async_states"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        self.__lock = threading.RLock()
+        self.__async_lock = threading.Lock()
+        _models.add(self)
+        # Monotonic clocks of different processes can't be compared, the status and the description are checked again
+        # on the next access
+        if self.__snapshot.checked_at is not None:
+            self.__snapshot = self.__snapshot._replace(checked_at=float("-inf"), described_at=float("-inf"))
+
+    def _reset_after_fork(self) -> None:
+        self.__lock = threading.RLock()
+        self.__async_lock = threading.Lock()
+        # The connections of the async sessions belong to the parent process
+        self.__async_states = {}
 
     def __repr__(self) -> str:
-        status = self.__get_status()
+        snapshot = self.__snapshot
+        if snapshot.data is None:
+            return f"""MLOpsModel(group="{self.group}", model_id="{self.model_id}")"""
         return f"""MLOpsModel(name="{self.name}", group="{self.group}", 
-                                status="{status}",
+                                status="{snapshot.status}",
                                 model_id="{self.model_id}",
                                 operation="{self.operation.title()}",
                                 )"""
@@ -162,7 +461,7 @@ class MLOpsModel(BaseMLOps):
 
         """
         url = f"{self.base_url}/model/status/{self.group}/{self.model_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -187,6 +486,7 @@ class MLOpsModel(BaseMLOps):
         logger.error(f"Something went wrong...\n{formatted_msg}")
         raise ModelError("Could not get the status of the model")
 
+    @traced("MLOpsModel.wait_ready")
     def wait_ready(self):
         """
         Waits the model to be with status 'Deployed'
@@ -237,7 +537,7 @@ class MLOpsModel(BaseMLOps):
                 return "NOK"
         elif self.operation == "sync":
             url = f"{self.base_url}/model/sync/health/{self.group}/{self.model_id}"
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers={
                     "Authorization": "Bearer " + self.__token,
@@ -291,7 +591,7 @@ class MLOpsModel(BaseMLOps):
         """
 
         url = f"{self.base_url}/model/restart/{self.group}/{self.model_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -403,7 +703,7 @@ class MLOpsModel(BaseMLOps):
         """
 
         token = refresh_token(*self.credentials, self.base_url)
-        req = requests.delete(
+        req = self.session.delete(
             f"{self.base_url}/model/delete/{self.group}/{self.model_id}",
             headers={
                 "Authorization": "Bearer " + token,
@@ -428,14 +728,12 @@ class MLOpsModel(BaseMLOps):
             logger.error(f"Something went wrong...\n{formatted_msg}")
             raise ModelError("Failed to delete model.")
 
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/model/describe/{self.group}/{self.model_id}",
             headers={"Authorization": "Bearer " + token},
         )
 
         self.model_data = response.json()["Description"]
-        self.status = ModelState[self.model_data["Status"]]
-        self.__model_ready = False
 
         return req.json()
 
@@ -464,7 +762,7 @@ class MLOpsModel(BaseMLOps):
         """
 
         token = refresh_token(*self.credentials, self.base_url)
-        req = requests.post(
+        req = self.session.post(
             f"{self.base_url}/model/disable/{self.group}/{self.model_id}",
             headers={
                 "Authorization": "Bearer " + token,
@@ -489,14 +787,12 @@ class MLOpsModel(BaseMLOps):
             logger.error(f"Something went wrong...\n{formatted_msg}")
             raise ModelError("Failed to delete model.")
 
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}/model/describe/{self.group}/{self.model_id}",
             headers={"Authorization": "Bearer " + token},
         )
 
         self.model_data = response.json()["Description"]
-        self.status = ModelState[self.model_data["Status"]]
-        self.__model_ready = False
 
         print(f"The model {self.model_id} was disabled")
 
@@ -519,28 +815,32 @@ class MLOpsModel(BaseMLOps):
         self.__token = group_token
         logger.info(f"Token for group {self.group} added.")
 
+    @traced("MLOpsModel.predict")
     def predict(
         self,
         *,
-        data: Optional[Union[dict, str, MLOpsExecution]] = None,
-        dataset: Union[str, MLOpsDataset] = None,
-        preprocessing: Optional[MLOpsPreprocessing] = None,
+        data: Optional[Union[dict, str, bytes, MLOpsExecution]] = None,
+        dataset: Union[str, "MLOpsDataset"] = None,
+        preprocessing: Optional["MLOpsPreprocessing"] = None,
         group_token: Optional[str] = None,
         wait_complete: Optional[bool] = False,
+        use_cache: bool = True,
     ) -> Union[dict, MLOpsExecution]:
         """
         Runs a prediction from the current model.
 
         Parameters
         ----------
-        data: Union[dict, str]
+        data: Union[dict, str, bytes]
             The same data that is used in the source file.
-            If Sync is a dict, the keys that are needed inside this dict are the ones in the `schema` attribute.
+            If Sync is a dict, the keys that are needed inside this dict are the ones in the `schema` attribute. It can also be its JSON, already encoded as `bytes`, that is sent without being decoded.
             If Async is a string with the file path with the same filename used in the source file.
         group_token: Optional[str], optional
             Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
         wait_complete: Optional[bool], optional
             Boolean that informs if a model training is completed (True) or not (False). Default value is False
+        use_cache: bool
+            Look up and save the prediction in :py:attr:`prediction_cache`, when the model has one. Defaults to True
 
         Raises
         ------
@@ -558,131 +858,579 @@ class MLOpsModel(BaseMLOps):
             raise InputError(
                 "Invalid data input. Run training requires a data or dataset"
             )
-        if self.__model_ready:
-            if (group_token is not None) | (self.__token is not None):
-                url = f"{self.base_url}/model/{self.operation}/run/{self.group}/{self.model_id}"
-                if self.__token and not group_token:
-                    group_token = self.__token
-                if group_token and not self.__token:
-                    self.__token = group_token
-                if self.operation == "sync":
-                    model_input = {"Input": data}
-
-                    if preprocessing:
-                        model_input["ScriptHash"] = preprocessing.preprocessing_id
-
-                    req = requests.post(
-                        url,
-                        data=json.dumps(model_input),
-                        headers={
-                            "Authorization": "Bearer " + group_token,
-                            "Neomaril-Origin": "Codex",
-                            "Neomaril-Method": self.predict.__qualname__,
-                        },
-                    )
-
-                    return req.json()
-
-                elif self.operation == "async":
-                    if preprocessing:
-                        if preprocessing.operation == "async":
-                            preprocessing.set_token(group_token)
-                            pre_run = preprocessing.run(data=data)
-                            pre_run.wait_ready()
-                            if pre_run.status != "Succeeded":
-                                logger.error(
-                                    "Preprocessing failed, we wont send any data to it"
-                                )
-                                logger.info("Returning Preprocessing run instead.")
-                                return pre_run
-                            data = "./result_preprocessing"
-                            pre_run.download_result(
-                                path="./", filename="result_preprocessing"
-                            )
-                        else:
-                            raise PreprocessingError(
-                                "Can only use async preprocessing with async models"
-                            )
-
-                    form_data = {}
-                    if data:
-                        files = [("input", (data.split("/")[-1], open(data, "rb")))]
-                    elif dataset:
-                        dataset_hash = (
-                            dataset
-                            if isinstance(dataset, str)
-                            else dataset.dataset_hash
+        group_token = self._prediction_token(group_token)
+
+        operation = self.operation
+        url = f"{self.base_url}/model/{operation}/run/{self.group}/{self.model_id}"
+        if operation == "sync":
+            cache = self.__prediction_cache if use_cache else None
+            if cache is not None:
+                from mlops_codex.prediction_cache import prediction_key
+
+                key = prediction_key(
+                    data,
+                    preprocessing_id=preprocessing.preprocessing_id if preprocessing else None,
+                    group_token=group_token,
+                )
+                version = self.__model_version(cache.version_ttl)
+                content = cache.get(self.model_id, key, version=version)
+                self.__count_cache_lookup(url, hit=content is not None)
+                if content is not None:
+                    return self.session.codec.loads(content)
+
+            response = self.__run_sync(
+                data,
+                group_token=group_token,
+                preprocessing=preprocessing,
+                method=self.predict.__qualname__,
+            )
+            if cache is not None and response.status_code == 200:
+                cache.set(self.model_id, key, response.content, version=version)
+            return self.session.codec.loads(response.content)
+
+        elif operation == "async":
+            if preprocessing:
+                if preprocessing.operation == "async":
+                    preprocessing.set_token(group_token)
+                    pre_run = preprocessing.run(data=data)
+                    pre_run.wait_ready()
+                    if pre_run.status != "Succeeded":
+                        logger.error(
+                            "Preprocessing failed, we wont send any data to it"
                         )
-                        form_data["dataset_hash"] = dataset_hash
-
-                    req = requests.post(
-                        url,
-                        files=files,
-                        data=form_data,
-                        headers={
-                            "Authorization": "Bearer " + group_token,
-                            "Neomaril-Origin": "Codex",
-                            "Neomaril-Method": self.predict.__qualname__,
-                        },
+                        logger.info("Returning Preprocessing run instead.")
+                        return pre_run
+                    data = "./result_preprocessing"
+                    pre_run.download_result(
+                        path="./", filename="result_preprocessing"
+                    )
+                else:
+                    raise PreprocessingError(
+                        "Can only use async preprocessing with async models"
                     )
 
-                    if req.status_code == 202:
-                        message = req.json()
-                        logger.info(message["Message"])
-                        exec_id = message["ExecutionId"]
-                        run = MLOpsExecution(
-                            parent_id=self.model_id,
-                            exec_type="AsyncModel",
-                            group=self.group,
-                            exec_id=exec_id,
-                            login=self.credentials[0],
-                            password=self.credentials[1],
-                            url=self.base_url,
-                            group_token=group_token,
-                        )
-                        response = run.get_status()
-                        status = response["Status"]
-                        if wait_complete:
-                            run.wait_ready()
-                        if status == "Failed":
-                            logger.error(response["Message"])
-                            raise ExecutionError("Training execution failed")
-                        return run
-                    elif req.status_code >= 500:
-                        logger.error("Server is not available. Please, try it later.")
-                        raise ServerError("Server is not available!")
-                    else:
-                        logger.error(req.text)
-                        raise Exception("Unexpected error")
+            form_data = {}
+            if data:
+                files = [("input", (data.split("/")[-1], open(data, "rb")))]
+            elif dataset:
+                dataset_hash = (
+                    dataset
+                    if isinstance(dataset, str)
+                    else dataset.dataset_hash
+                )
+                form_data["dataset_hash"] = dataset_hash
 
-            else:
-                raise InputError("Group token not informed")
-        else:
-            url = f"{self.base_url}/model/describe/{self.group}/{self.model_id}"
-            response = requests.get(
+            req = self.session.post(
                 url,
+                files=files,
+                data=form_data,
                 headers={
-                    "Authorization": "Bearer "
-                    + refresh_token(*self.credentials, self.base_url),
+                    "Authorization": "Bearer " + group_token,
                     "Neomaril-Origin": "Codex",
                     "Neomaril-Method": self.predict.__qualname__,
                 },
-            ).json()["Description"]
-            if response["Status"] == "Deployed":
-                self.model_data = response
-                self.status = ModelState[response["Status"]]
-                self.__model_ready = True
-                return self.predict(
-                    data=data,
-                    dataset=dataset,
-                    preprocessing=preprocessing,
+            )
+
+            if req.status_code == 202:
+                message = req.json()
+                logger.info(message["Message"])
+                exec_id = message["ExecutionId"]
+                run = MLOpsExecution(
+                    parent_id=self.model_id,
+                    exec_type="AsyncModel",
+                    group=self.group,
+                    exec_id=exec_id,
+                    login=self.credentials[0],
+                    password=self.credentials[1],
+                    url=self.base_url,
+                    context=self.context,
                     group_token=group_token,
-                    wait_complete=wait_complete,
                 )
-
+                response = run.get_status()
+                status = response["Status"]
+                if wait_complete:
+                    run.wait_ready()
+                if status == "Failed":
+                    logger.error(response["Message"])
+                    raise ExecutionError("Training execution failed")
+                return run
+            elif req.status_code >= 500:
+                logger.error("Server is not available. Please, try it later.")
+                raise ServerError("Server is not available!")
             else:
+                logger.error(req.text)
+                raise Exception("Unexpected error")
+
+    def __count_cache_lookup(self, url: str, *, hit: bool) -> None:
+        metrics = self.session.metrics
+        if metrics is not None:
+            metrics.inc(
+                "mlops_codex_prediction_cache_hits_total" if hit else "mlops_codex_prediction_cache_misses_total",
+                metric_labels("POST", url, {"Neomaril-Method": self.predict.__qualname__}),
+            )
+
+    def _prediction_token(self, group_token: Optional[str]) -> str:
+        snapshot = self.__snapshot
+        if snapshot.status != ModelState.Deployed:
+            # The model may have been deployed since its status was last checked
+            snapshot = self.__reload(snapshot)
+            if snapshot.status != ModelState.Deployed:
                 raise ModelError("Model is not available to predictions")
 
+        token = self.__token
+        if not group_token:
+            group_token = token
+        if not group_token:
+            raise InputError("Group token not informed")
+        if not token:
+            with self.__lock:
+                if not self.__token:
+                    self.__token = group_token
+        return group_token
+
+    def __run_sync(
+        self,
+        data,
+        *,
+        group_token: str,
+        preprocessing: Optional["MLOpsPreprocessing"],
+        method: str,
+    ) -> requests.Response:
+        fields = {"ScriptHash": preprocessing.preprocessing_id} if preprocessing else {}
+
+        return self.session.post(
+            f"{self.base_url}/model/sync/run/{self.group}/{self.model_id}",
+            data=encode_input(self.session.codec, data, **fields),
+            headers={
+                "Authorization": "Bearer " + group_token,
+                "Neomaril-Origin": "Codex",
+                "Neomaril-Method": method,
+            },
+        )
+
+    def _score_row(
+        self,
+        index: int,
+        data,
+        group_token: str,
+        preprocessing: Optional["MLOpsPreprocessing"],
+        method: Optional[str] = None,
+    ) -> Union[dict, "PredictionFailure"]:
+        try:
+            response = self.__run_sync(
+                data,
+                group_token=group_token,
+                preprocessing=preprocessing,
+                method=method or self.predict_many.__qualname__,
+            )
+            if response.status_code < 400:
+                return self.session.codec.loads(response.content)
+        except Exception as exc:
+            return PredictionFailure(index=index, error=exc)
+
+        return PredictionFailure(
+            index=index,
+            error=_prediction_error(response.status_code, response.text),
+            status_code=response.status_code,
+        )
+
+    def predict_many(
+        self,
+        data: Iterable[Any],
+        *,
+        group_token: Optional[str] = None,
+        preprocessing: Optional["MLOpsPreprocessing"] = None,
+        max_workers: Optional[int] = None,
+    ) -> List[Union[dict, "PredictionFailure"]]:
+        """
+        Runs a prediction of a sync model for each input, sending them concurrently.
+
+        The requests are sent by a pool of `max_workers` threads that share the connection pool of the model session,
+        so `max_workers` shouldn't be larger than the `pool_maxsize` of its :py:class:`mlops_codex.session.SessionConfig`.
+        Inputs are read from `data` as the requests are sent, so a generator of millions of records is never held
+        in memory at once. A failed input doesn't stop the others: its result is a :py:class:`PredictionFailure`.
+
+        Parameters
+        ----------
+        data: Iterable[Any]
+            The inputs, each one like the `data` of :py:meth:`predict`
+        group_token: Optional[str], optional
+            Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
+        preprocessing: Optional[MLOpsPreprocessing], optional
+            Sync preprocessing script run before the model
+        max_workers: Optional[int], optional
+            Maximum requests in flight. Defaults to the `pool_maxsize` of the session
+
+        Raises
+        ------
+        ModelError
+            Model is not available or is not a sync model
+        InputError
+            Group token not informed
+
+        Returns
+        -------
+        List[Union[dict, PredictionFailure]]
+            The result of each input, in the order of `data`
+
+        Example
+        -------
+        >>> results = model.predict_many([{'id': 1, 'age': 30}, {'id': 2, 'age': 41}], max_workers=8)
+        >>> failed = [r for r in results if isinstance(r, PredictionFailure)]
+        """
+        group_token = self._prediction_token(group_token)
+        if self.operation != "sync":
+            raise ModelError("predict_many is only available for sync models")
+        if max_workers is None:
+            max_workers = self.session.config.pool_maxsize
+        if max_workers < 1:
+            raise InputError("max_workers must be positive")
+
+        results = []
+        pending = deque()
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="mlops-predict") as executor:
+            for index, item in enumerate(data):
+                # A few inputs per worker are queued ahead, the others are read when there is room
+                if len(pending) >= max_workers * 2:
+                    results.append(pending.popleft().result())
+                pending.append(
+                    executor.submit(self._score_row, index, item, group_token, preprocessing)
+                )
+            while pending:
+                results.append(pending.popleft().result())
+
+        failures = sum(isinstance(result, PredictionFailure) for result in results)
+        if failures:
+            logger.warning(f"{failures} of {len(results)} predictions failed")
+        return results
+
+    def predict_dataframe(
+        self,
+        data: "pd.DataFrame",
+        *,
+        group_token: Optional[str] = None,
+        preprocessing: Optional["MLOpsPreprocessing"] = None,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 10000,
+    ) -> "pd.Series":
+        """
+        Runs a prediction of a sync model for each row of a DataFrame, sending them concurrently with :py:meth:`predict_many`.
+
+        Each row is sent as a dict of column names to values. Rows are converted to records a chunk at a time, with
+        the JSON encoder of pandas, so missing values are sent as null and dates in ISO format.
+
+        Parameters
+        ----------
+        data: pd.DataFrame
+            The inputs, one per row
+        group_token: Optional[str], optional
+            Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
+        preprocessing: Optional[MLOpsPreprocessing], optional
+            Sync preprocessing script run before the model
+        max_workers: Optional[int], optional
+            Maximum requests in flight. Defaults to the `pool_maxsize` of the session
+        chunk_size: int
+            Rows converted to records at a time. Defaults to 10000
+
+        Raises
+        ------
+        ModelError
+            Model is not available or is not a sync model
+        InputError
+            Group token not informed
+
+        Returns
+        -------
+        pd.Series
+            The result of each row, with the index of `data`. Failed rows hold a :py:class:`PredictionFailure` whose
+            `index` is the label of the row
+
+        Example
+        -------
+        >>> predictions = model.predict_dataframe(df, max_workers=16)
+        >>> df[predictions.map(lambda r: isinstance(r, PredictionFailure))]
+        """
+        import pandas as pd
+
+        if chunk_size < 1:
+            raise InputError("chunk_size must be positive")
+
+        def records():
+            for start in range(0, len(data), chunk_size):
+                chunk = data.iloc[start : start + chunk_size]
+                yield from self.session.codec.loads(
+                    chunk.to_json(orient="records", date_format="iso")
+                )
+
+        results = self.predict_many(
+            records(),
+            group_token=group_token,
+            preprocessing=preprocessing,
+            max_workers=max_workers,
+        )
+        labels = data.index
+        results = [
+            result._replace(index=labels[result.index])
+            if isinstance(result, PredictionFailure)
+            else result
+            for result in results
+        ]
+        return pd.Series(results, index=labels, dtype=object, name="prediction")
+
+    def batcher(
+        self,
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        max_concurrent_batches: int = 4,
+        group_token: Optional[str] = None,
+        preprocessing: Optional["MLOpsPreprocessing"] = None,
+        split: Optional[Callable[[Any, int], Sequence[Any]]] = None,
+    ) -> "MicroBatcher":
+        """
+        Create a :py:class:`mlops_codex.batching.MicroBatcher` that sends the single record predictions of concurrent
+        callers to this model in batches. The scoring function of the model must accept a list of records.
+
+        Parameters
+        ----------
+        max_batch_size: int
+            Maximum records per request. Defaults to 64
+        max_wait: float
+            Maximum seconds a record waits for others before its batch is sent. Defaults to 0.005
+        max_concurrent_batches: int
+            Batches in flight at once, while the next one is being filled. Defaults to 4
+        group_token: Optional[str], optional
+            Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
+        preprocessing: Optional[MLOpsPreprocessing], optional
+            Sync preprocessing script that receives the list of records before the model
+        split: Optional[Callable[[Any, int], Sequence[Any]]], optional
+            Function that splits the response of a batch into the result of each record. Defaults to
+            :py:func:`mlops_codex.batching.split_response`
+
+        Returns
+        -------
+        MicroBatcher
+            The batcher. Close it when done
+
+        Example
+        -------
+        >>> with model.batcher(max_batch_size=100, max_wait=0.01) as batcher:
+        ...     result = batcher.predict(data=record)
+        """
+        from mlops_codex.batching import MicroBatcher
+
+        return MicroBatcher(
+            self,
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+            max_concurrent_batches=max_concurrent_batches,
+            group_token=group_token,
+            preprocessing=preprocessing,
+            split=split,
+        )
+
+    async def __get_async_state(self) -> _AsyncState:
+        from mlops_codex.aio import AsyncMLOpsSession
+
+        loop = asyncio.get_running_loop()
+        state = self.__async_states.get(loop)
+        if state is None:
+            # The async session and the semaphore are bound to the loop where they are used, each loop gets its own.
+            # Only this loop adds its state and there is no await until it is saved, so no other one can be added
+            session = AsyncMLOpsSession(self.session.config)
+            state = _AsyncState(
+                session=session,
+                semaphore=asyncio.Semaphore(self.max_async_requests),
+                closer=_close_with_loop(session),
+            )
+            with self.__async_lock:
+                states = {
+                    running: state for running, state in self.__async_states.items() if not running.is_closed()
+                }
+                states[loop] = state
+                self.__async_states = states
+            # Registers the closer with the loop, the generator stops at its yield without suspending
+            await state.closer.__anext__()
+        return state
+
+    async def __aprediction_token(self, group_token: Optional[str]) -> str:
+        if self.__snapshot.status == ModelState.Deployed and (group_token or self.__token):
+            group_token = self._prediction_token(group_token)
+        else:
+            # Describing the model blocks, so it is done out of the event loop
+            loop = asyncio.get_running_loop()
+            group_token = await loop.run_in_executor(None, self._prediction_token, group_token)
+        if self.operation != "sync":
+            raise ModelError("Async predictions are only available for sync models")
+        return group_token
+
+    async def __arun_sync(self, data, group_token: str, timeout: Optional[float]):
+        state = await self.__get_async_state()
+        async with state.semaphore:
+            return await asyncio.wait_for(
+                state.session.post(
+                    f"{self.base_url}/model/sync/run/{self.group}/{self.model_id}",
+                    content=encode_input(state.session.codec, data),
+                    headers={
+                        "Authorization": "Bearer " + group_token,
+                        "Content-Type": "application/json",
+                        "Neomaril-Origin": "Codex",
+                        "Neomaril-Method": self.predict.__qualname__,
+                    },
+                ),
+                timeout,
+            )
+
+    async def apredict(
+        self,
+        *,
+        data,
+        group_token: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> dict:
+        """
+        Runs a prediction of a sync model without blocking the event loop.
+
+        Requests are sent by an async session with the configuration of the model session. httpx must be installed
+        (`pip install datarisk-mlops-codex[async]`).
+        At most `max_async_requests` predictions of this model are in flight at once in each event loop, the others
+        wait for a free slot. Call :py:meth:`aclose` when the event loop is done with the model.
+
+        Parameters
+        ----------
+        data: Any
+            The input of the scoring function
+        group_token: Optional[str], optional
+            Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
+        timeout: Optional[float], optional
+            Seconds to wait for the prediction, retries included. Defaults to no limit besides the session timeouts
+
+        Raises
+        ------
+        ModelError
+            Model is not available, is not a sync model or the prediction failed
+        InputError
+            Group token not informed
+        AuthenticationError
+            Invalid group token
+        ServerError
+            The server failed
+        TimeoutError
+            The prediction took longer than `timeout`
+
+        Returns
+        -------
+        dict
+            The return of the scoring function in the source file
+
+        Example
+        -------
+        >>> result = await model.apredict(data={'id': 1, 'age': 30}, timeout=2)
+        """
+        group_token = await self.__aprediction_token(group_token)
+        response = await self.__arun_sync(data, group_token, timeout)
+        if response.status_code >= 400:
+            raise _prediction_error(response.status_code, response.text)
+        return (await self.__get_async_state()).session.codec.loads(response.content)
+
+    async def apredict_stream(
+        self,
+        data: Union[Iterable[Any], AsyncIterable[Any]],
+        *,
+        group_token: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Union[dict, PredictionFailure]]:
+        """
+        Runs a prediction of a sync model for each input, yielding the results in the order of the inputs.
+
+        At most `concurrency` inputs are read ahead of the result being yielded, so a slow producer or a slow consumer
+        holds back the other one instead of piling up requests or results in memory. A failed input doesn't stop
+        the others: its result is a :py:class:`PredictionFailure`.
+
+        Parameters
+        ----------
+        data: Union[Iterable[Any], AsyncIterable[Any]]
+            The inputs, each one like the `data` of :py:meth:`apredict`
+        group_token: Optional[str], optional
+            Token for executing the model (show when creating a group). It can be informed when getting the model or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
+        concurrency: Optional[int], optional
+            Inputs in flight at once. Defaults to `max_async_requests`, that limits the requests of every caller of the
+            model together
+        timeout: Optional[float], optional
+            Seconds to wait for each prediction, retries included. Defaults to no limit besides the session timeouts
+
+        Raises
+        ------
+        ModelError
+            Model is not available or is not a sync model
+        InputError
+            Group token not informed
+
+        Returns
+        -------
+        AsyncIterator[Union[dict, PredictionFailure]]
+            The result of each input
+
+        Example
+        -------
+        >>> async for result in model.apredict_stream(read_requests(), concurrency=500, timeout=2):
+        ...     await publish(result)
+        """
+        concurrency = concurrency or self.max_async_requests
+        if concurrency < 1:
+            raise InputError("concurrency must be positive")
+        group_token = await self.__aprediction_token(group_token)
+        codec = (await self.__get_async_state()).session.codec
+
+        async def score(index: int, item) -> Union[dict, PredictionFailure]:
+            try:
+                response = await self.__arun_sync(item, group_token, timeout)
+                if response.status_code < 400:
+                    return codec.loads(response.content)
+            except Exception as exc:
+                return PredictionFailure(index=index, error=exc)
+            return PredictionFailure(
+                index=index,
+                error=_prediction_error(response.status_code, response.text),
+                status_code=response.status_code,
+            )
+
+        async def inputs():
+            if hasattr(data, "__aiter__"):
+                async for item in data:
+                    yield item
+            else:
+                for item in data:
+                    yield item
+
+        pending = deque()
+        try:
+            index = 0
+            async for item in inputs():
+                if len(pending) >= concurrency:
+                    yield await pending.popleft()
+                pending.append(asyncio.ensure_future(score(index, item)))
+                index += 1
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # The consumer stopped early or was cancelled
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """
+        Close the connections of the async session used by :py:meth:`apredict` in the running event loop. The sessions
+        are also closed when their event loop shuts down its async generators, as `asyncio.run` does.
+        """
+        with self.__async_lock:
+            states = dict(self.__async_states)
+            state = states.pop(asyncio.get_running_loop(), None)
+            self.__async_states = states
+        if state is not None:
+            await state.closer.aclose()
+
     def generate_predict_code(self, *, language: str = "curl") -> str:
         """
         Generates predict code for the model to be used outside MLOps Codex
@@ -824,6 +1572,7 @@ class MLOpsModel(BaseMLOps):
                 login=self.credentials[0],
                 password=self.credentials[1],
                 url=self.base_url,
+                context=self.context,
                 group_token=self.__token,
             )
             run.get_status()
@@ -853,7 +1602,7 @@ class MLOpsModel(BaseMLOps):
         """
         url = f"{self.base_url}/monitoring/status/{group}/{model_id}/{period}"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -909,7 +1658,7 @@ class MLOpsModel(BaseMLOps):
         """
         url = f"{self.base_url}/monitoring/host/{group}/{model_id}/{period}"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -1012,7 +1761,7 @@ class MLOpsModel(BaseMLOps):
                 ("requirements", ("requirements.txt", open(requirements_file, "rb")))
             )
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=form_data,
             files=upload_data,
@@ -1196,7 +1945,7 @@ class MLOpsModelClient(BaseMLOpsClient):
         """
 
         url = f"{self.base_url}/model/status/{group}/{model_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -1208,6 +1957,37 @@ class MLOpsModelClient(BaseMLOpsClient):
 
         return response.json()
 
+    def __get_model_handle(
+        self,
+        model_id: str,
+        group: str,
+        group_token: Optional[str] = None,
+        status: Optional[str] = None,
+        description: Optional[dict] = None,
+    ) -> MLOpsModel:
+        """
+        Get the model instance shared by every client of this context that uses the same group token, creating it on
+        the first access. Callers with different tokens get different instances, so none replaces the token of another.
+        A `description` already fetched, e.g. by a search, is used by a new instance instead of describing the model.
+        """
+        model = self.context.get_handle(
+            ("model", group, model_id, group_token),
+            lambda: MLOpsModel(
+                model_id=model_id,
+                login=self.credentials[0],
+                password=self.credentials[1],
+                group=group,
+                url=self.base_url,
+                context=self.context,
+                group_token=group_token,
+            ),
+        )
+        if description is not None:
+            model._seed_description(description)
+        if status:
+            model.status = ModelState[status]
+        return model
+
     def get_model(
         self,
         *,
@@ -1263,14 +2043,7 @@ class MLOpsModelClient(BaseMLOpsClient):
                     sleep(10)
             else:
                 logger.info("Returning model, but model is not ready.")
-                MLOpsModel(
-                    model_id=model_id,
-                    login=self.credentials[0],
-                    password=self.credentials[1],
-                    group=group,
-                    url=self.base_url,
-                    group_token=group_token,
-                )
+                return self.__get_model_handle(model_id, group, group_token, status)
 
         if status in ["Disabled", "Ready"]:
             raise ModelError(
@@ -1283,14 +2056,7 @@ class MLOpsModelClient(BaseMLOpsClient):
             )
         elif status == "Deployed":
             logger.info(f"Model {model_id} its deployed. Fetching model.")
-            return MLOpsModel(
-                model_id=model_id,
-                login=self.credentials[0],
-                password=self.credentials[1],
-                group=group,
-                url=self.base_url,
-                group_token=group_token,
-            )
+            return self.__get_model_handle(model_id, group, group_token, status)
         else:
             raise ServerError("Unknown model status: ", status)
 
@@ -1324,7 +2090,8 @@ class MLOpsModelClient(BaseMLOpsClient):
         Returns
         -------
         list
-            A list with the models data, it can works like a filter depending on the arguments values
+            A list with the models found, it can works like a filter depending on the arguments values. Their
+            description comes with the search, so reading their name, operation or status sends no request
         Example
         -------
         >>> client.search_models(group='ex_group', only_deployed=True)
@@ -1345,7 +2112,7 @@ class MLOpsModelClient(BaseMLOpsClient):
         if only_deployed:
             query["state"] = "Deployed"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             params=query,
             headers={
@@ -1357,22 +2124,14 @@ class MLOpsModelClient(BaseMLOpsClient):
         )
 
         if response.status_code == 200:
-            results = response.json()["Results"]
-            parsed_results = []
-            for r in results:
-                if schema:= r.get("Schema"):
-                    r["Schema"] = json.loads(schema)
-                parsed_results.append(r)
-
+            # The results carry the description of each model, so reading their name or status sends no request
             return [
-                MLOpsModel(
-                    model_id=m["ModelHash"],
-                    login=self.credentials[0],
-                    password=self.credentials[1],
-                    group=m["Group"],
-                    url=self.base_url,
+                self.__get_model_handle(
+                    m["ModelHash"],
+                    m["Group"],
+                    description=m if all(field in m for field in _DESCRIPTION_FIELDS) else None,
                 )
-                for m in parsed_results
+                for m in response.json()["Results"]
             ]
 
         formatted_msg = parse_json_to_yaml(response.json())
@@ -1545,7 +2304,7 @@ class MLOpsModelClient(BaseMLOpsClient):
             "python_version": "Python" + python_version.replace(".", ""),
         }
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=form_data,
             files=upload_data,
@@ -1599,7 +2358,7 @@ class MLOpsModelClient(BaseMLOpsClient):
 
         url = f"{self.base_url}/model/{operation}/host/{group}/{model_id}"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -1627,6 +2386,7 @@ class MLOpsModelClient(BaseMLOpsClient):
         logger.error(f"Something went wrong...\n{formatted_msg}")
         raise InputError("Invalid parameters for model creation")
 
+    @traced("MLOpsModelClient.create_model")
     def create_model(
         self,
         *,
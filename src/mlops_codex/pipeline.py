@@ -3,13 +3,13 @@ import os
 from datetime import datetime
 from typing import Optional
 
-import yaml
-from dotenv import load_dotenv, find_dotenv
-
 from mlops_codex.base import BaseMLOps
+from mlops_codex.context import MLOpsContext, load_env
 from mlops_codex.exceptions import ModelError, PipelineError, TrainingError
 from mlops_codex.logger_config import get_logger
 from mlops_codex.model import MLOpsModel, MLOpsModelClient
+from mlops_codex.session import MLOpsSession
+from mlops_codex.tracing import traced
 from mlops_codex.training import MLOpsTrainingClient, MLOpsTrainingExecution
 
 logger = get_logger()
@@ -31,6 +31,10 @@ class MLOpsPipeline(BaseMLOps):
         URL to MLOps Server. Default value is https://neomaril.datarisk.net/, use it to test your deployment first before changing to production. You can also use the env variable MLOPS_URL to set this
     python_version: str
         Python version for the model environment. Available versions are 3.8, 3.9, 3.10. Defaults to '3.9'
+    session: Optional[MLOpsSession], optional
+        Session reused by every client the pipeline creates
+    context: Optional[MLOpsContext], optional
+        Authenticated context reused by every client the pipeline creates
 
     Example
     --------
@@ -53,8 +57,12 @@ class MLOpsPipeline(BaseMLOps):
         password: Optional[str] = None,
         url: Optional[str] = None,
         python_version: float = 3.9,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
 
         self.__start = False
         self.group = group
@@ -137,31 +145,29 @@ class MLOpsPipeline(BaseMLOps):
         >>> pipeline.register_monitoring_config(directory = "./samples/monitoring", preprocess = "preprocess.py", preprocess_function = "score", shap_function = "score", config = "configuration.json", packages = "requirements.txt")
         >>> pipeline.start()
         """
+        import yaml
+
         with open(path, "rb") as stream:
             try:
                 conf = yaml.safe_load(stream)
             except yaml.YAMLError as exc:
                 print(exc)
 
-        loaded = load_dotenv()
-        # Somethings when running as a script the default version might not work
-        if not loaded:
-            load_dotenv(find_dotenv(usecwd=True))
-        logger.info(f"Loading .env")
+        env = load_env()
 
-        login = os.getenv("MLOPS_USER")
+        login = env.get("MLOPS_USER")
         if not login:
             raise PipelineError(
                 "When using a config file the environment variable MLOPS_USER must be defined"
             )
 
-        password = os.getenv("MLOPS_PASSWORD")
+        password = env.get("MLOPS_PASSWORD")
         if not password:
             raise PipelineError(
                 "When using a config file the environment variable MLOPS_PASSWORD must be defined"
             )
 
-        url = os.getenv("MLOPS_URL", conf.get("url"))
+        url = env.get("MLOPS_URL", conf.get("url"))
 
         pipeline = MLOpsPipeline(
             group=conf["group"],
@@ -182,6 +188,7 @@ class MLOpsPipeline(BaseMLOps):
 
         return pipeline
 
+    @traced("MLOpsPipeline.run_training")
     def run_training(self) -> tuple[str, str]:
         """
         Run the training process
@@ -202,7 +209,10 @@ class MLOpsPipeline(BaseMLOps):
         """
         logger.info("Running training")
         client = MLOpsTrainingClient(
-            login=self.credentials[0], password=self.credentials[1], url=self.base_url
+            login=self.credentials[0],
+            password=self.credentials[1],
+            url=self.base_url,
+            context=self.context,
         )
         self.__try_create_group(client, self.group)
 
@@ -273,6 +283,7 @@ class MLOpsPipeline(BaseMLOps):
         else:
             raise TrainingError("Training failed: " + status["Message"])
 
+    @traced("MLOpsPipeline.run_deploy")
     def run_deploy(self, training_id: Optional[str] = None) -> str:
         """
         Run the deployment process
@@ -333,6 +344,7 @@ class MLOpsPipeline(BaseMLOps):
                 login=self.credentials[0],
                 password=self.credentials[1],
                 url=self.base_url,
+                context=self.context,
             )
             self.__try_create_group(client, self.group)
 
@@ -368,6 +380,7 @@ class MLOpsPipeline(BaseMLOps):
                 "Model deployement failed: " + self.__model.get_logs(routine="Host")[0]
             )
 
+    @traced("MLOpsPipeline.run_monitoring")
     def run_monitoring(
         self, *, training_exec_id: Optional[str] = None, model_id: Optional[str] = None
     ):
@@ -403,8 +416,9 @@ class MLOpsPipeline(BaseMLOps):
             login=self.credentials[0],
             password=self.credentials[1],
             group=self.group,
-            group_token=os.getenv("MLOPS_GROUP_TOKEN"),
+            group_token=self.context.getenv("MLOPS_GROUP_TOKEN"),
             url=self.base_url,
+            context=self.context,
         )
 
         model.register_monitoring(
@@ -417,6 +431,7 @@ class MLOpsPipeline(BaseMLOps):
             ),
         )
 
+    @traced("MLOpsPipeline.start")
     def start(self):
         """
         Start the pipeline for the model orchestration
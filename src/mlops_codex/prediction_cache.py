@@ -0,0 +1,512 @@
+"""
+Prediction cache module
+
+Memoizes the responses of sync models whose scoring function is a pure function of its input, so a repeated input
+(the same customer scored again minutes later) is answered without a request. Entries are kept per model and
+per version of its description. The server doesn't notify redeploys, so a model describes itself again every
+`version_ttl` seconds while it uses the cache: a response may be served for up to that long after a redeploy made
+by someone else, and entries always expire after `ttl` seconds.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from lazy_imports import try_import
+
+from mlops_codex.codec import to_json_native
+from mlops_codex.exceptions import InputError
+from mlops_codex.logger_config import get_logger
+
+logger = get_logger()
+
+# Seconds an invalidation waits for the cache file, that would otherwise keep serving the dropped responses
+INVALIDATION_TIMEOUT = 30.0
+
+_caches: "weakref.WeakSet[PredictionCache]" = weakref.WeakSet()
+
+
+def _reset_caches_after_fork() -> None:
+    for cache in list(_caches):
+        cache._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_caches_after_fork)
+
+
+class CacheStats(NamedTuple):
+    """
+    Counters of a :py:class:`PredictionCache`, to size it.
+
+    Parameters
+    ----------
+    hits: int
+        Predictions answered by the cache, from memory or from disk
+    misses: int
+        Predictions that had to be sent to the model
+    evictions: int
+        Entries dropped to keep the cache within `max_entries` and `max_bytes`
+    invalidations: int
+        Entries dropped by :py:meth:`PredictionCache.invalidate`, e.g. when a model saw its description or its status
+        change
+    entries: int
+        Entries in memory
+    size: int
+        Bytes of the responses in memory
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Hits over lookups, 0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    version: str
+    content: bytes
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson():
+    with try_import() as orjson_import:
+        import orjson
+    return orjson if orjson_import.is_successful() else None
+
+
+def canonical_input(data: Any) -> bytes:
+    """
+    Encode an input in a canonical form: JSON with sorted keys and no whitespace, so equal inputs get the same key
+    whatever the order of their keys. `bytes` are taken as the JSON of the input and kept as they are.
+
+    Parameters
+    ----------
+    data: Any
+        The input of a prediction
+
+    Returns
+    -------
+    bytes
+        The canonical form
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return bytes(data)
+    orjson = _orjson()
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data,
+                default=to_json_native,
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            # Integers beyond 64 bits, only encoded by the standard library
+            pass
+    return json.dumps(
+        data, default=to_json_native, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def prediction_key(
+    data: Any, *, preprocessing_id: Optional[str] = None, group_token: Optional[str] = None
+) -> str:
+    """
+    Build the cache key of a prediction: a hash of its canonical input, its preprocessing script and its group
+    token. The token is part of the key so a cached response is never served to a caller the server would refuse.
+
+    Parameters
+    ----------
+    data: Any
+        The input of the prediction
+    preprocessing_id: Optional[str], optional
+        Hash of the sync preprocessing script run before the model
+    group_token: Optional[str], optional
+        Token the prediction is sent with
+
+    Returns
+    -------
+    str
+        The key
+    """
+    digest = hashlib.sha256()
+    for part in (preprocessing_id or "", group_token or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(canonical_input(data))
+    return digest.hexdigest()
+
+
+def model_version(model_data: Dict[str, Any]) -> str:
+    """
+    Fingerprint the description of a model. It changes when the model is redeployed with other files or settings,
+    and not when only its status changes.
+
+    Parameters
+    ----------
+    model_data: Dict[str, Any]
+        The description of the model, :py:attr:`mlops_codex.model.MLOpsModel.model_data`
+
+    Returns
+    -------
+    str
+        The fingerprint
+    """
+    fields = {key: value for key, value in model_data.items() if key != "Status"}
+    return hashlib.sha256(canonical_input(fields)).hexdigest()[:16]
+
+
+class PredictionCache:
+    """
+    LRU cache with TTL of the responses of sync predictions, bounded by entries and bytes, optionally persisted to disk.
+
+    Assign it to a model to enable it, see :py:attr:`mlops_codex.model.MLOpsModel.prediction_cache`. Only use it for
+    models whose scoring function is a pure function of its input. Responses are kept as the bytes received, so each
+    hit is decoded into its own object. Only successful responses are cached.
+
+    Entries are tagged with the version of the model description they were computed with (see :py:func:`model_version`)
+    and are only returned for that version. A redeploy is only noticed when the model describes itself again: the model
+    does it when its description is older than `version_ttl` seconds, and drops its entries when it sees its description
+    or its status change. Until then, e.g. after a redeploy made by another client, the cache keeps answering with the
+    previous version, for at most `version_ttl` seconds. Lower it, or call :py:meth:`invalidate` after a redeploy, when
+    that is too long.
+
+    With `path`, responses are also written to a SQLite database, shared by the processes that use the same file and
+    reused after a restart of the service. Memory misses are looked up on disk. The file is read and written out of the
+    lock of the memory entries, so memory hits never wait for it, and a file busy for more than `disk_timeout` seconds
+    counts as a miss. Expired entries are deleted from the file when it is opened and entries of older model versions
+    when a new version is cached.
+
+    A cache is safe to share between threads and models. A pickled cache is restored empty, with the same settings
+    and file, and a forked child process keeps the entries in memory but opens the file again.
+
+    Parameters
+    ----------
+    max_entries: int
+        Maximum responses in memory. The least recently used ones are dropped first. Defaults to 10000
+    max_bytes: int
+        Maximum bytes of the responses in memory. Defaults to 64 MiB
+    ttl: Optional[float], optional
+        Seconds a response is reused. None keeps it until it is evicted or invalidated. Defaults to 300
+    version_ttl: float
+        Seconds a model trusts its description before describing itself again to check its version. Defaults to 60
+    path: Optional[str], optional
+        SQLite file where responses are persisted. Defaults to memory only
+    disk_timeout: float
+        Seconds to wait for the file while other threads or processes use it, before giving up the lookup or the write.
+        Defaults to 0.05
+
+    Raises
+    ------
+    InputError
+        Invalid bounds or TTLs
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.prediction_cache import PredictionCache
+
+        model.prediction_cache = PredictionCache(max_bytes=256 * 1024 * 1024, ttl=600, path='predictions.db')
+        model.predict(data={'customer_id': 42, 'income': 5000})  # sent to the model
+        model.predict(data={'income': 5000, 'customer_id': 42})  # answered by the cache
+        print(model.prediction_cache.stats().hit_rate)
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+        version_ttl: float = 60.0,
+        path: Optional[str] = None,
+        disk_timeout: float = 0.05,
+    ) -> None:
+        if max_entries < 1 or max_bytes < 1:
+            raise InputError("max_entries and max_bytes must be positive")
+        if (ttl is not None and ttl <= 0) or version_ttl <= 0:
+            raise InputError("ttl and version_ttl must be positive")
+        if disk_timeout < 0:
+            raise InputError("disk_timeout can't be negative")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.path = path
+        self.disk_timeout = disk_timeout
+
+        # The memory entries and the file have their own locks, so a slow file never holds back memory hits
+        self.__lock = threading.Lock()
+        self.__disk_lock = threading.Lock()
+        self.__entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self.__size = 0
+        self.__counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        # Incremented by each invalidation, so an entry read from the file meanwhile isn't brought back to memory
+        self.__generation = 0
+        # Invalidations still being deleted from the file, by model (None for every model). The file isn't looked up
+        # for these models meanwhile
+        self.__pending: Dict[Optional[str], int] = {}
+        self.__db: Optional[sqlite3.Connection] = None
+        self.__disk_versions: Dict[str, str] = {}
+        _caches.add(self)
+
+    def __reduce__(self):
+        return (
+            functools.partial(
+                PredictionCache,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                ttl=self.ttl,
+                version_ttl=self.version_ttl,
+                path=self.path,
+                disk_timeout=self.disk_timeout,
+            ),
+            (),
+        )
+
+    def __repr__(self) -> str:
+        stats = self.stats()
+        return (
+            f"PredictionCache(entries={stats.entries}, size={stats.size}, hits={stats.hits}, "
+            f"misses={stats.misses}, path={self.path!r})"
+        )
+
+    def _reset_after_fork(self) -> None:
+        self.__lock = threading.Lock()
+        self.__disk_lock = threading.Lock()
+        # The SQLite connection belongs to the parent process
+        self.__db = None
+
+    def __connect(self) -> sqlite3.Connection:
+        if self.__db is None:
+            db = sqlite3.connect(
+                self.path, timeout=self.disk_timeout, check_same_thread=False, isolation_level=None
+            )
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS predictions ("
+                    "model TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL, expires_at REAL NOT NULL, "
+                    "content BLOB NOT NULL, PRIMARY KEY (model, key))"
+                )
+                db.execute("DELETE FROM predictions WHERE expires_at < ?", (time.time(),))
+            except sqlite3.Error:
+                db.close()
+                raise
+            self.__db = db
+        return self.__db
+
+    def __disk(self, operation: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        # The cache is an optimization: a busy or broken file is treated as a miss
+        timeout = self.disk_timeout if timeout is None else timeout
+        if not self.__disk_lock.acquire(timeout=timeout):
+            logger.debug(f"Prediction cache file {self.path} is busy")
+            return None
+        try:
+            return operation(self.__connect(), *args)
+        except sqlite3.Error as exc:
+            if "locked" in str(exc) and timeout == self.disk_timeout:
+                # Another process is writing the file
+                logger.debug(f"Prediction cache file {self.path} is busy: {exc}")
+            else:
+                logger.warning(f"Prediction cache file {self.path} failed: {exc}")
+            return None
+        finally:
+            self.__disk_lock.release()
+
+    def __disk_get(self, db: sqlite3.Connection, model_id: str, key: str, version: str) -> Optional[_Entry]:
+        row = db.execute(
+            "SELECT version, expires_at, content FROM predictions WHERE model = ? AND key = ?",
+            (model_id, key),
+        ).fetchone()
+        if row is None or row[0] != version:
+            # Entries of other versions are deleted when their model caches its new version
+            return None
+        if row[1] <= time.time():
+            db.execute("DELETE FROM predictions WHERE model = ? AND key = ?", (model_id, key))
+            return None
+        return _Entry(time.monotonic() + (row[1] - time.time()), row[0], bytes(row[2]))
+
+    def __disk_set(self, db: sqlite3.Connection, model_id: str, key: str, version: str, content: bytes) -> None:
+        if self.__disk_versions.get(model_id) != version:
+            db.execute("DELETE FROM predictions WHERE model = ? AND version != ?", (model_id, version))
+            self.__disk_versions[model_id] = version
+        expires_at = time.time() + self.ttl if self.ttl is not None else float("inf")
+        db.execute(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+            (model_id, key, version, expires_at, content),
+        )
+
+    def __disk_delete(self, db: sqlite3.Connection, model_id: Optional[str]) -> bool:
+        db.execute(f"PRAGMA busy_timeout = {int(INVALIDATION_TIMEOUT * 1000)}")
+        try:
+            if model_id is None:
+                db.execute("DELETE FROM predictions")
+            else:
+                db.execute("DELETE FROM predictions WHERE model = ?", (model_id,))
+        finally:
+            db.execute(f"PRAGMA busy_timeout = {int(self.disk_timeout * 1000)}")
+        return True
+
+    def __invalidate_disk(self, model_id: Optional[str]) -> None:
+        if not self.__disk(self.__disk_delete, model_id, timeout=INVALIDATION_TIMEOUT):
+            # The responses are still in the file, this process keeps skipping it for the model
+            return
+        with self.__lock:
+            count = self.__pending.get(model_id, 0) - 1
+            if count > 0:
+                self.__pending[model_id] = count
+            else:
+                self.__pending.pop(model_id, None)
+
+    def __drop(self, entry_key: Tuple[str, str]) -> None:
+        entry = self.__entries.pop(entry_key)
+        self.__size -= len(entry.content)
+
+    def get(self, model_id: str, key: str, *, version: str) -> Optional[bytes]:
+        """
+        Get the cached response of a prediction, counting a hit or a miss.
+
+        Parameters
+        ----------
+        model_id: str
+            Model hash
+        key: str
+            Key of the prediction, see :py:func:`prediction_key`
+        version: str
+            Current version of the model, see :py:func:`model_version`
+
+        Returns
+        -------
+        Optional[bytes]
+            The response body, or None when it isn't cached, expired or was computed by another version of the model
+        """
+        entry_key = (model_id, key)
+        with self.__lock:
+            entry = self.__entries.get(entry_key)
+            if entry is not None:
+                if entry.version == version and time.monotonic() < entry.expires_at:
+                    self.__entries.move_to_end(entry_key)
+                    self.__counters["hits"] += 1
+                    return entry.content
+                self.__drop(entry_key)
+            generation = self.__generation
+            on_disk = self.path is not None and None not in self.__pending and model_id not in self.__pending
+
+        entry = None
+        if on_disk:
+            entry = self.__disk(self.__disk_get, model_id, key, version)
+        with self.__lock:
+            if entry is None:
+                self.__counters["misses"] += 1
+                return None
+            self.__counters["hits"] += 1
+            if generation == self.__generation:
+                self.__store(entry_key, entry)
+            return entry.content
+
+    def set(self, model_id: str, key: str, content: bytes, *, version: str) -> None:
+        """
+        Cache the response of a prediction for `ttl` seconds. Responses larger than `max_bytes` aren't cached.
+
+        Parameters
+        ----------
+        model_id: str
+            Model hash
+        key: str
+            Key of the prediction, see :py:func:`prediction_key`
+        content: bytes
+            The response body
+        version: str
+            Version of the model that computed the response, see :py:func:`model_version`
+        """
+        if len(content) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self.__lock:
+            self.__store((model_id, key), _Entry(expires_at, version, content))
+        if self.path is not None:
+            self.__disk(self.__disk_set, model_id, key, version, content)
+
+    def __store(self, entry_key: Tuple[str, str], entry: _Entry) -> None:
+        if entry_key in self.__entries:
+            self.__drop(entry_key)
+        self.__entries[entry_key] = entry
+        self.__size += len(entry.content)
+        while len(self.__entries) > self.max_entries or self.__size > self.max_bytes:
+            self.__drop(next(iter(self.__entries)))
+            self.__counters["evictions"] += 1
+
+    def invalidate(self, model_id: Optional[str] = None) -> None:
+        """
+        Drop the cached responses of a model, in memory and on disk. The memory is cleared before returning, the file
+        in a background thread, that waits up to 30 seconds for other processes to release it. The file isn't looked
+        up for the model meanwhile.
+
+        Parameters
+        ----------
+        model_id: Optional[str], optional
+            Model hash. Defaults to every model
+        """
+        with self.__lock:
+            keys = [k for k in self.__entries if model_id is None or k[0] == model_id]
+            for entry_key in keys:
+                self.__drop(entry_key)
+            self.__counters["invalidations"] += len(keys)
+            self.__generation += 1
+            if self.path is not None:
+                self.__pending[model_id] = self.__pending.get(model_id, 0) + 1
+        if self.path is not None:
+            # Callers, e.g. a prediction that noticed a redeploy, never wait for the file
+            threading.Thread(
+                target=self.__invalidate_disk, args=(model_id,), name="mlops-codex-cache-invalidation"
+            ).start()
+        if keys:
+            logger.debug(f"Dropped {len(keys)} cached predictions of {model_id or 'every model'}")
+
+    def clear(self) -> None:
+        """
+        Drop every cached response and reset the counters.
+        """
+        self.invalidate()
+        with self.__lock:
+            self.__counters = dict.fromkeys(self.__counters, 0)
+
+    def stats(self) -> CacheStats:
+        """
+        Get the counters of the cache.
+
+        Returns
+        -------
+        CacheStats
+            Hits, misses, evictions and invalidations since the cache was created or cleared, and its current size
+        """
+        with self.__lock:
+            return CacheStats(entries=len(self.__entries), size=self.__size, **self.__counters)
+
+    def close(self) -> None:
+        """
+        Close the cache file. It is opened again on the next use.
+        """
+        with self.__disk_lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
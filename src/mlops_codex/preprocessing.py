@@ -2,16 +2,15 @@
 # coding: utf-8
 
 import json
-import os
 import time
 from http import HTTPStatus
-from time import sleep
+from time import monotonic, sleep
 from typing import Optional, Union
 
-import requests
-
 from mlops_codex.__utils import parse_json_to_yaml, refresh_token
 from mlops_codex.base import BaseMLOps, BaseMLOpsClient, MLOpsExecution
+from mlops_codex.codec import encode_input
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     ExecutionError,
@@ -21,6 +20,8 @@ from mlops_codex.exceptions import (
     ServerError,
 )
 from mlops_codex.logger_config import get_logger
+from mlops_codex.session import MLOpsSession
+from mlops_codex.tracing import traced
 from mlops_codex.validations import validate_group_existence, validate_python_version
 
 logger = get_logger()
@@ -42,6 +43,12 @@ class MLOpsPreprocessing(BaseMLOps):
         Group the model is inserted.
     base_url: str
         URL to MLOps Server. Default value is https://neomaril.datarisk.net/, use it to test your deployment first before changing to production. You can also use the env variable MLOPS_URL to set this
+    session: Optional[MLOpsSession], optional
+        Session shared with the client that created this preprocessing
+    context: Optional[MLOpsContext], optional
+        Context shared with the client that created this preprocessing. When informed, no new login is made
+    status_ttl: float
+        Seconds a known status is reused before it is checked again. Defaults to 10
 
     Example
     --------
@@ -69,32 +76,76 @@ class MLOpsPreprocessing(BaseMLOps):
         group: Optional[str] = None,
         group_token: Optional[str] = None,
         url: Optional[str] = None,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
+        status_ttl: float = 10.0,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
         self.preprocessing_id = preprocessing_id
         self.group = group
-        self.__token = group_token if group_token else os.getenv("MLOPS_GROUP_TOKEN")
-
-        url = f"{self.base_url}/preprocessing/describe/{group}/{preprocessing_id}"
-        response = requests.get(
-            url,
-            headers={
-                "Authorization": "Bearer "
-                + refresh_token(*self.credentials, self.base_url)
-            },
+        self.__token = (
+            group_token if group_token else self.context.getenv("MLOPS_GROUP_TOKEN")
         )
 
-        result = response.json()["Description"]
-        self.operation = result.get("Operation").lower()
+        self.status_ttl = status_ttl
+        self.__preprocessing_data = None
+        self.__status = None
+        self.__status_checked_at = None
+        self.__preprocessing_ready = False
 
-        response = self.__get_status()
-        self.status = response.get("Status")
+    @property
+    def preprocessing_data(self) -> dict:
+        """
+        Preprocessing description. It is fetched from the server on the first access.
+        """
+        if self.__preprocessing_data is None:
+            url = f"{self.base_url}/preprocessing/describe/{self.group}/{self.preprocessing_id}"
+            response = self.session.get(
+                url,
+                headers={
+                    "Authorization": "Bearer "
+                    + refresh_token(*self.credentials, self.base_url)
+                },
+            )
+            self.__preprocessing_data = response.json()["Description"]
+        return self.__preprocessing_data
 
-        self.__preprocessing_ready = self.status == "Deployed"
+    @property
+    def operation(self) -> str:
+        return self.preprocessing_data.get("Operation").lower()
+
+    @property
+    def status(self) -> str:
+        """
+        Preprocessing status. It is checked again when it is older than `status_ttl` seconds.
+        """
+        if (
+            self.__status_checked_at is None
+            or monotonic() - self.__status_checked_at > self.status_ttl
+        ):
+            self.status = self.__get_status().get("Status")
+        return self.__status
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self.__status = value
+        self.__status_checked_at = monotonic()
+        if value == "Deployed":
+            self.__preprocessing_ready = True
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        # Monotonic clocks of different processes can't be compared, the status is checked again on the next access
+        if self.__status_checked_at is not None:
+            self.__status_checked_at = float("-inf")
 
     def __repr__(self) -> str:
+        if self.__preprocessing_data is None:
+            return f"""MLOpsPreprocessing(group="{self.group}", preprocessing_id="{self.preprocessing_id}")"""
         return f"""MLOpsPreprocessing, group="{self.group}", 
-                                status="{self.status}",
+                                status="{self.__status}",
                                 preprocessing_id="{self.preprocessing_id}",
                                 operation="{self.operation.title()}",
                                 )"""
@@ -102,6 +153,7 @@ class MLOpsPreprocessing(BaseMLOps):
     def __str__(self):
         return f'MLOPS preprocessing (Group: {self.group}, Id: {self.preprocessing_id})"'
 
+    @traced("MLOpsPreprocessing.wait_ready")
     def wait_ready(self):
         """
         Waits the pre-processing to be with status 'Deployed'
@@ -186,6 +238,7 @@ class MLOpsPreprocessing(BaseMLOps):
         self.__token = group_token
         logger.info(f"Token for group {self.group} added.")
 
+    @traced("MLOpsPreprocessing.run")
     def run(
         self,
         *,
@@ -198,9 +251,9 @@ class MLOpsPreprocessing(BaseMLOps):
 
         Parameters
         ----------
-        data: Union[dict, str]
+        data: Union[dict, str, bytes]
             The same data that is used in the source file.
-            If Sync is a dict, the keys that are needed inside this dict are the ones in the `schema` attribute.
+            If Sync is a dict, the keys that are needed inside this dict are the ones in the `schema` attribute. It can also be its JSON, already encoded as `bytes`, that is sent without being decoded.
             If Async is a string with the file path with the same filename used in the source file.
         group_token: Optional[str], optional
             Token for executing the preprocessing (show when creating a group). It can be informed when getting the preprocessing or when running predictions, or using the env variable MLOPS_GROUP_TOKEN
@@ -217,7 +270,7 @@ class MLOpsPreprocessing(BaseMLOps):
         Union[dict, MLOpsExecution]
             The return of the scoring function in the source file for Sync preprocessing or the execution class for Async preprocessing.
         """
-        if self.__preprocessing_ready:
+        if self.__preprocessing_ready or self.status == "Deployed":
             if (group_token is not None) | (self.__token is not None):
                 url = f"{self.base_url}/preprocessing/{self.operation}/run/{self.group}/{self.preprocessing_id}"
                 if self.__token and not group_token:
@@ -225,11 +278,9 @@ class MLOpsPreprocessing(BaseMLOps):
                 if group_token and not self.__token:
                     self.__token = group_token
                 if self.operation == "sync":
-                    preprocessing_input = {"Input": data}
-
-                    req = requests.post(
+                    req = self.session.post(
                         url,
-                        data=json.dumps(preprocessing_input),
+                        data=encode_input(self.session.codec, data),
                         headers={
                             "Authorization": "Bearer " + group_token,
                             "Neomaril-Origin": "Codex",
@@ -237,14 +288,14 @@ class MLOpsPreprocessing(BaseMLOps):
                         },
                     )
 
-                    return req.json()
+                    return self.session.codec.loads(req.content)
 
                 elif self.operation == "async":
                     files = {
                         "dataset": open(data, "rb"),
                     }
 
-                    req = requests.post(
+                    req = self.session.post(
                         url,
                         files=files,
                         headers={
@@ -266,6 +317,7 @@ class MLOpsPreprocessing(BaseMLOps):
                             login=self.credentials[0],
                             password=self.credentials[1],
                             url=self.base_url,
+                            context=self.context,
                             group=self.group,
                             group_token=group_token,
                         )
@@ -324,6 +376,7 @@ class MLOpsPreprocessing(BaseMLOps):
                 login=self.credentials[0],
                 password=self.credentials[1],
                 url=self.base_url,
+                context=self.context,
                 group_token=self.__token,
                 group=self.group,
             )
@@ -347,7 +400,7 @@ class MLOpsPreprocessing(BaseMLOps):
         url = (
             f"{self.base_url}/preprocessing/status/{self.group}/{self.preprocessing_id}"
         )
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -502,7 +555,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
         """
 
         url = f"{self.base_url}/preprocessing/status/{group}/{preprocessing_id}"
-        response = requests.get(
+        response = self.session.get(
             url=url,
             headers={
                 "Authorization": "Bearer "
@@ -583,6 +636,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
                     password=self.credentials[1],
                     group=group,
                     url=self.base_url,
+                    context=self.context,
                     group_token=group_token,
                 )
 
@@ -605,6 +659,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
                 password=self.credentials[1],
                 group=group,
                 url=self.base_url,
+                context=self.context,
                 group_token=group_token,
             )
         else:
@@ -661,7 +716,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
         if only_deployed:
             query["state"] = "Deployed"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             params=query,
             headers={
@@ -842,7 +897,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
             "python_version": "Python" + python_version.replace(".", ""),
         }
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=form_data,
             files=upload_data,
@@ -900,7 +955,7 @@ class MLOpsPreprocessingClient(BaseMLOpsClient):
             f"{self.base_url}/preprocessing/{operation}/host/{group}/{preprocessing_id}"
         )
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
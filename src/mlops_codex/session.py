@@ -0,0 +1,1134 @@
+"""
+HTTP session module
+
+Every client keeps one pooled session and hands it to the objects it creates,
+so status polls, describes and predictions reuse the same TCP/TLS connections.
+The session is also the single request executor of the package: it applies the
+default timeouts, retries idempotent requests, short-circuits endpoints that
+keep failing, coalesces identical concurrent reads, caches listings and optionally
+compresses request bodies. Every request is recorded in a :py:mod:`mlops_codex.metrics`
+registry and, when a tracer is installed, in a :py:mod:`mlops_codex.tracing` span.
+"""
+
+import copy
+import gzip
+import os
+import random
+import socket
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from mlops_codex.codec import JSONCodec, get_codec
+from mlops_codex.exceptions import CircuitOpenError, InputError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.metrics import MetricsRegistry, get_registry
+from mlops_codex.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from mlops_codex.cassette import Cassette
+
+logger = get_logger()
+
+
+# GET requests of the API that change the state of the server: sending them twice refreshes a group token twice or
+# restarts a model twice
+UNSAFE_REQUESTS = (
+    "GET /groups/refresh/*",
+    "GET /model/restart/*",
+    "GET /model/*/host/*",
+    "GET /preprocessing/*/host/*",
+    "GET /monitoring/host/*",
+    "GET /training/execute/*",
+)
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Retry configuration used by :py:class:`MLOpsSession`.
+
+    Parameters
+    ----------
+    total: int
+        Maximum number of retries for a single request. Defaults to 3
+    backoff_factor: float
+        Base of the exponential backoff, in seconds. The wait before the retry `n` is a random value between 0 and
+        `backoff_factor * 2 ** n` (full jitter). Defaults to 0.5
+    backoff_max: float
+        Maximum wait between two attempts, in seconds. Also caps the `Retry-After` sent by the server. Defaults to 30
+    status_forcelist: Tuple[int, ...]
+        Status codes that trigger a retry. Defaults to (429, 500, 502, 503, 504)
+    allowed_methods: Tuple[str, ...]
+        Idempotent methods that can be retried. Defaults to ("GET", "HEAD", "OPTIONS")
+    respect_retry_after: bool
+        Wait the time asked by the server in the `Retry-After` header. Defaults to True
+    unsafe_requests: Tuple[str, ...]
+        Requests that change the state of the server although their method is in `allowed_methods`. They are never
+        retried nor coalesced. Patterns are matched like the ones of :py:class:`CacheRule`. Defaults to
+        `UNSAFE_REQUESTS`, the group token refresh, the model restart and the host and execute calls
+    """
+
+    total: int = 3
+    backoff_factor: float = 0.5
+    backoff_max: float = 30.0
+    status_forcelist: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    allowed_methods: Tuple[str, ...] = ("GET", "HEAD", "OPTIONS")
+    respect_retry_after: bool = True
+    unsafe_requests: Tuple[str, ...] = UNSAFE_REQUESTS
+
+
+class CacheRule(NamedTuple):
+    """
+    Listing endpoint cached by :py:class:`ResponseCache`.
+
+    Patterns are matched against "METHOD /path", where the path is relative to the API URL (e.g. "GET /model/search").
+    They accept shell-style wildcards, "*" also matching "/".
+
+    Parameters
+    ----------
+    pattern: str
+        GET requests cached by this rule
+    ttl: float
+        Seconds a cached response is reused
+    invalidated_by: Tuple[str, ...]
+        Requests that change the listing. When one of them is sent, the cached responses of this rule are dropped
+    """
+
+    pattern: str
+    ttl: float
+    invalidated_by: Tuple[str, ...] = ()
+
+
+DEFAULT_CACHE_RULES = (
+    CacheRule(
+        "GET /groups",
+        60.0,
+        ("POST /groups", "* /groups/refresh/*"),
+    ),
+    CacheRule(
+        "GET /model/search",
+        15.0,
+        (
+            "POST /model/upload/*",
+            "DELETE /model/delete/*",
+            "POST /model/disable/*",
+            "* /model/restart/*",
+            "* /model/*/host/*",
+            "* /training/promote/*",
+        ),
+    ),
+    CacheRule(
+        "GET /preprocessing/search",
+        15.0,
+        ("POST /preprocessing/register/*", "* /preprocessing/*/host/*"),
+    ),
+    CacheRule(
+        "GET /training/search",
+        15.0,
+        ("POST /training/register/*", "POST /training/upload/*"),
+    ),
+    CacheRule(
+        "GET /datasource/list",
+        60.0,
+        ("POST /datasource/register/*", "DELETE /datasources/*"),
+    ),
+    CacheRule(
+        "GET /datasets/list",
+        15.0,
+        ("POST /datasource/import/*", "DELETE /datasets/*"),
+    ),
+    CacheRule(
+        "GET /external-monitoring",
+        15.0,
+        (
+            "POST /external-monitoring*",
+            "PUT /external-monitoring*",
+            "PATCH /external-monitoring*",
+            "DELETE /external-monitoring*",
+        ),
+    ),
+)
+
+
+class SessionConfig(NamedTuple):
+    """
+    Connection pool and request execution configuration used by :py:class:`MLOpsSession`.
+
+    Parameters
+    ----------
+    pool_connections: int
+        Number of hosts that keep a connection pool cached. Defaults to 10
+    pool_maxsize: int
+        Maximum number of connections kept open for each host. Defaults to 20
+    pool_block: bool
+        If True, a thread waits for a free connection instead of opening a new one when the host pool is full,
+        making `pool_maxsize` a hard per-host connection limit. Defaults to False
+    keep_alive: bool
+        Reuse connections between requests. Defaults to True
+    tcp_keepalive: bool
+        Enable TCP keep-alive probes on the pooled sockets, so idle connections are not silently dropped by proxies. Defaults to True
+    timeout: Union[float, Tuple[float, float]]
+        Default (connect, read) timeout in seconds, used when the call doesn't inform one. Defaults to (10, 60)
+    retry: RetryPolicy
+        Retry configuration for idempotent requests
+    failure_threshold: int
+        Consecutive server failures (5xx or connection errors) that open the circuit of an endpoint. Defaults to 5
+    reset_timeout: float
+        Seconds an open circuit waits before letting a trial request through. Defaults to 30
+    compression: Optional[str]
+        Encoding used to compress request bodies (uploads and predict payloads), 'gzip' or 'deflate'. The server must
+        accept the `Content-Encoding` header. Defaults to None (disabled). Responses are always requested with
+        `Accept-Encoding` and decoded transparently
+    compression_level: int
+        Compression level, from 1 (fastest) to 9 (smallest). Defaults to 6
+    compression_threshold: int
+        Bodies smaller than this number of bytes are sent uncompressed. Defaults to 1024
+    cache_rules: Tuple[CacheRule, ...]
+        Listing endpoints whose responses are cached, with their TTL and the requests that invalidate them.
+        Use an empty tuple to disable the cache. Defaults to `DEFAULT_CACHE_RULES`
+    cache_max_entries: int
+        Maximum number of cached responses. Defaults to 256
+    coalesce_requests: bool
+        Identical GET requests (same URL and `Authorization` header) sent while one of them is in flight wait for it and
+        share its response instead of calling the server again. Requests in `retry.unsafe_requests` are always sent.
+        Defaults to True
+    metrics: bool
+        Record the requests in a :py:class:`mlops_codex.metrics.MetricsRegistry`. Defaults to True
+    metrics_registry: Optional[MetricsRegistry]
+        Registry where the requests are recorded. Defaults to the process wide registry
+    cassette: Optional[Cassette]
+        Record the requests and their responses to a :py:class:`mlops_codex.cassette.Cassette`, or answer them with
+        the responses it recorded. Defaults to None (requests are sent to the server)
+    json_codec: Union[str, JSONCodec]
+        JSON codec of the prediction and sync preprocessing payloads: 'orjson', 'ujson', 'json' or a
+        :py:class:`mlops_codex.codec.JSONCodec`, or 'auto' for the fastest one installed. Defaults to 'json', the
+        standard library. orjson and ujson encode some payloads differently, see :py:mod:`mlops_codex.codec`
+    """
+
+    pool_connections: int = 10
+    pool_maxsize: int = 20
+    pool_block: bool = False
+    keep_alive: bool = True
+    tcp_keepalive: bool = True
+    timeout: Union[float, Tuple[float, float]] = (10, 60)
+    retry: RetryPolicy = RetryPolicy()
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    compression: Optional[str] = None
+    compression_level: int = 6
+    compression_threshold: int = 1024
+    cache_rules: Tuple[CacheRule, ...] = DEFAULT_CACHE_RULES
+    cache_max_entries: int = 256
+    coalesce_requests: bool = True
+    metrics: bool = True
+    metrics_registry: Optional[MetricsRegistry] = None
+    cassette: Optional["Cassette"] = None
+    json_codec: Union[str, JSONCodec] = "json"
+
+
+class CircuitBreaker:
+    """
+    Per endpoint circuit breaker.
+
+    After `failure_threshold` consecutive failures the endpoint circuit opens and every request fails fast with
+    :py:class:`mlops_codex.exceptions.CircuitOpenError`. After `reset_timeout` seconds a single trial request is let
+    through: if it succeeds the circuit closes, otherwise it opens again.
+
+    Parameters
+    ----------
+    failure_threshold: int
+        Consecutive failures that open the circuit
+    reset_timeout: float
+        Seconds before an open circuit lets a trial request through
+    """
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.__lock = threading.Lock()
+        self.__failures: Dict[str, int] = {}
+        self.__opened_at: Dict[str, float] = {}
+        self.__probing: Dict[str, float] = {}
+
+    def before_request(self, endpoint: str) -> None:
+        """
+        Check if a request to the endpoint can be sent.
+
+        Parameters
+        ----------
+        endpoint: str
+            Endpoint key
+
+        Raises
+        ------
+        CircuitOpenError
+            The endpoint circuit is open
+        """
+        with self.__lock:
+            opened_at = self.__opened_at.get(endpoint)
+            if opened_at is None:
+                return
+            now = time.monotonic()
+            # A trial request that never reported back doesn't hold the circuit forever
+            probing_since = self.__probing.get(endpoint, now - self.reset_timeout)
+            if now - opened_at < self.reset_timeout or now - probing_since < self.reset_timeout:
+                raise CircuitOpenError(
+                    f"Requests to '{endpoint}' are suspended after repeated server failures. Please, try it later."
+                )
+            self.__probing[endpoint] = now
+
+    def record_success(self, endpoint: str) -> None:
+        with self.__lock:
+            self.__failures.pop(endpoint, None)
+            self.__opened_at.pop(endpoint, None)
+            self.__probing.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str) -> None:
+        with self.__lock:
+            failures = self.__failures.get(endpoint, 0) + 1
+            self.__failures[endpoint] = failures
+            if failures >= self.failure_threshold or endpoint in self.__probing:
+                if endpoint not in self.__opened_at:
+                    logger.error(f"Too many server failures. Suspending requests to '{endpoint}'")
+                self.__opened_at[endpoint] = time.monotonic()
+            self.__probing.pop(endpoint, None)
+
+    def state(self, endpoint: str) -> str:
+        """
+        Get the circuit state of an endpoint.
+
+        Returns
+        -------
+        str
+            'closed', 'open' or 'half-open'
+        """
+        with self.__lock:
+            opened_at = self.__opened_at.get(endpoint)
+            if opened_at is None:
+                return "closed"
+            if time.monotonic() - opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+
+# Routes of the API called by the SDK. "{name}" segments are parameters, "a|b" segments are fixed values
+API_ROUTES = (
+    "/health",
+    "/login",
+    "/groups",
+    "/groups/refresh/{group}",
+    "/model/search",
+    "/model/upload/{group}",
+    "/model/describe/{group}/{hash}",
+    "/model/describe/{group}/{hash}/{execution}",
+    "/model/status/{group}/{hash}",
+    "/model/delete/{group}/{hash}",
+    "/model/disable/{group}/{hash}",
+    "/model/restart/{group}/{hash}",
+    "/model/logs/{hash}",
+    "/model/logs/{group}/{hash}",
+    "/model/sync/health/{group}/{hash}",
+    "/model/sync|async/run/{group}/{hash}",
+    "/model/sync|async/host/{group}/{hash}",
+    "/model/sync|async/docs/{group}/{hash}",
+    "/model/async/status/{group}/{execution}",
+    "/model/async/result/{group}/{execution}",
+    "/preprocessing/search",
+    "/preprocessing/register/{group}",
+    "/preprocessing/describe/{group}/{hash}",
+    "/preprocessing/describe/{group}/{hash}/{execution}",
+    "/preprocessing/status/{group}/{hash}",
+    "/preprocessing/logs/{hash}",
+    "/preprocessing/logs/{group}/{hash}",
+    "/preprocessing/sync|async/run/{group}/{hash}",
+    "/preprocessing/sync|async/host/{group}/{hash}",
+    "/preprocessing/async/status/{group}/{execution}",
+    "/preprocessing/async/result/{group}/{execution}",
+    "/training/search",
+    "/training/register/{group}",
+    "/training/upload/{group}/{hash}",
+    "/training/describe/{group}/{hash}",
+    "/training/describe/{group}/{hash}/{execution}",
+    "/training/execute/{group}/{hash}/{execution}",
+    "/training/promote/{group}/{hash}/{execution}",
+    "/training/status/{group}/{execution}",
+    "/training/result/{group}/{execution}",
+    "/monitoring/register/{group}/{hash}",
+    "/monitoring/status/{group}/{hash}/{period}",
+    "/monitoring/host/{group}/{hash}/{period}",
+    "/monitoring/search/records/{group}/{hash}",
+    "/datasource/list",
+    "/datasource/register/{group}",
+    "/datasource/import/{group}/{name}",
+    "/datasources/{group}/{name}",
+    "/datasets/list",
+    "/datasets/status/{group}/{hash}",
+    "/datasets/{group}/{hash}",
+    "/external-monitoring",
+    "/external-monitoring/{hash}/status|model-file|requirements-file|script-file",
+)
+
+
+class _Route(NamedTuple):
+    # None for parameters, the accepted values for fixed segments
+    segments: Tuple[Optional[Tuple[str, ...]], ...]
+    # Template of the key, up to the last fixed segment. Fixed segments are None, taken from the path
+    key: Tuple[Optional[str], ...]
+
+
+def _compile_routes(routes: Tuple[str, ...]) -> Dict[Tuple[str, int], Tuple[_Route, ...]]:
+    index: Dict[Tuple[str, int], Tuple[_Route, ...]] = {}
+    for route in routes:
+        parts = [part for part in route.split("/") if part]
+        segments = tuple(None if part.startswith("{") else tuple(part.split("|")) for part in parts)
+        last_fixed = max(i for i, segment in enumerate(segments) if segment is not None)
+        key = tuple(part if part.startswith("{") else None for part in parts[: last_fixed + 1])
+        for first in segments[0]:
+            bucket = (first, len(parts))
+            index[bucket] = index.get(bucket, ()) + (_Route(segments, key),)
+    return index
+
+
+_ROUTES = _compile_routes(API_ROUTES)
+
+
+def _match_route(segments: List[str]) -> Optional[_Route]:
+    for route in _ROUTES.get((segments[0], len(segments)), ()):
+        if all(
+            accepted is None or segment in accepted
+            for accepted, segment in zip(route.segments, segments)
+        ):
+            return route
+    return None
+
+
+def route_template(path: str) -> str:
+    """
+    Get the template of an API path, without the values of its parameters: the path up to its last fixed segment,
+    with the parameters before it replaced by their names (e.g. '/model/describe' for '/model/describe/group/M1' and
+    '/external-monitoring/{hash}/status' for '/external-monitoring/Mabc/status').
+
+    Paths of routes missing from `API_ROUTES` are cut at their first segment, so the templates are always bounded.
+
+    Parameters
+    ----------
+    path: str
+        The path, relative to the API URL
+
+    Returns
+    -------
+    str
+        The template
+    """
+    segments = [s for s in path.split("/") if s]
+    if not segments:
+        return "/"
+    route = _match_route(segments)
+    if route is not None:
+        return "/" + "/".join(
+            segment if template is None else template
+            for template, segment in zip(route.key, segments)
+        )
+    first = segments[0]
+    return "/" + first if any(bucket[0] == first for bucket in _ROUTES) else "/{unknown}"
+
+
+def endpoint_key(method: str, url: str) -> str:
+    """
+    Build the endpoint key of a request: the method, the host and the template of the path, without the group and
+    hashes (e.g. 'GET neomaril.datarisk.net/model/describe'), see :py:func:`route_template`.
+
+    Parameters
+    ----------
+    method: str
+        HTTP method
+    url: str
+        Request URL
+
+    Returns
+    -------
+    str
+        The endpoint key
+    """
+    return f"{method.upper()} {urlsplit(url).netloc}{route_template(api_path(url))}"
+
+
+def metric_labels(method: str, url: str, headers: Optional[Any]) -> Dict[str, str]:
+    """
+    Build the metric labels of a request: the `Neomaril-Method` header of the call and its endpoint,
+    without the host, the group and hashes (e.g. 'POST /model/sync/run').
+
+    Parameters
+    ----------
+    method: str
+        HTTP method
+    url: str
+        Request URL
+    headers: Optional[Mapping[str, str]]
+        Request headers
+
+    Returns
+    -------
+    Dict[str, str]
+        The 'method' and 'endpoint' labels
+    """
+    http_method, _, resource = endpoint_key(method, url).partition(" ")
+    neomaril_method = headers.get("Neomaril-Method") if headers else None
+    return {
+        "method": neomaril_method or "",
+        "endpoint": f"{http_method} {resource[resource.find('/'):]}",
+    }
+
+
+def api_path(url: str) -> str:
+    """
+    Get the path of a request relative to the API URL (e.g. '/model/search').
+
+    Parameters
+    ----------
+    url: str
+        Request URL
+
+    Returns
+    -------
+    str
+        The path after '/api'
+    """
+    path = urlsplit(url).path.rstrip("/")
+    index = path.find("/api/")
+    if index >= 0:
+        path = path[index + 4 :]
+    return path or "/"
+
+
+class ResponseCache:
+    """
+    In-process TTL cache of listing responses.
+
+    Responses are kept per URL (with its query) and `Authorization` header, so users never share cached listings.
+    Sending a request that matches the `invalidated_by` patterns of a rule drops every response cached by that rule.
+
+    Parameters
+    ----------
+    rules: Tuple[CacheRule, ...]
+        Cached endpoints
+    max_entries: int
+        Maximum number of cached responses. The least recently used ones are dropped first
+    """
+
+    def __init__(self, rules: Tuple[CacheRule, ...], *, max_entries: int = 256) -> None:
+        self.rules = rules
+        self.max_entries = max_entries
+        self.__lock = threading.Lock()
+        self.__entries: "OrderedDict[Any, Tuple[float, CacheRule, requests.Response]]" = OrderedDict()
+
+    def rule_for(self, method: str, url: str) -> Optional[CacheRule]:
+        """
+        Get the rule that caches the request, if any.
+        """
+        request = f"{method.upper()} {api_path(url)}"
+        for rule in self.rules:
+            if fnmatchcase(request, rule.pattern):
+                return rule
+        return None
+
+    def get(self, key: Any) -> Optional[requests.Response]:
+        """
+        Get a cached response that didn't expire.
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+        # Each caller gets its own object, the body is parsed again by every .json() call
+        return copy.copy(entry[2])
+
+    def set(self, key: Any, rule: CacheRule, response: requests.Response) -> None:
+        """
+        Cache a response for `rule.ttl` seconds.
+        """
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + rule.ttl, rule, response)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def invalidate(self, method: str, url: str) -> None:
+        """
+        Drop the responses of every rule invalidated by the request.
+        """
+        request = f"{method.upper()} {api_path(url)}"
+        rules = {
+            rule
+            for rule in self.rules
+            if any(fnmatchcase(request, pattern) for pattern in rule.invalidated_by)
+        }
+        if not rules:
+            return
+        with self.__lock:
+            for key in [k for k, e in self.__entries.items() if e[1] in rules]:
+                del self.__entries[key]
+
+    def clear(self) -> None:
+        """
+        Drop every cached response.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+
+def is_unsafe_request(policy: RetryPolicy, method: str, url: str) -> bool:
+    """
+    Check if a request changes the state of the server although its method is idempotent, so it must be sent once.
+
+    Parameters
+    ----------
+    policy: RetryPolicy
+        Retry configuration with the `unsafe_requests` patterns
+    method: str
+        HTTP method
+    url: str
+        Request URL
+
+    Returns
+    -------
+    bool
+        True if the request matches one of `policy.unsafe_requests`
+    """
+    request = f"{method.upper()} {api_path(url)}"
+    return any(fnmatchcase(request, pattern) for pattern in policy.unsafe_requests)
+
+
+def renew_authorization(headers: Any) -> Optional[str]:
+    """
+    Renew the `Authorization` of a request refused with 401, when it was sent with a user token issued by a
+    :py:class:`mlops_codex.auth.TokenManager`. The refused token is discarded, so no other request uses it.
+
+    Parameters
+    ----------
+    headers: Mapping[str, str]
+        Headers of the refused request
+
+    Raises
+    ------
+    AuthenticationError
+        Raised if the login fails
+
+    Returns
+    -------
+    Optional[str]
+        The `Authorization` header with a new token, or None when the request wasn't sent with a user token
+        (e.g. it was sent with a group token)
+    """
+    from mlops_codex.auth import renew_token
+
+    authorization = headers.get("Authorization") or ""
+    if not authorization.startswith("Bearer "):
+        return None
+    token = renew_token(authorization[len("Bearer ") :])
+    return "Bearer " + token if token is not None else None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a `Retry-After` header, that can be a number of seconds or an HTTP date.
+
+    Returns
+    -------
+    Optional[float]
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(policy: RetryPolicy, attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Get the wait before retrying a request: the `Retry-After` informed by the server or an exponential backoff with
+    full jitter.
+
+    Parameters
+    ----------
+    policy: RetryPolicy
+        Retry configuration
+    attempt: int
+        Number of the failed attempt, starting at 0
+    retry_after: Optional[str], optional
+        `Retry-After` header of the failed response
+
+    Returns
+    -------
+    float
+        Seconds to wait
+    """
+    if policy.respect_retry_after:
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            return min(seconds, policy.backoff_max)
+    return random.uniform(0, min(policy.backoff_max, policy.backoff_factor * 2**attempt))
+
+
+def received_bytes(response: requests.Response) -> int:
+    """
+    Get the size of a response body as read from the network, before decoding its `Content-Encoding`.
+    The body of streamed responses is not read yet, so their `Content-Length` is used instead.
+
+    Parameters
+    ----------
+    response: requests.Response
+        The response
+
+    Returns
+    -------
+    int
+        Body size in bytes
+    """
+    if response._content_consumed:
+        try:
+            return int(response.raw.tell())
+        except (AttributeError, TypeError, ValueError):
+            return len(response.content or b"")
+    try:
+        return int(response.headers.get("Content-Length", 0))
+    except ValueError:
+        return 0
+
+
+def compress_body(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """
+    Compress a request body.
+
+    Parameters
+    ----------
+    body: bytes
+        The body to compress
+    encoding: str
+        'gzip' or 'deflate'
+    level: int
+        Compression level, from 1 to 9
+
+    Returns
+    -------
+    bytes
+        The compressed body
+    """
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise InputError(f"Invalid compression '{encoding}'. Valid options are 'gzip' and 'deflate'")
+
+
+class MLOpsHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter that optionally enables TCP keep-alive on the pooled sockets.
+    """
+
+    def __init__(self, *, tcp_keepalive: bool = True, **kwargs) -> None:
+        # HTTPAdapter.__init__ calls init_poolmanager, so this must be set first
+        self.tcp_keepalive = tcp_keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.tcp_keepalive:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+class MLOpsSession(requests.Session):
+    """
+    Pooled keep-alive session shared by a client and every object it creates.
+
+    Every request sent through the session:
+
+    - uses `config.timeout` when the call doesn't set a timeout;
+    - is retried with exponential backoff and jitter when it is idempotent (its method is in `config.retry.allowed_methods`
+      and it isn't one of `config.retry.unsafe_requests`) and fails with a connection error or one of
+      `config.retry.status_forcelist`, respecting the `Retry-After` header;
+    - fails fast with :py:class:`mlops_codex.exceptions.CircuitOpenError` while its endpoint keeps returning 5xx;
+    - has its body compressed when `config.compression` is set and the body is larger than `config.compression_threshold`;
+    - is answered from `cache` when it is a listing matched by `config.cache_rules`, and drops the cached listings it
+      changes otherwise;
+    - shares the response of an identical GET already in flight, when `config.coalesce_requests` is set and it isn't
+      one of `config.retry.unsafe_requests`;
+    - is recorded in `metrics` (counts, errors, latency, bytes and retries), when `config.metrics` is set;
+    - runs inside a span that propagates its context in the `traceparent` header, when a tracer is installed with
+      :py:func:`mlops_codex.tracing.set_tracer`;
+    - is sent again once with a new user token when the server refuses its token with 401, see
+      :py:func:`renew_authorization`.
+
+    Sessions can be pickled: only the configuration is sent and the new session opens its own connections. After a
+    `fork`, the child process drops the connections inherited from the parent and opens new ones.
+
+    Parameters
+    ----------
+    config: Optional[SessionConfig], optional
+        Connection pool and request execution configuration. Defaults to `SessionConfig()`
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.model import MLOpsModelClient
+        from mlops_codex.session import RetryPolicy, SessionConfig
+
+        config = SessionConfig(pool_maxsize=50, pool_block=True, timeout=(5, 30), retry=RetryPolicy(total=5), compression='gzip')
+        client = MLOpsModelClient(session_config=config)
+    """
+
+    def __init__(self, config: Optional[SessionConfig] = None) -> None:
+        super().__init__()
+        self.config = config if config else SessionConfig()
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=self.config.failure_threshold,
+            reset_timeout=self.config.reset_timeout,
+        )
+        self.cache = ResponseCache(
+            self.config.cache_rules, max_entries=self.config.cache_max_entries
+        )
+        self.__inflight: Dict[Any, Future] = {}
+        self.__inflight_lock = threading.Lock()
+        self.__mount_adapters()
+
+        self.metrics: Optional[MetricsRegistry] = None
+        if self.config.metrics:
+            self.metrics = (
+                self.config.metrics_registry
+                if self.config.metrics_registry is not None
+                else get_registry()
+            )
+
+        if not self.config.keep_alive:
+            self.headers["Connection"] = "close"
+
+        if self.config.compression not in (None, "gzip", "deflate"):
+            raise InputError(
+                f"Invalid compression '{self.config.compression}'. Valid options are 'gzip' and 'deflate'"
+            )
+        self.codec = get_codec(self.config.json_codec)
+
+        _sessions.add(self)
+
+    def __reduce__(self):
+        return MLOpsSession, (self.config,)
+
+    def __mount_adapters(self) -> None:
+        adapter = MLOpsHTTPAdapter(
+            tcp_keepalive=self.config.tcp_keepalive,
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=self.config.pool_block,
+        )
+        if self.config.cassette is not None:
+            adapter = self.config.cassette.adapter(adapter)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def _reset_after_fork(self) -> None:
+        # The pooled sockets are shared with the parent process and locks may have been held by its threads.
+        # The old pools are just dropped, their sockets are never used by the child process
+        self.__inflight = {}
+        self.__inflight_lock = threading.Lock()
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=self.config.failure_threshold,
+            reset_timeout=self.config.reset_timeout,
+        )
+        self.cache = ResponseCache(
+            self.config.cache_rules, max_entries=self.config.cache_max_entries
+        )
+        self.__mount_adapters()
+
+    def __compress(self, request: requests.PreparedRequest) -> None:
+        body = request.body
+        if (
+            self.config.compression is None
+            or not body
+            or "Content-Encoding" in request.headers
+        ):
+            return
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        # Streamed bodies (files and generators) are sent as they are
+        if not isinstance(body, bytes) or len(body) < self.config.compression_threshold:
+            return
+
+        compressed = compress_body(
+            body, self.config.compression, self.config.compression_level
+        )
+        # Already compressed content (zip, parquet, pickles of compressed objects) doesn't shrink
+        if len(compressed) >= len(body):
+            return
+
+        request.body = compressed
+        request.headers["Content-Encoding"] = self.config.compression
+        request.headers["Content-Length"] = str(len(compressed))
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        self.__compress(request)
+        if self.metrics is not None and isinstance(request.body, (bytes, str)):
+            size = len(request.body) if isinstance(request.body, bytes) else len(request.body.encode("utf-8"))
+            self.metrics.inc(
+                "mlops_codex_request_bytes_sent_total",
+                metric_labels(request.method, request.url, request.headers),
+                size,
+            )
+        return super().send(request, **kwargs)
+
+    def request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        response = self.__request(method, url, *args, **kwargs)
+        if response.status_code != 401:
+            return response
+
+        # The user token may have been revoked before its expiration. The request is sent again once, with a new
+        # token, unless its body was streamed and can't be read again
+        sent = response.request
+        if sent is None or not isinstance(sent.body, (bytes, str, type(None))):
+            return response
+        authorization = renew_authorization(sent.headers)
+        if authorization is None:
+            return response
+        response.close()
+
+        # The body was already encoded (and compressed) by the first attempt
+        headers = dict(sent.headers)
+        headers["Authorization"] = authorization
+        options = {
+            k: v for k, v in kwargs.items() if k not in ("data", "json", "files", "params", "headers")
+        }
+        return self.__request(sent.method, sent.url, data=sent.body, headers=headers, **options)
+
+    def __request(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        method = method.upper()
+        stream = bool(kwargs.get("stream"))
+        rule = None if stream else self.cache.rule_for(method, url)
+        coalesce = (
+            self.config.coalesce_requests
+            and method in ("GET", "HEAD")
+            and not stream
+            and not is_unsafe_request(self.config.retry, method, url)
+        )
+
+        key = None
+        if rule is not None or coalesce:
+            headers = kwargs.get("headers") or {}
+            key = (
+                method,
+                requests.Request(method, url, params=kwargs.get("params")).prepare().url,
+                headers.get("Authorization"),
+            )
+
+        if rule is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                if self.metrics is not None:
+                    self.metrics.inc(
+                        "mlops_codex_cache_hits_total",
+                        metric_labels(method, url, kwargs.get("headers")),
+                    )
+                return response
+
+        try:
+            if coalesce:
+                response = self.__coalesce(key, method, url, *args, **kwargs)
+            else:
+                response = self.__execute(method, url, *args, **kwargs)
+        finally:
+            if rule is None:
+                self.cache.invalidate(method, url)
+
+        if rule is not None and response.status_code == 200:
+            self.cache.set(key, rule, response)
+            return copy.copy(response)
+        return response
+
+    def __coalesce(self, key: Any, method: str, url: str, *args, **kwargs) -> requests.Response:
+        with self.__inflight_lock:
+            future = self.__inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.__inflight[key] = Future()
+
+        if not leader:
+            if self.metrics is not None:
+                self.metrics.inc(
+                    "mlops_codex_coalesced_requests_total",
+                    metric_labels(method, url, kwargs.get("headers")),
+                )
+            # The body was already read by the leader, each follower gets its own response object
+            return copy.copy(future.result())
+
+        try:
+            response = self.__execute(method, url, *args, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self.__inflight_lock:
+                del self.__inflight[key]
+
+    def __execute(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        tracer = get_tracer()
+        if tracer is None:
+            return self.__measure(method, url, *args, **kwargs)
+
+        labels = metric_labels(method, url, kwargs.get("headers"))
+        attributes = {"http.request.method": method, "url.full": url}
+        if labels["method"]:
+            attributes["mlops.method"] = labels["method"]
+
+        with tracer.start_span(labels["endpoint"], attributes) as span:
+            # Each attempt carries the context of the request span
+            headers = dict(kwargs.get("headers") or {})
+            tracer.inject(headers)
+            kwargs["headers"] = headers
+
+            response = self.__measure(method, url, *args, **kwargs)
+
+            body = response.request.body if response.request is not None else None
+            if isinstance(body, (bytes, str)):
+                span.set_attribute("http.request.body.size", len(body))
+            span.set_attribute("http.response.status_code", response.status_code)
+            span.set_attribute("http.response.body.size", received_bytes(response))
+            if response.status_code >= 500:
+                span.set_error(f"Server returned {response.status_code}")
+            return response
+
+    def __measure(self, method: str, url: str, *args, **kwargs) -> requests.Response:
+        if self.metrics is None:
+            return self.__send_with_retries(None, method, url, *args, **kwargs)
+
+        labels = metric_labels(method, url, kwargs.get("headers"))
+        start = time.perf_counter()
+        try:
+            response = self.__send_with_retries(labels, method, url, *args, **kwargs)
+        except Exception as exc:
+            self.__record(labels, start, type(exc).__name__)
+            raise
+
+        self.__record(labels, start, str(response.status_code))
+        if response.status_code >= 400:
+            self.metrics.inc(
+                "mlops_codex_request_errors_total", {**labels, "code": str(response.status_code)}
+            )
+        self.metrics.inc(
+            "mlops_codex_response_bytes_received_total", labels, received_bytes(response)
+        )
+        return response
+
+    def __record(self, labels: Dict[str, str], start: float, status: str) -> None:
+        self.metrics.observe(
+            "mlops_codex_request_duration_seconds", labels, time.perf_counter() - start
+        )
+        self.metrics.inc("mlops_codex_requests_total", {**labels, "status": status})
+        if not status.isdigit():
+            self.metrics.inc("mlops_codex_request_errors_total", {**labels, "code": status})
+
+    def __send_with_retries(
+        self, labels: Optional[Dict[str, str]], method: str, url: str, *args, **kwargs
+    ) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.config.timeout
+
+        policy = self.config.retry
+        endpoint = endpoint_key(method, url)
+        retryable = method.upper() in policy.allowed_methods and not is_unsafe_request(
+            policy, method, url
+        )
+        attempt = 0
+
+        while True:
+            self.circuit_breaker.before_request(endpoint)
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.circuit_breaker.record_failure(endpoint)
+                if not retryable or attempt >= policy.total:
+                    raise
+                wait = retry_delay(policy, attempt)
+                logger.debug(f"Connection failed on '{endpoint}'. Retrying in {wait:.2f}s")
+            else:
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure(endpoint)
+                else:
+                    self.circuit_breaker.record_success(endpoint)
+
+                if (
+                    not retryable
+                    or attempt >= policy.total
+                    or response.status_code not in policy.status_forcelist
+                ):
+                    return response
+
+                wait = retry_delay(
+                    policy, attempt, response.headers.get("Retry-After")
+                )
+                logger.debug(
+                    f"Server returned {response.status_code} on '{endpoint}'. Retrying in {wait:.2f}s"
+                )
+                response.close()
+
+            attempt += 1
+            if labels is not None:
+                self.metrics.inc("mlops_codex_request_retries_total", labels)
+            time.sleep(wait)
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+_sessions: "weakref.WeakSet[MLOpsSession]" = weakref.WeakSet()
+
+
+def _reset_sessions_after_fork() -> None:
+    global _default_session_lock
+    _default_session_lock = threading.Lock()
+    for session in list(_sessions):
+        session._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sessions_after_fork)
+
+
+def get_default_session() -> MLOpsSession:
+    """
+    Get the process wide session, used by calls that are not bound to a client (e.g. the login).
+
+    Returns
+    -------
+    MLOpsSession
+        The shared session
+    """
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = MLOpsSession()
+    return _default_session
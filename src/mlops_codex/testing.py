@@ -0,0 +1,1139 @@
+"""
+Testing module
+
+Local stand-in of the MLOps API, used to run integration code, CI suites and performance tests without a live
+platform. The emulator serves the endpoints used by the SDK (login, health, groups, models, preprocessing, async
+executions and their results, training, datasets and external monitoring) with configurable latency, injected
+faults and time based state transitions.
+"""
+
+import base64
+import email.policy
+import gzip
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from mlops_codex.exceptions import InputError
+from mlops_codex.logger_config import get_logger
+from mlops_codex.session import SessionConfig, metric_labels
+
+logger = get_logger()
+
+DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal", "exponential")
+
+DEFAULT_RESULT = b"prediction\n0\n"
+
+
+class Latency(NamedTuple):
+    """
+    Distribution of the time the emulator takes to answer a request.
+
+    Parameters
+    ----------
+    distribution: str
+        'constant', 'uniform', 'normal', 'lognormal' or 'exponential'. Defaults to 'constant'
+    mean: float
+        Mean latency in seconds. Defaults to 0
+    stddev: float
+        Standard deviation in seconds, ignored by 'constant' and 'exponential'. Defaults to 0
+    maximum: Optional[float], optional
+        Upper bound of the samples, in seconds. Samples are never negative
+    """
+
+    distribution: str = "constant"
+    mean: float = 0.0
+    stddev: float = 0.0
+    maximum: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw a latency.
+
+        Parameters
+        ----------
+        rng: random.Random
+            Random generator
+
+        Returns
+        -------
+        float
+            Seconds to wait
+        """
+        if self.mean <= 0 and self.stddev <= 0:
+            return 0.0
+
+        if self.distribution == "constant":
+            value = self.mean
+        elif self.distribution == "uniform":
+            # Same mean and standard deviation of the other distributions
+            half_width = self.stddev * 3**0.5
+            value = rng.uniform(self.mean - half_width, self.mean + half_width)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean, self.stddev)
+        elif self.distribution == "lognormal":
+            # Parameters of the underlying normal that give the requested mean and standard deviation
+            sigma = math.sqrt(math.log(1 + (self.stddev / self.mean) ** 2)) if self.mean > 0 else 0.0
+            value = rng.lognormvariate(math.log(self.mean) - sigma**2 / 2, sigma) if self.mean > 0 else 0.0
+        else:
+            value = rng.expovariate(1 / self.mean) if self.mean > 0 else 0.0
+
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return max(value, 0.0)
+
+
+class Fault(NamedTuple):
+    """
+    Fault injected in a share of the requests.
+
+    Parameters
+    ----------
+    rate: float
+        Share of the matching requests that fail, between 0 and 1
+    status: int
+        Status code of the failed responses, e.g. 503 or 410. Use 0 to drop the connection without a response.
+        Defaults to 503
+    endpoint: Optional[str], optional
+        Endpoint of the failing requests, in the format of the metric labels (e.g. 'POST /model/sync/run').
+        If None, every request may fail
+    retry_after: Optional[float], optional
+        Value of the `Retry-After` header of the failed responses, in seconds
+    """
+
+    rate: float
+    status: int = 503
+    endpoint: Optional[str] = None
+    retry_after: Optional[float] = None
+
+
+class EmulatorConfig(NamedTuple):
+    """
+    Behavior of :py:class:`MLOpsEmulator`.
+
+    Parameters
+    ----------
+    latency: Latency
+        Latency of every request. Defaults to no latency
+    endpoint_latency: Optional[Dict[str, Latency]], optional
+        Latency of specific endpoints, in the format of the metric labels (e.g. 'POST /model/sync/run')
+    faults: Tuple[Fault, ...]
+        Faults injected before the requests are handled
+    build_seconds: float
+        Time models and preprocessing scripts stay 'Building' after the host and external monitorings stay
+        'Validating'. Defaults to 0
+    queue_seconds: float
+        Time executions stay 'Requested'. Defaults to 0
+    run_seconds: float
+        Time executions and dataset imports stay 'Running'. Defaults to 0
+    build_failure_rate: float
+        Share of the deploys and validations that fail. Defaults to 0
+    execution_failure_rate: float
+        Share of the executions and dataset imports that fail. Defaults to 0
+    token_ttl: int
+        Lifetime of the user tokens, in seconds. Defaults to 3600
+    seed: Optional[int], optional
+        Seed of the random generator, for reproducible latencies and faults
+    """
+
+    latency: Latency = Latency()
+    endpoint_latency: Optional[Dict[str, Latency]] = None
+    faults: Tuple[Fault, ...] = ()
+    build_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    run_seconds: float = 0.0
+    build_failure_rate: float = 0.0
+    execution_failure_rate: float = 0.0
+    token_ttl: int = 3600
+    seed: Optional[int] = None
+
+
+class _Record:
+    """Emulated object whose status follows a timeline"""
+
+    def __init__(self, data: dict, status: str) -> None:
+        self.data = data
+        self.timeline: List[Tuple[float, str]] = [(time.monotonic(), status)]
+        self.message = ""
+
+    def schedule(self, *steps: Tuple[float, str]) -> None:
+        """Replace the future of the timeline: each step is a delay from now and the state reached after it"""
+        now = time.monotonic()
+        self.timeline = [(now + delay, state) for delay, state in steps]
+
+    @property
+    def status(self) -> str:
+        now = time.monotonic()
+        current = self.timeline[0][1]
+        for at, state in self.timeline:
+            if at <= now:
+                current = state
+        return current
+
+
+class _Response(NamedTuple):
+    status: int
+    body: Any
+    headers: Optional[Dict[str, str]] = None
+
+
+class _Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Any
+    body: bytes
+
+    @property
+    def token(self) -> Optional[str]:
+        value = self.headers.get("Authorization") or ""
+        return value[7:] if value.startswith("Bearer ") else None
+
+    def form(self) -> Tuple[Dict[str, str], Dict[str, Tuple[str, bytes]]]:
+        """Parse the fields and files of a form or JSON body"""
+        content_type = self.headers.get("Content-Type") or ""
+        if content_type.startswith("multipart/form-data"):
+            message = message_from_bytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + self.body,
+                policy=email.policy.HTTP,
+            )
+            fields, files = {}, {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                payload = part.get_payload(decode=True) or b""
+                filename = part.get_filename()
+                if filename is None:
+                    fields[name] = payload.decode("utf-8", "replace")
+                else:
+                    files[name] = (filename, payload)
+            return fields, files
+
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return dict(parse_qsl(self.body.decode())), {}
+
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            data = {}
+        return (data if isinstance(data, dict) else {"Input": data}), {}
+
+
+def _jwt(ttl: int) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    claims = {"iat": now, "exp": now + ttl, "jti": uuid.uuid4().hex}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.emulator"
+
+
+def _hash() -> str:
+    return "M" + uuid.uuid4().hex[:31]
+
+
+def _message(status: int, message: str, **fields) -> _Response:
+    return _Response(status, {"Message": message, **fields})
+
+
+class _Server(ThreadingHTTPServer):
+    # Async clients open hundreds of connections at once, the default backlog of 5 resets them
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients that time out close their connection before the answer, that is not an error of the emulator
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    emulator: "MLOpsEmulator"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def __serve(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        elif encoding == "deflate":
+            body = zlib.decompress(body)
+
+        parts = urlsplit(self.path)
+        request = _Request(
+            method=self.command,
+            path=parts.path,
+            query=dict(parse_qsl(parts.query)),
+            headers=self.headers,
+            body=body,
+        )
+        response = self.emulator._handle(request)
+        if response is None:
+            # Injected connection drop
+            self.close_connection = True
+            return
+
+        if isinstance(response.body, bytes):
+            payload, content_type = response.body, "application/octet-stream"
+        else:
+            payload, content_type = json.dumps(response.body).encode(), "application/json"
+
+        self.send_response(response.status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (response.headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = __serve
+
+
+class MLOpsEmulator:
+    """
+    Local stand-in of the MLOps API.
+
+    The emulator runs an HTTP server in a background thread and keeps its objects in memory. Deploys, executions,
+    dataset imports and monitoring validations move through their states as time passes, following the durations of
+    the config, so the clients wait on them like they do on the platform. Latency and faults are applied before each
+    request is handled.
+
+    Parameters
+    ----------
+    config: Optional[EmulatorConfig], optional
+        Latency, faults and state transitions. Defaults to `EmulatorConfig()`
+    login: str
+        Login accepted by the emulator
+    password: str
+        Password accepted by the emulator
+    scorer: Optional[Callable[[Any], Any]], optional
+        Function that answers the sync runs, called with the input of the request. Defaults to echoing the input
+    async_result: bytes
+        Content of the results of async executions and trainings
+    host: str
+        Address the server listens on. Defaults to '127.0.0.1'
+    port: int
+        Port the server listens on. Defaults to a free port
+
+    Raises
+    ------
+    InputError
+        Invalid latency distribution or failure rate
+
+    Example
+    -------
+    .. code-block:: python
+
+        from mlops_codex.model import MLOpsModelClient
+        from mlops_codex.testing import EmulatorConfig, Fault, Latency, MLOpsEmulator
+
+        config = EmulatorConfig(
+            latency=Latency('lognormal', mean=0.02, stddev=0.01),
+            faults=(Fault(rate=0.05, status=503, endpoint='POST /model/sync/run'),),
+        )
+        with MLOpsEmulator(config=config) as emulator:
+            group_token = emulator.create_group('groupname')
+            model_id = emulator.add_model(group='groupname', scorer=lambda data: {'pred': 1})
+
+            client = MLOpsModelClient(context=emulator.connect())
+            model = client.get_model(model_id=model_id, group='groupname', group_token=group_token)
+            model.predict(data={'x': 1})
+            print(emulator.hits)
+    """
+
+    def __init__(
+        self,
+        *,
+        config: Optional[EmulatorConfig] = None,
+        login: str = "emulator@mlops.local",
+        password: str = "emulator",
+        scorer: Optional[Callable[[Any], Any]] = None,
+        async_result: bytes = DEFAULT_RESULT,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.config = config if config else EmulatorConfig()
+        latencies = [self.config.latency, *(self.config.endpoint_latency or {}).values()]
+        for latency in latencies:
+            if latency.distribution not in DISTRIBUTIONS:
+                raise InputError(
+                    f"Invalid latency distribution '{latency.distribution}'. Valid options are {DISTRIBUTIONS}"
+                )
+        rates = [f.rate for f in self.config.faults] + [
+            self.config.build_failure_rate,
+            self.config.execution_failure_rate,
+        ]
+        if any(not 0 <= rate <= 1 for rate in rates):
+            raise InputError("Failure rates must be between 0 and 1")
+
+        self.login = login
+        self.password = password
+        self.scorer = scorer
+        self.async_result = async_result
+        self.hits: Counter = Counter()
+
+        self.__address = (host, port)
+        self.__server: Optional[_Server] = None
+        self.__rng = random.Random(self.config.seed)
+        self.__lock = threading.Lock()
+
+        self.__tokens: Dict[str, float] = {}
+        self.__groups: Dict[str, dict] = {}
+        self.__objects: Dict[Tuple[str, str], _Record] = {}
+        self.__executions: Dict[Tuple[str, str], _Record] = {}
+        self.__datasources: Dict[Tuple[str, str], dict] = {}
+        self.__datasets: Dict[str, _Record] = {}
+        self.__monitorings: Dict[str, _Record] = {}
+        self.__exec_ids = 0
+        self.__routes = self.__build_routes()
+
+        self.create_group("datarisk", description="Public group")
+
+    def __repr__(self) -> str:
+        return f"MLOpsEmulator(url={self.url!r}, running={self.__server is not None})"
+
+    @property
+    def url(self) -> str:
+        """URL of the emulated API, to be used as the MLOps URL"""
+        if self.__server is None:
+            raise InputError("Emulator is not running. Call start() first")
+        host, port = self.__server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    @property
+    def env(self) -> Dict[str, str]:
+        """Env variables that point the SDK to the emulator: MLOPS_URL, MLOPS_USER and MLOPS_PASSWORD"""
+        return {"MLOPS_URL": self.url, "MLOPS_USER": self.login, "MLOPS_PASSWORD": self.password}
+
+    def start(self) -> "MLOpsEmulator":
+        """Start the server in a background thread"""
+        if self.__server is None:
+            handler = type("MLOpsEmulatorHandler", (_Handler,), {"emulator": self})
+            self.__server = _Server(self.__address, handler)
+            threading.Thread(
+                target=self.__server.serve_forever, name="mlops-emulator", daemon=True
+            ).start()
+            logger.debug(f"MLOps emulator listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """Stop the server"""
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __enter__(self) -> "MLOpsEmulator":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def connect(self, *, session_config: Optional[SessionConfig] = None):
+        """
+        Connect to the emulator with its credentials.
+
+        Parameters
+        ----------
+        session_config: Optional[SessionConfig], optional
+            Configuration of the session
+
+        Returns
+        -------
+        MLOpsContext
+            Context to be passed to the clients
+        """
+        from mlops_codex.context import MLOpsContext
+
+        return MLOpsContext.connect(
+            login=self.login,
+            password=self.password,
+            url=self.url,
+            session_config=session_config,
+        )
+
+    def create_group(self, name: str, *, description: str = "", token: Optional[str] = None) -> str:
+        """
+        Create a group without a request.
+
+        Parameters
+        ----------
+        name: str
+            Group name
+        description: str
+            Group description
+        token: Optional[str], optional
+            Group token. Defaults to a random token
+
+        Returns
+        -------
+        str
+            The group token
+        """
+        token = token or uuid.uuid4().hex
+        with self.__lock:
+            self.__groups[name] = {"Name": name, "Description": description, "Token": token}
+        return token
+
+    def add_model(
+        self,
+        *,
+        group: str,
+        model_id: Optional[str] = None,
+        name: str = "emulated-model",
+        operation: str = "Sync",
+        status: str = "Deployed",
+        scorer: Optional[Callable[[Any], Any]] = None,
+    ) -> str:
+        """
+        Create a model without uploading it.
+
+        Parameters
+        ----------
+        group: str
+            Group of the model. It is created if it doesn't exist
+        model_id: Optional[str], optional
+            Model hash. Defaults to a random hash
+        name: str
+            Model name
+        operation: str
+            'Sync' or 'Async'. Defaults to 'Sync'
+        status: str
+            Model status. Defaults to 'Deployed'
+        scorer: Optional[Callable[[Any], Any]], optional
+            Function that answers the sync runs of this model. Defaults to the emulator scorer
+
+        Returns
+        -------
+        str
+            The model hash
+        """
+        if group not in self.__groups:
+            self.create_group(group)
+        model_id = model_id or _hash()
+        record = _Record(
+            self.__description("model", group, model_id, {"name": name, "operation": operation}),
+            status,
+        )
+        record.data["scorer"] = scorer
+        with self.__lock:
+            self.__objects[("model", model_id)] = record
+        return model_id
+
+    def model_status(self, model_id: str) -> str:
+        """
+        Get the current status of a model.
+
+        Parameters
+        ----------
+        model_id: str
+            Model hash
+
+        Returns
+        -------
+        str
+            The model status
+        """
+        return self.__objects[("model", model_id)].status
+
+    # Request handling
+
+    def _handle(self, request: _Request) -> Optional[_Response]:
+        path = request.path.rstrip("/")
+        if path.startswith("/api"):
+            path = path[4:]
+        endpoint = metric_labels(request.method, "http://emulator" + path, None)["endpoint"]
+        with self.__lock:
+            self.hits[endpoint] += 1
+            latency = (self.config.endpoint_latency or {}).get(endpoint, self.config.latency)
+            delay = latency.sample(self.__rng)
+            fault = next(
+                (
+                    f
+                    for f in self.config.faults
+                    if (f.endpoint is None or f.endpoint == endpoint) and self.__rng.random() < f.rate
+                ),
+                None,
+            )
+
+        if delay:
+            time.sleep(delay)
+        if fault is not None:
+            if fault.status == 0:
+                return None
+            headers = {"Retry-After": str(fault.retry_after)} if fault.retry_after is not None else None
+            return _Response(fault.status, {"Message": "Injected fault"}, headers)
+
+        for method, pattern, handler in self.__routes:
+            if method != request.method:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                try:
+                    return handler(request, *match.groups())
+                except Exception as exc:
+                    logger.exception(f"Emulator failed to handle {endpoint}")
+                    return _message(500, f"Emulator error: {exc}")
+        return _message(404, f"Path not found: {path}")
+
+    def __build_routes(self) -> List[Tuple[str, Any, Callable[..., _Response]]]:
+        segment = "([^/]+)"
+        routes = [
+            ("GET", "/health", self.__health),
+            ("POST", "/login", self.__login),
+            ("GET", "/groups", self.__list_groups),
+            ("POST", "/groups", self.__create_group),
+            ("GET", f"/groups/refresh/{segment}", self.__refresh_group),
+            ("GET", "/(model|preprocessing)/search", self.__search),
+            ("POST", f"/model/upload/{segment}", self.__upload),
+            ("POST", f"/preprocessing/register/{segment}", self.__upload_preprocessing),
+            ("GET", f"/(model|preprocessing)/(sync|async)/host/{segment}/{segment}", self.__host),
+            ("GET", f"/(model|preprocessing)/status/{segment}/{segment}", self.__status),
+            ("GET", f"/(model|preprocessing)/describe/{segment}/{segment}", self.__describe),
+            ("GET", f"/model/sync/health/{segment}/{segment}", self.__health_model),
+            ("POST", f"/(model|preprocessing)/sync/run/{segment}/{segment}", self.__run_sync),
+            ("POST", f"/(model|preprocessing)/async/run/{segment}/{segment}", self.__run_async),
+            ("GET", f"/(model|preprocessing)/async/status/{segment}/{segment}", self.__execution_status),
+            ("GET", f"/(model|preprocessing)/async/result/{segment}/{segment}", self.__execution_result),
+            ("GET", f"/(model|preprocessing)/describe/{segment}/{segment}/{segment}", self.__describe_execution),
+            ("POST", f"/training/register/{segment}", self.__register_training),
+            ("GET", "/training/search", self.__search_trainings),
+            ("GET", f"/training/describe/{segment}/{segment}", self.__describe_training),
+            ("POST", f"/training/upload/{segment}/{segment}", self.__upload_training),
+            ("GET", f"/training/execute/{segment}/{segment}/{segment}", self.__execute_training),
+            ("GET", f"/(training)/status/{segment}/{segment}", self.__execution_status),
+            ("GET", f"/(training)/result/{segment}/{segment}", self.__execution_result),
+            ("GET", f"/(training)/describe/{segment}/{segment}/{segment}", self.__describe_execution),
+            ("POST", f"/training/promote/{segment}/{segment}/{segment}", self.__promote),
+            ("POST", f"/datasource/register/{segment}", self.__register_datasource),
+            ("GET", "/datasource/list", self.__list_datasources),
+            ("POST", f"/datasource/import/{segment}/{segment}", self.__import_dataset),
+            ("DELETE", f"/datasources/{segment}/{segment}", self.__delete_datasource),
+            ("GET", "/datasets/list", self.__list_datasets),
+            ("GET", f"/datasets/status/{segment}/{segment}", self.__dataset_status),
+            ("DELETE", f"/datasets/{segment}/{segment}", self.__delete_dataset),
+            ("POST", "/external-monitoring", self.__register_monitoring),
+            ("GET", "/external-monitoring", self.__list_monitorings),
+            ("GET", f"/external-monitoring/{segment}/status", self.__monitoring_status),
+            ("PATCH", f"/external-monitoring/{segment}/status", self.__host_monitoring),
+            ("PATCH", f"/external-monitoring/{segment}/{segment}", self.__upload_monitoring_file),
+        ]
+        return [(method, re.compile(path), handler) for method, path, handler in routes]
+
+    def __user(self, request: _Request) -> bool:
+        expires_at = self.__tokens.get(request.token or "")
+        return expires_at is not None and expires_at > time.time()
+
+    def __group_token(self, request: _Request, group: str) -> bool:
+        info = self.__groups.get(group)
+        return info is not None and request.token == info["Token"]
+
+    def __draw(self, rate: float) -> bool:
+        with self.__lock:
+            return self.__rng.random() < rate
+
+    def __next_exec_id(self) -> str:
+        with self.__lock:
+            self.__exec_ids += 1
+            return str(self.__exec_ids)
+
+    def __description(self, kind: str, group: str, object_id: str, fields: Dict[str, str]) -> dict:
+        description = {
+            "Name": fields.get("name", f"emulated-{kind}"),
+            "Group": group,
+            "Operation": (fields.get("operation") or "Sync").capitalize(),
+            "PythonVersion": fields.get("python_version", "Python310"),
+            "CreatedAt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        if kind == "model":
+            description.update(
+                ModelHash=object_id,
+                InputType=fields.get("input_type", "json"),
+                ModelReference=fields.get("model_reference", "score"),
+                Schema=fields.get("schema"),
+            )
+        else:
+            description.update(Hash=object_id, ScriptReference=fields.get("script_reference", "run"))
+        return description
+
+    def __start_build(self, record: _Record) -> None:
+        final = "Failed" if self.__draw(self.config.build_failure_rate) else "Deployed"
+        record.message = "Emulated deploy failure" if final == "Failed" else ""
+        record.schedule((0, "Building"), (self.config.build_seconds, final))
+
+    def __start_execution(self, record: _Record) -> None:
+        final = "Failed" if self.__draw(self.config.execution_failure_rate) else "Succeeded"
+        record.message = "Emulated execution failure" if final == "Failed" else ""
+        record.schedule(
+            (0, "Requested"),
+            (self.config.queue_seconds, "Running"),
+            (self.config.queue_seconds + self.config.run_seconds, final),
+        )
+
+    # Auth and groups
+
+    def __health(self, request: _Request) -> _Response:
+        return _Response(200, {"Version": "emulator"})
+
+    def __login(self, request: _Request) -> _Response:
+        fields, _ = request.form()
+        if fields.get("user") != self.login or fields.get("password") != self.password:
+            return _message(401, "Invalid credentials")
+        token = _jwt(self.config.token_ttl)
+        with self.__lock:
+            self.__tokens[token] = time.time() + self.config.token_ttl
+        return _Response(200, {"Token": token})
+
+    def __list_groups(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        groups = [{"Name": g["Name"], "Description": g["Description"]} for g in self.__groups.values()]
+        return _Response(200, {"Results": groups})
+
+    def __create_group(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        fields, _ = request.form()
+        name = fields.get("name")
+        if not name:
+            return _message(400, "Group name is required")
+        if name in self.__groups:
+            return _message(409, f"Group {name} already exists")
+        token = self.create_group(name, description=fields.get("description", ""))
+        return _message(201, "Group created", Token=token)
+
+    def __refresh_group(self, request: _Request, group: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        if group not in self.__groups:
+            return _message(404, f"Group {group} not found")
+        token = self.create_group(
+            group, description=self.__groups[group]["Description"], token=uuid.uuid4().hex
+        )
+        return _message(201, "Group token refreshed", Token=token)
+
+    # Models and preprocessing
+
+    def __search(self, request: _Request, kind: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        results = []
+        for (record_kind, _), record in list(self.__objects.items()):
+            if record_kind != kind:
+                continue
+            if request.query.get("group") not in (None, record.data["Group"]):
+                continue
+            if request.query.get("state") not in (None, record.status):
+                continue
+            if request.query.get("name") and request.query["name"] not in record.data["Name"]:
+                continue
+            results.append({**self.__public(record.data), "Status": record.status})
+        return _Response(200, {"Results": results})
+
+    def __upload(self, request: _Request, group: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        if group not in self.__groups:
+            return _message(404, f"Group {group} not found")
+        fields, files = request.form()
+        if "model" not in files or "source" not in files:
+            return _message(400, "Model and source files are required")
+        if "schema" in files and fields.get("schema") is None:
+            fields["schema"] = files["schema"][1].decode("utf-8", "replace")
+
+        model_id = _hash()
+        with self.__lock:
+            self.__objects[("model", model_id)] = _Record(
+                self.__description("model", group, model_id, fields), "Ready"
+            )
+        return _message(201, "Model uploaded", ModelHash=model_id)
+
+    def __upload_preprocessing(self, request: _Request, group: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        if group not in self.__groups:
+            return _message(404, f"Group {group} not found")
+        fields, _ = request.form()
+        preprocessing_id = "S" + _hash()[1:]
+        with self.__lock:
+            self.__objects[("preprocessing", preprocessing_id)] = _Record(
+                self.__description("preprocessing", group, preprocessing_id, fields), "Ready"
+            )
+        return _message(201, "Preprocessing script uploaded", Hash=preprocessing_id)
+
+    def __object(self, kind: str, group: str, object_id: str) -> Optional[_Record]:
+        record = self.__objects.get((kind, object_id))
+        if record is None or record.data["Group"] != group:
+            return None
+        return record
+
+    def __host(self, request: _Request, kind: str, operation: str, group: str, object_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__object(kind, group, object_id)
+        if record is None:
+            return _message(404, f"{kind.capitalize()} {object_id} not found")
+        record.data["Operation"] = operation.capitalize()
+        self.__start_build(record)
+        return _message(202, f"{kind.capitalize()} host in process")
+
+    def __status(self, request: _Request, kind: str, group: str, object_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__object(kind, group, object_id)
+        if record is None:
+            return _message(404, f"{kind.capitalize()} {object_id} not found")
+        status = record.status
+        result = {"Status": status}
+        if status == "Failed":
+            result["Message"] = record.message
+        return _Response(200, result)
+
+    def __describe(self, request: _Request, kind: str, group: str, object_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__object(kind, group, object_id)
+        if record is None:
+            return _message(404, f"{kind.capitalize()} {object_id} not found")
+        return _Response(200, {"Description": {**self.__public(record.data), "Status": record.status}})
+
+    def __health_model(self, request: _Request, group: str, model_id: str) -> _Response:
+        if not self.__group_token(request, group):
+            return _message(401, "Invalid group token")
+        record = self.__object("model", group, model_id)
+        if record is None or record.status != "Deployed":
+            return _message(404, f"Model {model_id} not available")
+        return _message(200, "OK")
+
+    def __runnable(self, request: _Request, kind: str, operation: str, group: str, object_id: str):
+        if not self.__group_token(request, group):
+            return None, _message(401, "Invalid group token")
+        record = self.__object(kind, group, object_id)
+        if record is None or record.status != "Deployed":
+            return None, _message(404, f"{kind.capitalize()} {object_id} not available")
+        if record.data["Operation"].lower() != operation:
+            return None, _message(400, f"{kind.capitalize()} {object_id} is not {operation}")
+        return record, None
+
+    def __run_sync(self, request: _Request, kind: str, group: str, object_id: str) -> _Response:
+        record, error = self.__runnable(request, kind, "sync", group, object_id)
+        if error:
+            return error
+        fields, _ = request.form()
+        scorer = record.data.get("scorer") or self.scorer
+        data = fields.get("Input")
+        return _Response(200, scorer(data) if scorer else data)
+
+    def __run_async(self, request: _Request, kind: str, group: str, object_id: str) -> _Response:
+        record, error = self.__runnable(request, kind, "async", group, object_id)
+        if error:
+            return error
+        fields, files = request.form()
+        if not files and not fields.get("dataset_hash"):
+            return _message(400, "Input file or dataset is required")
+
+        exec_id = self.__next_exec_id()
+        execution = _Record({"Group": group, "ParentId": object_id, "Kind": kind}, "Requested")
+        self.__start_execution(execution)
+        with self.__lock:
+            self.__executions[(kind, exec_id)] = execution
+        return _message(202, "Execution requested", ExecutionId=exec_id)
+
+    def __execution(self, request: _Request, kind: str, group: str, exec_id: str):
+        authorized = self.__user(request) if kind == "training" else self.__group_token(request, group)
+        if not authorized:
+            return None, _message(401, "Unauthorized")
+        execution = self.__executions.get((kind, exec_id))
+        if execution is None or execution.data["Group"] != group:
+            return None, _message(404, f"Execution {exec_id} not found")
+        return execution, None
+
+    def __execution_status(self, request: _Request, kind: str, group: str, exec_id: str) -> _Response:
+        execution, error = self.__execution(request, kind, group, exec_id)
+        if error:
+            return error
+        status = execution.status
+        result = {"Status": status}
+        if status == "Failed":
+            result["Message"] = execution.message
+        return _Response(200, result)
+
+    def __execution_result(self, request: _Request, kind: str, group: str, exec_id: str) -> _Response:
+        execution, error = self.__execution(request, kind, group, exec_id)
+        if error:
+            return error
+        if execution.status != "Succeeded":
+            return _message(400, f"Execution {exec_id} is {execution.status}")
+        return _Response(200, self.async_result)
+
+    def __describe_execution(
+        self, request: _Request, kind: str, group: str, parent_id: str, exec_id: str
+    ) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        execution = self.__executions.get((kind, exec_id))
+        if execution is None or execution.data["ParentId"] != parent_id:
+            return _message(404, f"Execution {exec_id} not found")
+        description = {**self.__public(execution.data), "ExecutionId": exec_id, "ExecutionState": execution.status}
+        return _Response(200, {"Description": description})
+
+    # Training
+
+    def __register_training(self, request: _Request, group: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        if group not in self.__groups:
+            return _message(404, f"Group {group} not found")
+        fields, _ = request.form()
+        if not fields.get("experiment_name") or not fields.get("model_type"):
+            return _message(400, "Experiment name and model type are required")
+        training_id = "T" + _hash()[1:]
+        record = _Record(
+            {
+                "TrainingHash": training_id,
+                "GroupName": group,
+                "Group": group,
+                "ExperimentName": fields["experiment_name"],
+                "ModelType": fields["model_type"],
+                "Executions": [],
+            },
+            "Registered",
+        )
+        with self.__lock:
+            self.__objects[("training", training_id)] = record
+        return _message(201, "Training experiment registered", TrainingHash=training_id)
+
+    def __search_trainings(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        results = [
+            {k: v for k, v in record.data.items() if k != "Executions"}
+            for (kind, _), record in list(self.__objects.items())
+            if kind == "training"
+        ]
+        return _Response(200, {"Results": results})
+
+    def __describe_training(self, request: _Request, group: str, training_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__object("training", group, training_id)
+        if record is None:
+            return _message(404, f"Experiment {training_id} not found")
+        return _Response(200, {"Description": dict(record.data)})
+
+    def __upload_training(self, request: _Request, group: str, training_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__object("training", group, training_id)
+        if record is None:
+            return _message(404, f"Experiment {training_id} not found")
+        fields, _ = request.form()
+        exec_id = self.__next_exec_id()
+        execution = _Record(
+            {
+                "Group": group,
+                "ParentId": training_id,
+                "Kind": "training",
+                "RunName": fields.get("run_name", f"run-{exec_id}"),
+                "TrainingType": fields.get("training_type", "Custom"),
+                "Description": fields.get("description"),
+                "RunData": {"metrics": {}, "params": {}, "tags": {}},
+            },
+            "Requested",
+        )
+        with self.__lock:
+            self.__executions[("training", exec_id)] = execution
+            record.data["Executions"].append({"Id": exec_id, "RunName": execution.data["RunName"]})
+        # The client takes the first number of the response as the execution id
+        return _Response(201, {"ExecutionId": int(exec_id), "Message": "Training execution created"})
+
+    def __execute_training(self, request: _Request, group: str, training_id: str, exec_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        execution = self.__executions.get(("training", exec_id))
+        if execution is None or execution.data["ParentId"] != training_id:
+            return _message(404, f"Execution {exec_id} not found")
+        self.__start_execution(execution)
+        return _message(200, "Training execution started")
+
+    def __promote(self, request: _Request, group: str, training_id: str, exec_id: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        execution = self.__executions.get(("training", exec_id))
+        if execution is None or execution.data["ParentId"] != training_id:
+            return _message(404, f"Execution {exec_id} not found")
+        if execution.status != "Succeeded":
+            return _message(400, f"Execution {exec_id} is {execution.status}")
+        fields, _ = request.form()
+        model_id = _hash()
+        with self.__lock:
+            self.__objects[("model", model_id)] = _Record(
+                self.__description("model", group, model_id, fields), "Ready"
+            )
+        return _message(201, "Model promoted", ModelHash=model_id)
+
+    # Datasets
+
+    def __register_datasource(self, request: _Request, group: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        fields, _ = request.form()
+        name = fields.get("name")
+        with self.__lock:
+            self.__datasources[(group, name)] = {
+                "Name": name,
+                "Provider": fields.get("provider"),
+                "Group": group,
+            }
+        return _message(200, f"Datasource {name} registered")
+
+    def __list_datasources(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        results = [
+            d
+            for d in list(self.__datasources.values())
+            if request.query.get("group") in (None, d["Group"])
+            and request.query.get("provider") in (None, d["Provider"])
+        ]
+        return _Response(200, {"Results": results})
+
+    def __import_dataset(self, request: _Request, group: str, datasource: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        if (group, datasource) not in self.__datasources:
+            return _message(404, f"Datasource {datasource} not found")
+        fields, _ = request.form()
+        dataset_hash = "D" + _hash()[1:]
+        record = _Record(
+            {
+                "Hash": dataset_hash,
+                "Name": fields.get("name"),
+                "Group": group,
+                "Origin": "Datasource",
+                "Datasource": datasource,
+            },
+            "Running",
+        )
+        final = "Failed" if self.__draw(self.config.execution_failure_rate) else "Succeeded"
+        record.message = "Emulated import failure" if final == "Failed" else ""
+        record.schedule((0, "Running"), (self.config.run_seconds, final))
+        with self.__lock:
+            self.__datasets[dataset_hash] = record
+        return _message(200, "Dataset import requested", ExternalHash=dataset_hash)
+
+    def __delete_datasource(self, request: _Request, group: str, datasource: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        with self.__lock:
+            removed = self.__datasources.pop((group, datasource), None)
+        if removed is None:
+            return _message(404, f"Datasource {datasource} not found")
+        return _message(200, f"Datasource {datasource} deleted")
+
+    def __list_datasets(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        results = []
+        for record in list(self.__datasets.values()):
+            if request.query.get("group") not in (None, record.data["Group"]):
+                continue
+            if request.query.get("datasource") not in (None, record.data["Datasource"]):
+                continue
+            results.append({**record.data, "Status": record.status})
+        return _Response(200, {"Results": results})
+
+    def __dataset_status(self, request: _Request, group: str, dataset_hash: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__datasets.get(dataset_hash)
+        if record is None or record.data["Group"] != group:
+            return _message(404, f"Dataset {dataset_hash} not found")
+        return _Response(200, {"Status": record.status, "Log": record.message or None})
+
+    def __delete_dataset(self, request: _Request, group: str, dataset_hash: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        with self.__lock:
+            removed = self.__datasets.pop(dataset_hash, None)
+        if removed is None:
+            return _message(404, f"Dataset {dataset_hash} not found")
+        return _message(200, f"Dataset {dataset_hash} deleted")
+
+    # External monitoring
+
+    def __register_monitoring(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        fields, _ = request.form()
+        group = fields.get("Group")
+        if group is not None and group not in self.__groups:
+            return _message(404, f"Group {group} not found")
+        monitoring_hash = "E" + _hash()[1:]
+        with self.__lock:
+            self.__monitorings[monitoring_hash] = _Record(
+                {**fields, "Hash": monitoring_hash, "Files": []},
+                "Unvalidated",
+            )
+        return _message(201, "External monitoring registered", ExternalMonitoringHash=monitoring_hash)
+
+    def __list_monitorings(self, request: _Request) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        results = [
+            {**{k: v for k, v in record.data.items() if k != "Files"}, "Status": record.status}
+            for record in list(self.__monitorings.values())
+        ]
+        return _Response(200, {"Result": results})
+
+    def __monitoring_status(self, request: _Request, monitoring_hash: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__monitorings.get(monitoring_hash)
+        if record is None:
+            return _message(404, f"External monitoring {monitoring_hash} not found")
+        status = record.status
+        result = {"Status": status}
+        if status == "Invalidated":
+            result["Message"] = record.message
+        return _Response(200, result)
+
+    def __host_monitoring(self, request: _Request, monitoring_hash: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__monitorings.get(monitoring_hash)
+        if record is None:
+            return _message(404, f"External monitoring {monitoring_hash} not found")
+        final = "Invalidated" if self.__draw(self.config.build_failure_rate) else "Validated"
+        record.message = "Emulated validation failure" if final == "Invalidated" else ""
+        record.schedule((0, "Validating"), (self.config.build_seconds, final))
+        return _message(202, "External monitoring host in process")
+
+    def __upload_monitoring_file(self, request: _Request, monitoring_hash: str, path: str) -> _Response:
+        if not self.__user(request):
+            return _message(401, "Unauthorized")
+        record = self.__monitorings.get(monitoring_hash)
+        if record is None:
+            return _message(404, f"External monitoring {monitoring_hash} not found")
+        _, files = request.form()
+        record.data["Files"].extend(name for name, _ in files.values())
+        return _message(201, f"File uploaded to {path}")
+
+    @staticmethod
+    def __public(data: dict) -> dict:
+        return {k: v for k, v in data.items() if k not in ("scorer", "Kind")}
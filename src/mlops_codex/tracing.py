@@ -0,0 +1,359 @@
+"""
+Tracing module
+
+The SDK operations (e.g. `MLOpsModel.predict`, `MLOpsTrainingExperiment.run_training`) and every
+request they send can be traced as spans. Tracing is disabled by default and costs a single
+check per call until a tracer is installed with :py:func:`set_tracer` or :py:func:`use_opentelemetry`.
+Request spans propagate their context to the server in the W3C `traceparent` header.
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, MutableMapping, NamedTuple, Optional
+
+from lazy_imports import try_import
+
+from mlops_codex.logger_config import get_logger
+
+logger = get_logger()
+
+# Attributes of the SDK objects copied to the spans of their operations
+HANDLE_ATTRIBUTES = (
+    "group",
+    "model_id",
+    "exec_id",
+    "training_id",
+    "preprocessing_id",
+    "datasource_name",
+    "dataset_hash",
+)
+
+
+class Span:
+    """
+    Span of an operation. This default implementation records nothing.
+    """
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute of the span.
+
+        Parameters
+        ----------
+        key: str
+            Attribute name, e.g. 'http.response.status_code'
+        value: Any
+            Attribute value
+        """
+
+    def set_error(self, message: str) -> None:
+        """
+        Mark the span as failed.
+
+        Parameters
+        ----------
+        message: str
+            Error description
+        """
+
+
+class Tracer:
+    """
+    Tracer interface. Subclasses create the spans and propagate their context.
+    """
+
+    def start_span(self, name: str, attributes: Dict[str, Any]) -> ContextManager[Span]:
+        """
+        Start a span, child of the current span, that ends when the context manager exits.
+        Exceptions raised inside the context manager mark the span as failed.
+
+        Parameters
+        ----------
+        name: str
+            Span name
+        attributes: Dict[str, Any]
+            Initial attributes
+
+        Returns
+        -------
+        ContextManager[Span]
+            Context manager that yields the span
+        """
+        return nullcontext(_NOOP_SPAN)
+
+    def inject(self, headers: MutableMapping[str, str]) -> None:
+        """
+        Add the context of the current span to the headers of a request.
+
+        Parameters
+        ----------
+        headers: MutableMapping[str, str]
+            Request headers
+        """
+
+
+_NOOP_SPAN = Span()
+_NOOP_CONTEXT = nullcontext(_NOOP_SPAN)
+
+
+class FinishedSpan(NamedTuple):
+    """
+    Span recorded by :py:class:`SimpleTracer`.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float
+    duration: float
+    attributes: Dict[str, Any]
+    error: Optional[str]
+
+
+class _SimpleSpan(Span):
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.error = message
+
+
+_current_span: ContextVar[Optional[_SimpleSpan]] = ContextVar("mlops_codex_span", default=None)
+
+
+def _log_span(span: FinishedSpan) -> None:
+    logger.debug(
+        f"Span '{span.name}' took {span.duration * 1000:.1f}ms "
+        f"(trace {span.trace_id}, attributes {span.attributes}"
+        + (f", error {span.error})" if span.error else ")")
+    )
+
+
+class SimpleTracer(Tracer):
+    """
+    Dependency free tracer. Spans are nested in the current thread or asyncio task and handed to `on_end` when they
+    finish.
+
+    Parameters
+    ----------
+    on_end: Optional[Callable[[FinishedSpan], None]], optional
+        Called with every finished span. Defaults to logging the span at the debug level
+
+    Example
+    -------
+    >>> from mlops_codex.tracing import SimpleTracer, set_tracer
+    >>> spans = []
+    >>> set_tracer(SimpleTracer(on_end=spans.append))
+    """
+
+    def __init__(self, *, on_end: Optional[Callable[[FinishedSpan], None]] = None) -> None:
+        self.on_end = on_end if on_end is not None else _log_span
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        span = _SimpleSpan(
+            name,
+            parent.trace_id if parent is not None else os.urandom(16).hex(),
+            parent.span_id if parent is not None else None,
+            attributes,
+        )
+        token = _current_span.set(span)
+        start = time.time()
+        begin = time.perf_counter()
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_error(f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            _current_span.reset(token)
+            self.on_end(
+                FinishedSpan(
+                    name=span.name,
+                    trace_id=span.trace_id,
+                    span_id=span.span_id,
+                    parent_id=span.parent_id,
+                    start=start,
+                    duration=time.perf_counter() - begin,
+                    attributes=span.attributes,
+                    error=span.error,
+                )
+            )
+
+    def inject(self, headers: MutableMapping[str, str]) -> None:
+        span = _current_span.get()
+        if span is not None:
+            headers["traceparent"] = f"00-{span.trace_id}-{span.span_id}-01"
+
+
+class _OpenTelemetrySpan(Span):
+    def __init__(self, span: Any, status_type: Any, status_code: Any) -> None:
+        self.__span = span
+        self.__status_type = status_type
+        self.__status_code = status_code
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.__span.set_attribute(key, value)
+
+    def set_error(self, message: str) -> None:
+        self.__span.set_status(self.__status_type(self.__status_code.ERROR, message))
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer that records the spans with OpenTelemetry and propagates the context with the globally configured
+    propagator. Requires the `opentelemetry-api` package (`pip install datarisk-mlops-codex[tracing]`).
+
+    Parameters
+    ----------
+    tracer_provider: Optional[opentelemetry.trace.TracerProvider], optional
+        Provider of the tracer. Defaults to the global provider
+    """
+
+    def __init__(self, *, tracer_provider: Any = None) -> None:
+        with try_import() as otel_import:
+            from opentelemetry import propagate, trace
+        try:
+            otel_import.check()
+        except ImportError as e:
+            raise ImportError(
+                "Tracing with OpenTelemetry requires opentelemetry-api, install it with "
+                "`pip install datarisk-mlops-codex[tracing]`"
+            ) from e
+
+        self.__tracer = trace.get_tracer("mlops_codex", tracer_provider=tracer_provider)
+        self.__propagate = propagate
+        self.__status = (trace.Status, trace.StatusCode)
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Dict[str, Any]):
+        with self.__tracer.start_as_current_span(name, attributes=attributes) as span:
+            yield _OpenTelemetrySpan(span, *self.__status)
+
+    def inject(self, headers: MutableMapping[str, str]) -> None:
+        self.__propagate.inject(headers)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """
+    Install the tracer used by every SDK operation and request. Use None to disable tracing.
+
+    Parameters
+    ----------
+    tracer: Optional[Tracer]
+        The tracer
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Get the installed tracer.
+
+    Returns
+    -------
+    Optional[Tracer]
+        The tracer, or None if tracing is disabled
+    """
+    return _tracer
+
+
+def use_opentelemetry(*, tracer_provider: Any = None) -> OpenTelemetryTracer:
+    """
+    Trace with OpenTelemetry. Requires the `opentelemetry-api` package (`pip install datarisk-mlops-codex[tracing]`).
+
+    Parameters
+    ----------
+    tracer_provider: Optional[opentelemetry.trace.TracerProvider], optional
+        Provider of the tracer. Defaults to the global provider
+
+    Returns
+    -------
+    OpenTelemetryTracer
+        The installed tracer
+
+    Example
+    -------
+    >>> from mlops_codex.tracing import use_opentelemetry
+    >>> use_opentelemetry()
+    """
+    tracer = OpenTelemetryTracer(tracer_provider=tracer_provider)
+    set_tracer(tracer)
+    return tracer
+
+
+def start_span(name: str, **attributes: Any) -> ContextManager[Span]:
+    """
+    Start a span with the installed tracer. Does nothing when tracing is disabled.
+
+    Parameters
+    ----------
+    name: str
+        Span name
+    attributes: Any
+        Initial attributes
+
+    Returns
+    -------
+    ContextManager[Span]
+        Context manager that yields the span
+
+    Example
+    -------
+    >>> from mlops_codex.tracing import start_span
+    >>> with start_span('score_batch', batch_size=100):
+    ...     model.predict(data=data)
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_CONTEXT
+    return tracer.start_span(name, attributes)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that runs a method of an SDK object inside a span with the object ids as attributes
+    (e.g. 'mlops.group' and 'mlops.model_id').
+
+    Parameters
+    ----------
+    name: str
+        Span name, e.g. 'MLOpsModel.predict'
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return method(self, *args, **kwargs)
+
+            state = vars(self)
+            attributes = {
+                f"mlops.{key}": state[key]
+                for key in HANDLE_ATTRIBUTES
+                if state.get(key) is not None
+            }
+            with tracer.start_span(name, attributes):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+from __future__ import annotations
+
 import json
 import os
 import re
@@ -8,17 +10,13 @@ import sys
 from contextlib import contextmanager
 from http import HTTPStatus
 from time import sleep
-from typing import Any, List, Optional, Union
+from typing import TYPE_CHECKING, Any, List, Optional, Union
 
-import cloudpickle
-import numpy as np
-import pandas as pd
-import requests
 from lazy_imports import try_import
 
 from mlops_codex.__utils import parse_dict_or_file, parse_json_to_yaml, refresh_token
 from mlops_codex.base import BaseMLOps, BaseMLOpsClient, MLOpsExecution
-from mlops_codex.datasources import MLOpsDataset
+from mlops_codex.context import MLOpsContext
 from mlops_codex.exceptions import (
     AuthenticationError,
     ExecutionError,
@@ -30,8 +28,15 @@ from mlops_codex.exceptions import (
 )
 from mlops_codex.logger_config import get_logger
 from mlops_codex.model import MLOpsModel
+from mlops_codex.session import MLOpsSession
+from mlops_codex.tracing import traced
 from mlops_codex.validations import validate_group_existence
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from mlops_codex.datasources import MLOpsDataset
+
 patt = re.compile(r"(\d+)")
 logger = get_logger()
 
@@ -232,6 +237,8 @@ class MLOpsTrainingLogger:
             A filename if the extra is a DataFrame.
         """
 
+        import pandas as pd
+
         if isinstance(extra, str):
             if os.path.exists(extra):
                 self.extras.append(extra)
@@ -290,6 +297,8 @@ class MLOpsTrainingLogger:
             output_filename: The name of output filename to save.
             input_data: The content to save.
         """
+        import cloudpickle
+
         path = os.path.join(self.save_path, f"{output_filename}.pkl")
         with open(path, "wb") as f:
             cloudpickle.dump(input_data, f)
@@ -352,6 +361,8 @@ class MLOpsTrainingLogger:
         """
         Tranform data types to dataframe
         """
+        import numpy as np
+        import pandas as pd
 
         if isinstance(obj, pd.Series):
             return obj.to_frame()
@@ -413,6 +424,12 @@ class MLOpsTrainingExecution(MLOpsExecution):
         Environment of MLOps you are using.
     run_data: dict
         Metadata from the execution.
+    session: Optional[MLOpsSession], optional
+        Session shared with the object that created this execution
+    context: Optional[MLOpsContext], optional
+        Context shared with the object that created this execution. When informed, no new login is made
+    status_ttl: float
+        Seconds a known status of an unfinished execution is reused before it is checked again. Defaults to 10
 
     Raises
     ------
@@ -453,6 +470,9 @@ class MLOpsTrainingExecution(MLOpsExecution):
         login: Optional[str] = None,
         password: Optional[str] = None,
         url: str = None,
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
+        status_ttl: float = 10.0,
     ) -> None:
         super().__init__(
             parent_id=training_id,
@@ -462,18 +482,25 @@ class MLOpsTrainingExecution(MLOpsExecution):
             password=password,
             url=url,
             group=group,
+            session=session,
+            context=context,
+            status_ttl=status_ttl,
         )
 
         self.training_id = training_id
         self.group = group
 
-        self.training_type = self.execution_data["TrainingType"]
-        self.name = self.execution_data["RunName"]
-        self.run_data = self.execution_data["RunData"]
+    @property
+    def training_type(self) -> str:
+        return self.execution_data["TrainingType"]
 
-    def __repr__(self) -> str:
-        return f"""MLOps{self.exec_type}Execution(name="{self.name}",
-                                        exec_id="{self.exec_id}", status="{self.status}")"""
+    @property
+    def name(self) -> str:
+        return self.execution_data["RunName"]
+
+    @property
+    def run_data(self) -> dict:
+        return self.execution_data["RunData"]
 
     def __upload_model(
         self,
@@ -565,7 +592,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
 
         form_data["input_type"] = input_type
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=form_data,
             files=upload_data,
@@ -602,7 +629,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
 
         url = f"{self.base_url}/training/status/{self.group}/{self.exec_id}"
 
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -619,10 +646,9 @@ class MLOpsTrainingExecution(MLOpsExecution):
         result = response.json()
 
         self.status = result["Status"]
-        self.execution_data["ExecutionState"] = result["Status"]
         if self.status == "Succeeded":
             url = f"{self.base_url}/training/describe/{self.group}/{self.training_id}/{self.exec_id}"
-            response = requests.get(
+            response = self.session.get(
                 url,
                 headers={
                     "Authorization": "Bearer "
@@ -632,11 +658,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
                 },
             )
             self.execution_data = response.json()["Description"]
-            self.run_data = self.execution_data["RunData"]
-            try:
-                del self.run_data["tags"]
-            except Exception:
-                pass
+            self.run_data.pop("tags", None)
         return result
 
     def __host_model(self, *, operation: str, model_id: str) -> None:
@@ -657,7 +679,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
         """
 
         url = f"{self.base_url}/model/{operation}/host/{self.group}/{model_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -681,6 +703,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
             )
             raise InputError("Invalid parameters for model creation")
 
+    @traced("MLOpsTrainingExecution.promote_model")
     def promote_model(
         self,
         *,
@@ -784,6 +807,7 @@ class MLOpsTrainingExecution(MLOpsExecution):
                 password=self.credentials[1],
                 group=self.group,
                 url=self.base_url,
+                context=self.context,
             )
 
 
@@ -805,6 +829,10 @@ class MLOpsTrainingExperiment(BaseMLOps):
         Flag that choose which environment of MLOps you are using. Test your deployment first before changing to production. Default is True
     executions: List[int]
         Ids for the executions in that training
+    session: Optional[MLOpsSession], optional
+        Session shared with the client that created this experiment
+    context: Optional[MLOpsContext], optional
+        Context shared with the client that created this experiment. When informed, no new login is made
 
 
     Raises
@@ -843,14 +871,21 @@ class MLOpsTrainingExperiment(BaseMLOps):
         password: Optional[str] = None,
         group: str = "datarisk",
         url: str = "https://neomaril.datarisk.net/",
+        session: Optional[MLOpsSession] = None,
+        context: Optional[MLOpsContext] = None,
     ) -> None:
-        super().__init__(login=login, password=password, url=url)
+        super().__init__(
+            login=login, password=password, url=url, session=session, context=context
+        )
 
         self.training_id = training_id
         self.group = group
+        self.__training_data = None
+        self.__executions = None
 
+    def __describe(self) -> dict:
         url = f"{self.base_url}/training/describe/{self.group}/{self.training_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -859,7 +894,7 @@ class MLOpsTrainingExperiment(BaseMLOps):
         )
 
         if response.status_code == 404:
-            raise ModelError(f'Experiment "{training_id}" not found.')
+            raise ModelError(f'Experiment "{self.training_id}" not found.')
 
         formatted_msg = parse_json_to_yaml(response.json())
 
@@ -871,18 +906,40 @@ class MLOpsTrainingExperiment(BaseMLOps):
 
         if response.status_code >= 500:
             logger.error("Server is not available. Please, try it later.")
-            raise ServerError(f'Unable to retrive experiment "{training_id}"')
+            raise ServerError(f'Unable to retrive experiment "{self.training_id}"')
 
         if response.status_code != 200:
             logger.error(f"Something went wrong...\n{formatted_msg}")
             raise Exception("Unexpected error.")
 
-        self.training_data = response.json()["Description"]
-        self.model_type = self.training_data["ModelType"]
-        self.experiment_name = self.training_data["ExperimentName"]
-        self.executions = self.training_data["Executions"]
+        return response.json()["Description"]
+
+    @property
+    def training_data(self) -> dict:
+        """
+        Experiment description. It is fetched from the server on the first access.
+        """
+        if self.__training_data is None:
+            self.__training_data = self.__describe()
+        return self.__training_data
+
+    @property
+    def model_type(self) -> str:
+        return self.training_data["ModelType"]
+
+    @property
+    def experiment_name(self) -> str:
+        return self.training_data["ExperimentName"]
+
+    @property
+    def executions(self) -> list:
+        if self.__executions is None:
+            return self.training_data["Executions"]
+        return self.__executions
 
     def __repr__(self) -> str:
+        if self.__training_data is None:
+            return f"""MLOpsTrainingExperiment(group="{self.group}", training_id="{self.training_id}")"""
         return f"""MLOpsTrainingExperiment(name="{self.experiment_name}", 
                                                         group="{self.group}", 
                                                         training_id="{self.training_id}",
@@ -1065,7 +1122,7 @@ class MLOpsTrainingExperiment(BaseMLOps):
                 upload_data.append(("env", (".env", open(env, "r"))))
 
         token = refresh_token(*self.credentials, self.base_url)
-        response = requests.post(
+        response = self.session.post(
             url,
             data=form_data,
             files=upload_data,
@@ -1108,7 +1165,7 @@ class MLOpsTrainingExperiment(BaseMLOps):
         """
 
         url = f"{self.base_url}/training/execute/{self.group}/{self.training_id}/{exec_id}"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -1137,37 +1194,10 @@ class MLOpsTrainingExperiment(BaseMLOps):
         raise InputError("Invalid parameters for training execution")
 
     def __refresh_execution_list(self):
-        url = f"{self.base_url}/training/describe/{self.group}/{self.training_id}"
-        response = requests.get(
-            url,
-            headers={
-                "Authorization": "Bearer "
-                + refresh_token(*self.credentials, self.base_url)
-            },
-        )
-
-        if response.status_code == 404:
-            raise ModelError(f'Experiment "{self.training_id}" not found.')
-
-        formatted_msg = parse_json_to_yaml(response.json())
-
-        if response.status_code == 401:
-            logger.error(
-                "Login or password are invalid, please check your credentials."
-            )
-            raise AuthenticationError("Login not authorized.")
-
-        if response.status_code >= 500:
-            logger.error("Server is not available. Please, try it later.")
-            raise ServerError(f'Unable to retrive experiment "{self.training_id}"')
-
-        if response.status_code != 200:
-            logger.error(f"Something went wrong...\n{formatted_msg}")
-            raise Exception("Unexpected error.")
-
-        self.training_data = response.json()["Description"]
-        self.executions = [c["Id"] for c in self.training_data["Executions"]]
+        self.__training_data = self.__describe()
+        self.__executions = [c["Id"] for c in self.__training_data["Executions"]]
 
+    @traced("MLOpsTrainingExperiment.run_training")
     def run_training(
         self,
         *,
@@ -1345,6 +1375,7 @@ class MLOpsTrainingExperiment(BaseMLOps):
                 login=self.credentials[0],
                 password=self.credentials[1],
                 url=self.base_url,
+                context=self.context,
             )
             response = run.get_status()
             status = response["Status"]
@@ -1395,6 +1426,7 @@ class MLOpsTrainingExperiment(BaseMLOps):
             login=self.credentials[0],
             password=self.credentials[1],
             url=self.base_url,
+            context=self.context,
         )
         exec.get_status()
 
@@ -1525,6 +1557,7 @@ class MLOpsTrainingClient(BaseMLOpsClient):
             password=self.credentials[1],
             group=group,
             url=self.base_url,
+            context=self.context,
         )
 
     def __get_repeated_thash(
@@ -1554,7 +1587,7 @@ class MLOpsTrainingClient(BaseMLOpsClient):
             str | None: THash if it is found, otherwise, None is returned
         """
         url = f"{self.base_url}/training/search"
-        response = requests.get(
+        response = self.session.get(
             url,
             headers={
                 "Authorization": "Bearer "
@@ -1622,7 +1655,7 @@ class MLOpsTrainingClient(BaseMLOpsClient):
 
         data = {"experiment_name": experiment_name, "model_type": model_type}
 
-        response = requests.post(
+        response = self.session.post(
             url,
             data=data,
             headers={
@@ -1728,4 +1761,5 @@ class MLOpsTrainingClient(BaseMLOpsClient):
             password=self.credentials[1],
             group=group,
             url=self.base_url,
+            context=self.context,
         )